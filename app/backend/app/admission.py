@@ -0,0 +1,116 @@
+import asyncio
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict
+
+from loguru import logger
+
+from app.metrics import admissions, queue_wait_seconds
+from app.utils.deadline import remaining
+
+# Admission control for agent runs (per process). Runs are split by expected cost into
+# separate pools: "heavy" place-planning turns (a candidate LLM call plus up to ten
+# scrapes) and "light" everything else. Each pool runs at most its own number of turns
+# at once, queues a few more (FIFO) for at most CHAT_QUEUE_TIMEOUT_SECONDS, and turns the
+# rest away with a Retry-After hint. The pool sizes are the weights: a burst of planning
+# queries fills the heavy pool and queues there, while cheap questions keep their slots.
+# /chat/batch items run in a third "batch" pool, so bulk jobs never take interactive slots.
+CHAT_MAX_CONCURRENT_RUNS = int(os.getenv("CHAT_MAX_CONCURRENT_RUNS", "16"))
+CHAT_MAX_QUEUE = int(os.getenv("CHAT_MAX_QUEUE", "32"))
+CHAT_MAX_HEAVY_RUNS = int(os.getenv("CHAT_MAX_HEAVY_RUNS", "4"))
+CHAT_MAX_HEAVY_QUEUE = int(os.getenv("CHAT_MAX_HEAVY_QUEUE", "8"))
+CHAT_MAX_BATCH_RUNS = int(os.getenv("CHAT_MAX_BATCH_RUNS", "64"))
+CHAT_MAX_BATCH_QUEUE = int(os.getenv("CHAT_MAX_BATCH_QUEUE", "64"))
+CHAT_QUEUE_TIMEOUT_SECONDS = float(os.getenv("CHAT_QUEUE_TIMEOUT_SECONDS", "10"))
+
+
+class AdmissionRejected(Exception):
+    """The run was not admitted; `status` is 429 (queue full) or 503 (waited too long)."""
+
+    def __init__(self, status: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """One pool of run slots with a bounded wait queue."""
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float, avg_run: float):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        self.running = 0
+        self.waiting = 0
+        self._avg_run = avg_run  # EWMA of run seconds, seeds the Retry-After estimate
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free for a new arrival."""
+        backlog = (self.waiting + 1) / self.max_concurrent
+        return max(1, min(60, math.ceil(self._avg_run * backlog)))
+
+    def _reject(self, status: int, reason: str) -> AdmissionRejected:
+        admissions.inc(pool=self.name, outcome=reason)
+        logger.warning(f"{self.name} chat run rejected ({reason}): running={self.running} waiting={self.waiting}")
+        return AdmissionRejected(status, reason, self.retry_after())
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one run slot for the block, waiting in the queue if needed."""
+        queued = time.monotonic()
+        if self._slots.locked():
+            if self.waiting >= self.max_queue:
+                raise self._reject(429, "queue_full")
+            left = remaining()
+            timeout = self.queue_timeout if left is None else max(0.0, min(self.queue_timeout, left))
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=timeout)
+            except asyncio.TimeoutError:
+                raise self._reject(503, "queue_timeout") from None
+            finally:
+                self.waiting -= 1
+        else:
+            await self._slots.acquire()
+        started = time.monotonic()
+        queue_wait_seconds.observe(started - queued, pool=self.name)
+        admissions.inc(pool=self.name, outcome="admitted")
+        self.running += 1
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self._slots.release()
+            self._avg_run = 0.8 * self._avg_run + 0.2 * (time.monotonic() - started)
+
+    def report(self) -> Dict:
+        return {
+            "running": self.running, "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent, "max_queue": self.max_queue,
+            "avg_run_seconds": round(self._avg_run, 2),
+        }
+
+
+class CostScheduler:
+    """Routes each run to the pool for its cost class ("light" or "heavy"), or to "batch"."""
+
+    def __init__(self, pools: Dict[str, AdmissionController]):
+        self.pools = pools
+
+    def slot(self, cost: str):
+        return self.pools.get(cost, self.pools["light"]).slot()
+
+    def report(self) -> Dict:
+        return {name: pool.report() for name, pool in self.pools.items()}
+
+
+admission = CostScheduler({
+    "light": AdmissionController("light", CHAT_MAX_CONCURRENT_RUNS, CHAT_MAX_QUEUE, CHAT_QUEUE_TIMEOUT_SECONDS, 5.0),
+    "heavy": AdmissionController("heavy", CHAT_MAX_HEAVY_RUNS, CHAT_MAX_HEAVY_QUEUE, CHAT_QUEUE_TIMEOUT_SECONDS, 20.0),
+    "batch": AdmissionController("batch", CHAT_MAX_BATCH_RUNS, CHAT_MAX_BATCH_QUEUE, CHAT_QUEUE_TIMEOUT_SECONDS, 10.0),
+})
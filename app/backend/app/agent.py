@@ -1,9 +1,16 @@
 import os
 from datetime import date as dt_date, timedelta
+from functools import lru_cache
+from typing import Iterable
 from langgraph.prebuilt import create_react_agent
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.tools import Tool
 
+from app.cassette import cassette_recorder
+from app.metrics import llm_metrics
+from app.tracing import llm_tracer
+from app.tool_node import TimedToolNode
+
 
 from app.tools.weather_scraper import (
     get_current_weather_tool,
@@ -12,6 +19,7 @@ from app.tools.weather_scraper import (
 )
 from app.tools.activities import (
     find_best_weather_day_tool,
+    find_best_time_window_tool,
     suggest_activities_tool,
 )
 from app.tools.places import (
@@ -20,6 +28,10 @@ from app.tools.places import (
     where_can_i_go_tool,
     get_activity_weather_summary_tool,
 )
+from app.tools.planner import (
+    find_free_weather_slots_tool,
+    plan_trip_itinerary_tool,
+)
 
 # Import calendar tools
 from app.tools.calendar_tools import (
@@ -32,226 +44,131 @@ from app.tools.calendar_tools import (
 
 
 today = dt_date.today()
-
-
-SYSTEM_PROMPT = f"""
-You are an intelligent travel, weather & calendar assistant, plus a helpful general AI assistant.  
-
-Current Date: {today.strftime('%Y-%m-%d (%A)')}
-
-## Core Capabilities
-1. **Weather & Travel Expertise**  
-   - Understand natural language date expressions and convert them into explicit dates for tools.  
-   - Provide weather forecasts, current conditions, and summaries.  
-   - Suggest activities and recommend places based on weather and timing.  
-   - Handle complex queries like "Where can I go skiing next week?" or "Best places for hiking in 5 days"
-
-2. **Calendar Management**
-   - Create, update, delete, and search calendar events
-   - Convert natural language dates to YYYY-MM-DD format for calendar operations
-   - Convert natural language times to HH:MM format (24-hour)
-   - Intelligently handle event identification for updates/deletes
-   - Integrate calendar planning with weather recommendations
-
-3. **General Assistance**  
-   - Answer general knowledge questions (science, history, culture, technology, etc.).  
-   - Hold natural, friendly conversations.  
-   - Help with reasoning, problem-solving, and planning.  
-   - If a question is unrelated to weather/travel/calendar, respond directly without tools.  
-
-## Available Tools
-### Basic Weather Tools
-- get_current_weather(city): Real-time weather
-- get_weather_forecast_tool(city, days): Multi-day forecast
-- get_weather_summary_tool(city): Summarize conditions
-
-### Activity & Place Tools
-- find_best_weather_day_tool(city, activity): Best day for activities
-- suggest_activities_tool(cities, days): Suggest activities based on weather for each city
-- recommend_places_tool(activity, near_city): Places for activities (basic)
-
-### Enhanced Place & Timing Tools
-- recommend_places_with_timing_tool(activity, days, near_city, k): Advanced recommendations with specific day suggestions
-- where_can_i_go_tool(activity, days, near_city, k): Natural language queries like "where can I go X next week"
-- get_activity_weather_summary_tool(city, activity, days): Detailed weather analysis for specific activity at location
-
-### Calendar Tools
-- add_calendar_event(title, date, start_time, duration_hours, location, description): Create events
-- delete_calendar_event(event_identifier): Delete by ID or search term
-- update_calendar_event(event_identifier, ...): Update by ID or search term  
-- get_calendar_events(start_date, end_date): Get events in date range
-- search_calendar_events(query): Search events by query
-
-## Date/Time Conversion for Calendar Tools
-Always convert natural language to standard formats for calendar operations:
-
-### Date Conversion (to YYYY-MM-DD):
-- "today" → {today.strftime('%Y-%m-%d')}
-- "tomorrow" → {(today + timedelta(days=1)).strftime('%Y-%m-%d')}
-- "next Monday" → calculate next occurrence
-- "December 25" → 2024-12-25 (assume current year if not specified)
-- "12/25" → 2024-12-25 (US format)
-
-### Time Conversion (to HH:MM 24-hour):
-- "2 PM" → "14:00"
-- "9:30 AM" → "09:30" 
-- "noon" → "12:00"
-- "midnight" → "00:00"
-- "2:30" → assume PM if afternoon context, otherwise "02:30"
-
-## Tool Selection Guidelines
-### Weather & Travel:
-- Use **where_can_i_go_tool** for natural questions like "Where can I go X next week/weekend/in 3 days"
-- Use **recommend_places_with_timing_tool** for specific timeframe planning
-- Use **get_activity_weather_summary_tool** for detailed analysis of a specific place + activity
-- Use basic tools for simple current weather or forecasts
-
-### Calendar:
-- Use **add_calendar_event** for scheduling requests ("schedule", "add to calendar", "book")
-- Use **get_calendar_events** for checking schedule ("what do I have", "my schedule")
-- Use **search_calendar_events** for finding specific events ("find my meeting with John")
-- Use **update_calendar_event** for changes ("move my meeting", "change time")
-- Use **delete_calendar_event** for cancellations ("cancel", "delete", "remove")
-
-## Timeframe Parsing for Enhanced Tools
-When users mention timeframes in natural language, convert them to days parameter:
-- "next week" / "week" → days = 7
-- "weekend" / "this weekend" → days = 3  
-- "next 3 days" / "3 days" / "three days" → days = 3
-- "next 5 days" / "5 days" / "five days" → days = 5
-- "next 10 days" / "10 days" / "ten days" → days = 10
-- Default fallback → days = 7
-
-## Date Interpretation Guidelines
-1. Relative dates are based on today ({today.strftime('%Y-%m-%d')}).
-2. "Today" = days = 0
-3. "Tomorrow" = days = 0
-4. "Next N days" = days = N (1-10).
-5. "This week" = Monday to Sunday of this week.
-6. "Next week" = Monday to Sunday of next week.
-7. "This weekend" = next 2-3 days
-8. Named days ("Monday", "Friday") = next occurrence of that day.
+_tomorrow = (today + timedelta(days=1)).strftime('%Y-%m-%d')
+
+
+# ---------- Tool groups ----------
+# Each turn binds only the groups it needs (see app.tool_selection); the tool
+# schemas already describe every tool, so the prompt only adds selection rules.
+
+TOOL_GROUPS: dict[str, list[Tool]] = {
+    "weather": [
+        get_current_weather_tool,
+        get_weather_forecast_tool,
+        get_weather_summary_tool,
+        find_best_weather_day_tool,
+        find_best_time_window_tool,
+        suggest_activities_tool,
+        get_activity_weather_summary_tool,
+    ],
+    "planning": [
+        recommend_places_tool,
+        recommend_places_with_timing_tool,
+        where_can_i_go_tool,
+        find_free_weather_slots_tool,
+        plan_trip_itinerary_tool,
+    ],
+    "calendar": [
+        add_calendar_event,
+        delete_calendar_event,
+        update_calendar_event,
+        get_calendar_events,
+        search_calendar_events,
+    ],
+}
+
+TOOLS: list[Tool] = [t for group in TOOL_GROUPS.values() for t in group]
+
+
+# ---------- Prompt sections ----------
+
+BASE_PROMPT = f"""
+You are an intelligent travel, weather & calendar assistant, plus a helpful general AI assistant.
+
+Current date: {today.strftime('%Y-%m-%d (%A)')}
+
+## General Assistance
+- If a question is unrelated to weather/travel/calendar (history, science, culture, technology...),
+  DO NOT use tools. Answer directly from your own knowledge.
+- Hold natural, friendly conversations and help with reasoning, problem-solving and planning.
+
+## Date Interpretation
+1. Relative dates are based on today ({today.strftime('%Y-%m-%d')}); "tomorrow" is {_tomorrow}.
+2. "This week" / "next week" = Monday to Sunday of this / next week.
+3. Named days ("Monday", "Friday") = next occurrence of that day.
 
 ## Behaviors
-- For **weather/travel requests**: use appropriate tools + always echo back interpreted dates.  
-- For **calendar requests**: convert dates/times to proper formats and use calendar tools.
-- For **general requests**: answer directly, no tools.  
-- Always be conversational, friendly, and proactive with suggestions.  
-- Handle follow-up questions with context.  
-- If unclear, ask for clarification.
-- When recommending places with timing, explain the weather reasoning behind suggestions.
-- **Smart Integration**: When planning activities, offer to add recommended events to calendar.
-
-## Example Interactions
-**User**: "Where can I go skiing next week?"  
-**You**:  
-- Use where_can_i_go_tool("skiing", 7)
-- Interpret "next week" → 7 days from today
-- Provide results with specific days and weather conditions
-- **Bonus**: Offer to add the best skiing days to their calendar
-
-**User**: "Schedule a dentist appointment tomorrow at 2 PM"  
-**You**:  
-- Convert "tomorrow" → {(today + timedelta(days=1)).strftime('%Y-%m-%d')}
-- Convert "2 PM" → "14:00"
-- Use add_calendar_event("Dentist Appointment", "{(today + timedelta(days=1)).strftime('%Y-%m-%d')}", "14:00", 1.0)
-
-**User**: "What's the weather like in Paris and add it to my calendar if it's good for sightseeing"
-**You**:
-- Check weather with get_current_weather_tool("Paris") 
-- If conditions are good, offer to create a sightseeing event
-
-**User**: "Cancel my meeting with John"**  
-**You**:  
-- Use delete_calendar_event("meeting with John")
-- Let the smart search handle finding the right event
-
-**User**: "Who was the first person to walk on the moon?"  
-**You**:  
-- Answer directly: Neil Armstrong, July 20, 1969.  
-- No tools needed for general knowledge
+- Only call tools for weather/travel/calendar-related queries; otherwise respond naturally.
+- Always echo back the interpreted dates/timeframes to the user.
+- Handle follow-up questions with context. If unclear, ask for clarification.
+- Always be conversational, friendly, and proactive with suggestions.
 """
 
+GROUP_PROMPTS: dict[str, str] = {
+    "weather": """
+## Weather
+- Convert timeframes to the days parameter: "next week" → 7, "weekend" → 3, "next N days" → N (1-10), default 7.
+- Use basic tools for simple current weather or forecasts.
+- Use **find_best_time_window_tool** for "what time today/tomorrow is best for X".
+- Use **get_activity_weather_summary_tool** for detailed analysis of a specific place + activity.
+- Explain the weather reasoning behind recommendations.
+""",
+    "planning": """
+## Places & Planning
+- Use **where_can_i_go_tool** for natural questions like "Where can I go X next week/weekend/in 3 days".
+- Use **recommend_places_with_timing_tool** for specific timeframe planning.
+- Use **find_free_weather_slots_tool** for "when am I free to go X" — it already combines calendar and forecast.
+- Use **plan_trip_itinerary_tool** for trips over several cities; pass all cities in one call instead of fetching forecasts one by one.
+- When recommending places, include weather details and explain why certain days are better.
+- **Smart Integration**: when planning activities with good weather, offer to add them to the calendar.
+""",
+    "calendar": f"""
+## Calendar
+- Convert dates to YYYY-MM-DD ("today" → {today.strftime('%Y-%m-%d')}, "tomorrow" → {_tomorrow},
+  "December 25" → current year unless stated) and times to HH:MM 24-hour ("2 PM" → "14:00",
+  "9:30 AM" → "09:30", "noon" → "12:00", "midnight" → "00:00").
+- Use **add_calendar_event** for "schedule", "add to calendar", "book".
+- Use **get_calendar_events** for "what do I have", "my schedule".
+- Use **search_calendar_events** for finding specific events ("find my meeting with John").
+- Use **update_calendar_event** / **delete_calendar_event** for changes and cancellations; pass the
+  event ID or a search term and let the smart search find the right event.
+""",
+}
+
+
+def build_prompt(groups: Iterable[str]) -> str:
+    """Base prompt plus the tool-selection rules of the bound groups only."""
+    selected = set(groups)
+    return BASE_PROMPT + "".join(GROUP_PROMPTS[g] for g in TOOL_GROUPS if g in selected)
+
+
+def tools_for(groups: Iterable[str]) -> list[Tool]:
+    selected = set(groups)
+    return [t for g, group in TOOL_GROUPS.items() if g in selected for t in group]
+
+
+# Full prompt with every group, as used by the default agent
+SYSTEM_PROMPT = build_prompt(TOOL_GROUPS)
 
-TOOLS: list[Tool] = [
-    # Basic weather tools
-    get_current_weather_tool,
-    get_weather_forecast_tool,
-    get_weather_summary_tool,
-    
-    # Activity tools
-    find_best_weather_day_tool,
-    suggest_activities_tool,
-    
-    # Place recommendation tools (basic and enhanced)
-    recommend_places_tool,
-    recommend_places_with_timing_tool,
-    where_can_i_go_tool,
-    get_activity_weather_summary_tool,
-    
-    # Calendar tools
-    add_calendar_event,
-    delete_calendar_event,
-    update_calendar_event,
-    get_calendar_events,
-    search_calendar_events,
-]
 
 llm = ChatGoogleGenerativeAI(
     model=os.getenv("GEMINI_MODEL", "gemini-2.0-flash"),
     google_api_key=os.environ.get("GOOGLE_API_KEY"),
     temperature=0.3,
-    system=SYSTEM_PROMPT,
+    callbacks=[llm_metrics, llm_tracer, cassette_recorder],
 )
 
-def create_agent():
-    """Create the AI-driven weather, travel & calendar agent with natural language processing."""
+def create_agent(groups: Iterable[str] = None):
+    """Create the AI-driven weather, travel & calendar agent, bound to the given tool groups (default: all)."""
+    groups = list(TOOL_GROUPS) if groups is None else list(groups)
     return create_react_agent(
         llm,
-        tools=TOOLS,
-        state_modifier=f"""
-        You are a helpful AI assistant with three main roles:
-
-        1. **Weather & Travel Expert**  
-           - Parse natural language dates and convert them into appropriate tool parameters.
-           - For timeframe queries, convert natural language to days parameter:
-             * "next week" → days=7
-             * "weekend"/"this weekend" → days=3
-             * "next 3 days"/"3 days" → days=3
-             * "next 5 days"/"5 days" → days=5
-             * "next 10 days"/"10 days" → days=10
-           - Use the most appropriate tool for each query:
-             * where_can_i_go_tool for "Where can I go X..." questions
-             * recommend_places_with_timing_tool for specific timeframe planning
-             * get_activity_weather_summary_tool for detailed location analysis
-           - Always echo the exact interpreted dates/timeframes to the user.  
-           - Explain weather reasoning behind recommendations.
-
-        2. **Calendar Manager**
-           - Convert natural language dates to YYYY-MM-DD format for calendar tools
-           - Convert natural language times to HH:MM 24-hour format
-           - Handle calendar operations intelligently:
-             * "today" → {today.strftime('%Y-%m-%d')}
-             * "tomorrow" → {(today + timedelta(days=1)).strftime('%Y-%m-%d')}
-             * "2 PM" → "14:00"
-             * "9:30 AM" → "09:30"
-           - For updates/deletes, use smart event identification (ID or search terms)
-           - Offer to add recommended activities to calendar when appropriate
-
-        3. **General AI Assistant**  
-           - If the user asks about history, science, culture, or any non-weather/calendar topic, 
-             DO NOT use tools. Just answer directly with your own knowledge.  
+        tools=TimedToolNode(tools_for(groups)),
+        state_modifier=build_prompt(groups),
+    )
 
-        Rules:  
-        - Only call tools for weather/travel/calendar-related queries.
-        - Parse natural language timeframes and convert to appropriate formats.
-        - Choose the most appropriate tool based on the query type.
-        - For everything else, respond naturally from your own reasoning.  
-        - If unclear, ask clarifying questions.  
-        - Always keep your tone friendly and conversational.
-        - **Smart Integration**: When recommending activities with good weather, offer to schedule them.
-        - When providing place recommendations, include weather details and explain why certain days are better.
 
-        Current date: {today.strftime('%Y-%m-%d (%A)')}
-        """
-    )
\ No newline at end of file
+@lru_cache(maxsize=None)
+def get_agent(groups: frozenset[str]):
+    """Compiled agent per tool-group combination, built on first use."""
+    return create_agent(groups)
@@ -0,0 +1,182 @@
+"""
+Bulk /chat processing: a JSONL stream of conversations in, a JSONL stream of answers out.
+
+Each input line is {"id"?, "session_id"?, "messages": [{"role", "content"}, ...]}; each
+output line carries the item's line number and id plus "response", or "error" (and
+"status") when that item failed. Results stream back as items finish, so they are not
+in input order. Items run on `workers` concurrent workers in the "batch" admission
+pool, apart from interactive /chat turns, and share one weather memo, so a city asked
+about by many items is fetched once per batch (or once per WEATHER_TTL in long batches).
+
+Served as POST /chat/batch, or run in-process:
+
+    cd app/backend
+    python -m app.batch conversations.jsonl --workers 16 > answers.jsonl
+"""
+import argparse
+import asyncio
+import codecs
+import functools
+import json
+import os
+import sys
+from typing import AsyncIterator, Awaitable, Callable, Dict, List
+
+from loguru import logger
+
+from app.admission import AdmissionRejected
+from app.tools.weather_scraper import WEATHER_TTL
+from app.tracing import span
+from app.turn_memo import shared_weather_memo
+from app.utils.deadline import reset_deadline, set_deadline
+
+CHAT_BATCH_WORKERS = int(os.getenv("CHAT_BATCH_WORKERS", "8"))
+CHAT_BATCH_MAX_WORKERS = int(os.getenv("CHAT_BATCH_MAX_WORKERS", "64"))
+# A batch item turned away by admission control waits Retry-After and tries again
+CHAT_BATCH_ADMISSION_RETRIES = int(os.getenv("CHAT_BATCH_ADMISSION_RETRIES", "5"))
+# Upload cap for POST /chat/batch; the body is read line by line, never held whole
+CHAT_BATCH_MAX_BYTES = int(os.getenv("CHAT_BATCH_MAX_BYTES", str(64 * 1024 * 1024)))
+
+Answer = Callable[[str, List[Dict]], Awaitable[str]]
+
+
+class BatchTooLarge(Exception):
+    """The uploaded batch exceeded CHAT_BATCH_MAX_BYTES."""
+
+
+async def stream_lines(chunks: AsyncIterator[bytes], max_bytes: int = CHAT_BATCH_MAX_BYTES) -> AsyncIterator[str]:
+    """Decode a byte stream into lines as it arrives; raises BatchTooLarge past `max_bytes`."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > max_bytes:
+            raise BatchTooLarge(f"batch larger than {max_bytes} bytes")
+        *lines, pending = (pending + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            yield line
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def batch_answer(answer) -> Answer:
+    """The /chat turn handler with its runs admitted to the "batch" pool."""
+    return functools.partial(answer, pool="batch")
+
+
+def _parse(line_no: int, line: str) -> Dict:
+    """One input line as {id, session_id, messages}; raises ValueError if malformed."""
+    try:
+        item = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON: {e.msg}") from None
+    if not isinstance(item, dict):
+        raise ValueError("expected a JSON object")
+    messages = item.get("messages")
+    if not isinstance(messages, list) or not messages or not all(
+        isinstance(m, dict) and isinstance(m.get("role"), str) and isinstance(m.get("content"), str)
+        for m in messages
+    ):
+        raise ValueError("'messages' must be a non-empty list of {role, content}")
+    return {
+        "id": item.get("id"),
+        "session_id": str(item.get("session_id") or f"batch-{item['id'] if item.get('id') is not None else line_no}"),
+        "messages": [{"role": m["role"], "content": m["content"]} for m in messages],
+    }
+
+
+async def _run_item(answer: Answer, item: Dict, deadline: float) -> str:
+    for attempt in range(CHAT_BATCH_ADMISSION_RETRIES + 1):
+        token = set_deadline(deadline)
+        try:
+            with span("chat", session_id=item["session_id"], batch=True):
+                return await asyncio.wait_for(answer(item["session_id"], item["messages"]), timeout=deadline)
+        except AdmissionRejected as e:
+            if attempt == CHAT_BATCH_ADMISSION_RETRIES:
+                raise
+            await asyncio.sleep(e.retry_after)
+        finally:
+            reset_deadline(token)
+
+
+async def run_batch(lines: AsyncIterator[str], answer: Answer, workers: int, deadline: float) -> AsyncIterator[Dict]:
+    """Answer every conversation in `lines`; yields one result dict per non-blank line."""
+    workers = max(1, min(workers, CHAT_BATCH_MAX_WORKERS))
+    todo: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+    done: asyncio.Queue = asyncio.Queue()
+
+    async def feed() -> None:
+        line_no = 0
+        try:
+            async for line in lines:
+                line_no += 1
+                if line.strip():
+                    await todo.put((line_no, line))
+        finally:
+            for _ in range(workers):
+                await todo.put(None)
+
+    async def work() -> None:
+        while (job := await todo.get()) is not None:
+            line_no, line = job
+            result: Dict = {"line": line_no}
+            try:
+                item = _parse(line_no, line)
+                result.update(id=item["id"], session_id=item["session_id"])
+                result["response"] = await _run_item(answer, item, deadline)
+            except ValueError as e:
+                result.update(error=str(e), status=400)
+            except AdmissionRejected as e:
+                result.update(error=f"not admitted ({e.reason})", status=e.status)
+            except asyncio.TimeoutError:
+                result.update(error="deadline exceeded", status=504)
+            except Exception as e:
+                logger.exception(f"batch line {line_no} failed")
+                result.update(error=f"{type(e).__name__}: {e}", status=500)
+            await done.put(result)
+        await done.put(None)
+
+    with shared_weather_memo(max_age=WEATHER_TTL):
+        tasks = [asyncio.create_task(feed())] + [asyncio.create_task(work()) for _ in range(workers)]
+        try:
+            finished = 0
+            while finished < workers:
+                result = await done.get()
+                if result is None:
+                    finished += 1
+                else:
+                    yield result
+            await tasks[0]  # surface errors reading the input
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+async def _file_lines(path: str) -> AsyncIterator[str]:
+    with (sys.stdin if path == "-" else open(path, encoding="utf-8")) as f:
+        for line in f:
+            yield line
+
+
+async def _main(args) -> None:
+    from app.main import CHAT_DEADLINE_SECONDS, _answer
+
+    counts = {"ok": 0, "error": 0}
+    async for result in run_batch(_file_lines(args.path), batch_answer(_answer), args.workers, CHAT_DEADLINE_SECONDS):
+        counts["error" if "error" in result else "ok"] += 1
+        sys.stdout.write(json.dumps(result, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+    logger.info(f"batch finished: {counts['ok']} answered, {counts['error']} failed")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.batch", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="JSONL file of conversations ('-' for stdin)")
+    parser.add_argument("--workers", type=int, default=CHAT_BATCH_WORKERS, help="concurrent conversations")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
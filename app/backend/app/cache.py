@@ -10,7 +10,7 @@ r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=
 
 import json
 import os
-from typing import Optional
+from typing import List, Optional
 
 try:
     import redis  # type: ignore
@@ -35,9 +35,26 @@ class _InMemory:
             return None
         return value
 
+    def mget(self, keys: List[str]) -> List[Optional[str]]:
+        return [self.get(k) for k in keys]
+
     def setex(self, key: str, ttl: int, value: str) -> None:
         self._store[key] = (value, __import__("time").time() + ttl)
 
+    def set_nx(self, key: str, ttl: int, value: str) -> bool:
+        """Set only if missing (like SET NX EX); True if this call set it."""
+        if self.get(key) is not None:
+            return False
+        self.setex(key, ttl, value)
+        return True
+
+    def ttl(self, key: str) -> int:
+        """Seconds to live like Redis TTL: -2 if missing, -1 if no expiry."""
+        if self.get(key) is None:
+            return -2
+        expires_at = self._store[key][1]
+        return -1 if expires_at is None else int(expires_at - __import__("time").time())
+
 
 if redis and REDIS_HOST:
     _r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
@@ -48,8 +65,17 @@ if redis and REDIS_HOST:
         def get(self, key: str):
             v = _r.get(key)
             return v.decode("utf-8") if isinstance(v, (bytes, bytearray)) else v
+        def mget(self, keys):
+            return [v.decode("utf-8") if isinstance(v, (bytes, bytearray)) else v for v in _r.mget(keys)]
         def setex(self, key: str, ttl: int, value: str):
             _r.setex(key, ttl, value)
+        def set_nx(self, key: str, ttl: int, value: str) -> bool:
+            return bool(_r.set(key, value, nx=True, ex=ttl))
+        def ttl(self, key: str) -> int:
+            return int(_r.ttl(key))
     r = _RedisWrapper()
+    # Raw client for components that need atomic scripts (e.g. the scrape rate limiter)
+    redis_client = _r
 else:
     r = _InMemory()
+    redis_client = None
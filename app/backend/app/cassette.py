@@ -0,0 +1,178 @@
+import contextvars
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage, message_to_dict
+from loguru import logger
+
+# Record mode for /chat turns: every LLM exchange and weather.com fetch made while the
+# turn runs is captured into a gzipped JSON cassette, which `python -m loadtest.replay`
+# re-runs offline. While recording, the weather cache only sees entries written during
+# the turn (as if it started cold), so every fetch the turn needs ends up in the cassette.
+# Opt in per request (X-Cassette: record, admins only) or for all turns with
+# CASSETTE_RECORD_ALL; only the newest CASSETTE_KEEP files are kept.
+CASSETTE_DIR = os.getenv("CASSETTE_DIR", "/tmp/chat-cassettes")
+CASSETTE_RECORD_ALL = os.getenv("CASSETTE_RECORD_ALL", "false").lower() in ("1", "true", "yes")
+CASSETTE_KEEP = int(os.getenv("CASSETTE_KEEP", "100"))
+
+_active: contextvars.ContextVar[Optional["Cassette"]] = contextvars.ContextVar("cassette", default=None)
+recent_cassettes: deque = deque(maxlen=CASSETTE_KEEP)
+
+
+def llm_input_key(messages: List[BaseMessage]) -> str:
+    """Stable key of a model input, used to match recorded answers on replay.
+
+    Tool results count by tool name only: their text may carry run-specific values
+    (e.g. new calendar event ids) that would otherwise never match.
+    """
+    parts = [(m.type, m.name if m.type == "tool" else
+              m.content if isinstance(m.content, str) else json.dumps(m.content, sort_keys=True),
+              json.dumps([(c["name"], c["args"]) for c in getattr(m, "tool_calls", None) or []],
+                         sort_keys=True, default=str)) for m in messages]
+    return hashlib.sha1(json.dumps(parts).encode()).hexdigest()
+
+
+class Cassette:
+    def __init__(self, session_id: str, messages: List[Dict], calendar: List[Dict]):
+        self.id = uuid.uuid4().hex[:16]
+        self.session_id = session_id
+        self.messages = messages
+        self.calendar = calendar
+        self.llm: List[Dict] = []
+        self.http: List[Dict] = []
+        self.response: str | None = None
+        self.cache: Dict[str, str] = {}  # turn-local view of the weather cache
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add_llm(self, entry: Dict) -> None:
+        with self._lock:
+            entry["seq"] = len(self.llm)
+            self.llm.append(entry)
+
+    def add_http(self, entry: Dict) -> None:
+        with self._lock:
+            entry["seq"] = len(self.http)
+            self.http.append(entry)
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id, "session_id": self.session_id, "recorded_at": self.started,
+            "wall_ms": round((time.perf_counter() - self._t0) * 1000, 1),
+            "messages": self.messages, "calendar": self.calendar,
+            "llm": self.llm, "http": self.http, "response": self.response,
+        }
+
+
+def recording() -> bool:
+    return _active.get() is not None
+
+
+def turn_cache() -> Dict[str, str] | None:
+    """The recording turn's own cache entries, or None when not recording."""
+    cassette = _active.get()
+    return None if cassette is None else cassette.cache
+
+
+def cassette_path(cassette_id: str) -> str:
+    return os.path.join(CASSETTE_DIR, f"{cassette_id}.json.gz")
+
+
+def _prune() -> None:
+    """Delete all but the newest CASSETTE_KEEP files (by mtime, so workers sharing the directory agree)."""
+    try:
+        paths = [os.path.join(CASSETTE_DIR, n) for n in os.listdir(CASSETTE_DIR) if n.endswith(".json.gz")]
+        for path in sorted(paths, key=os.path.getmtime, reverse=True)[CASSETTE_KEEP:]:
+            os.remove(path)
+    except OSError as e:
+        logger.warning(f"cassette cleanup failed: {e}")
+
+
+@contextmanager
+def record(
+    enabled: bool, session_id: str, messages: List[Dict], calendar: Callable[[], List[Dict]],
+) -> Iterator[Optional[Cassette]]:
+    """Capture the block's LLM and HTTP traffic; the cassette is saved when the block exits.
+
+    `calendar` returns the session's calendar snapshot; it is only called when recording.
+    """
+    if not enabled:
+        yield None
+        return
+    cassette = Cassette(session_id, messages, calendar())
+    token = _active.set(cassette)
+    try:
+        yield cassette
+    finally:
+        _active.reset(token)
+        try:
+            os.makedirs(CASSETTE_DIR, exist_ok=True)
+            data = cassette.to_dict()
+            with gzip.open(cassette_path(cassette.id), "wt", encoding="utf-8") as f:
+                json.dump(data, f, default=str)
+            recent_cassettes.append({
+                "id": cassette.id, "session_id": session_id, "recorded_at": cassette.started,
+                "wall_ms": data["wall_ms"], "llm_calls": len(cassette.llm), "http_fetches": len(cassette.http),
+                "path": cassette_path(cassette.id),
+            })
+            _prune()
+        except OSError as e:
+            logger.warning(f"saving cassette {cassette.id} failed: {e}")
+
+
+def record_http(method: str, url: str, request_json, resp) -> None:
+    """Called by the scraper after each weather.com response."""
+    cassette = _active.get()
+    if cassette is None:
+        return
+    cassette.add_http({
+        "method": method, "url": url, "json": request_json,
+        "status": resp.status_code,
+        "headers": {k: v for k, v in resp.headers.items() if k.lower() in ("content-type", "etag", "last-modified")},
+        "body": resp.content.decode("utf-8", errors="replace"),
+    })
+
+
+class CassetteRecorder(BaseCallbackHandler):
+    """LangChain callback capturing chat model inputs and outputs into the active cassette."""
+
+    def __init__(self):
+        self._open: Dict[UUID, Dict] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs) -> None:
+        if recording():
+            batch = messages[0] if messages else []
+            params = kwargs.get("invocation_params") or {}
+            self._open[run_id] = {
+                "model": str(params.get("model") or (serialized or {}).get("name")).removeprefix("models/"),
+                "key": llm_input_key(batch),
+                "input": [message_to_dict(m) for m in batch],
+                "_t0": time.perf_counter(),
+            }
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        entry = self._open.pop(run_id, None)
+        cassette = _active.get()
+        if entry is None or cassette is None:
+            return
+        message = response.generations[0][0].message
+        entry["output"] = message_to_dict(message)
+        entry["ms"] = round((time.perf_counter() - entry.pop("_t0")) * 1000, 1)
+        cassette.add_llm(entry)
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        self._open.pop(run_id, None)
+
+
+cassette_recorder = CassetteRecorder()
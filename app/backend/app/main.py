@@ -1,9 +1,35 @@
+import asyncio
+import copy
+import hmac
+import json
 import logging
-from fastapi import FastAPI
+import os
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List
-from app.agent import create_agent
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from app.admission import AdmissionRejected, admission
+from app.agent import get_agent
+from app.batch import CHAT_BATCH_MAX_BYTES, CHAT_BATCH_WORKERS, BatchTooLarge, batch_answer, run_batch, stream_lines
+from app.cassette import CASSETTE_RECORD_ALL, recent_cassettes, record
+from app.metrics import registry, request_seconds
+from app.prewarm import PREWARM_ENABLED, PREWARM_MAX_PER_CYCLE, last_cycle, prewarm_loop, warm_cities
+from app.profiling import list_profiles, profiled, read_profile, should_profile
+from app.router import router, run_route
+from app.tool_selection import recent_reports, select_tool_groups, token_report, turn_cost
+from app.tools.calendar_tools import get_calendar_manager
+from app.tools.activities import score_activities
+from app.tools.weather_scraper import (
+    get_current_conditions_many, get_weather_data_many, revalidation_report, scrape_breaker, scrape_limiter,
+)
+from app.tracing import annotate, exporter, span
+from app.turn_memo import turn_memo
+from app.utils.constants import _ACTIVITY_PREFS
+from app.utils.deadline import remaining, reset_deadline, set_deadline
 
 from loguru import logger as log
 
@@ -11,8 +37,16 @@ from loguru import logger as log
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background cache prewarming for popular cities
+    task = asyncio.create_task(prewarm_loop()) if PREWARM_ENABLED else None
+    yield
+    if task:
+        task.cancel()
+
 # FastAPI app setup
-app = FastAPI(title="Gemini Weather & Activities (Chat)")
+app = FastAPI(title="Gemini Weather & Activities (Chat)", lifespan=lifespan)
 
 origins = ["*"]
 app.add_middleware(
@@ -21,7 +55,60 @@ app.add_middleware(
     allow_methods=["*"], allow_headers=["*"]
 )
 
-agent = create_agent()
+class RecordLatency:
+    """Request latency per route; plain ASGI so it does not break disconnect detection,
+    and streamed responses are timed until their last chunk is sent."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Label by route template so ids in paths do not explode the series count
+            route = scope.get("route")
+            request_seconds.observe(
+                time.perf_counter() - started,
+                path=getattr(route, "path", "unmatched"), status=str(status),
+            )
+
+
+app.add_middleware(RecordLatency)
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=exc.status,
+        content={"detail": "The assistant is busy right now. Please try again shortly."},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+# Callers sending this value in X-Admin-Token may profile (X-Profile) or record
+# (X-Cassette) /chat turns; unset, those headers are ignored for everyone
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def _is_admin(token: Optional[str]) -> bool:
+    return bool(ADMIN_TOKEN) and token is not None and hmac.compare_digest(token, ADMIN_TOKEN)
+
+
+# Stay under the frontend's 60s request timeout so the user gets an answer, not a dropped socket
+CHAT_DEADLINE_SECONDS = float(os.getenv("CHAT_DEADLINE_SECONDS", "55"))
+DISCONNECT_POLL_SECONDS = 0.5
 
 class Message(BaseModel):
     role: str
@@ -31,15 +118,352 @@ class ChatRequest(BaseModel):
     session_id: str
     messages: List[Message]
 
+class PrewarmRequest(BaseModel):
+    cities: List[str] = Field(..., min_length=1, max_length=PREWARM_MAX_PER_CYCLE)
+
+# ---------- Direct weather API (no LLM) ----------
+
+WEATHER_API_MAX_CITIES = int(os.getenv("WEATHER_API_MAX_CITIES", "25"))
+
+class CurrentConditions(BaseModel):
+    temperature_c: float
+    temperature_f: float
+    condition: str
+    condition_code: Optional[int] = None
+    humidity: int
+    wind_kmh: float
+
+class ForecastDay(BaseModel):
+    date: str
+    day: Optional[str] = None
+    condition: Optional[str] = None
+    condition_code: Optional[int] = None
+    temp_high_c: Optional[float] = None
+    temp_low_c: Optional[float] = None
+    precip: Optional[int] = None
+    wind_kmh: Optional[float] = None
+
+class ActivityScore(BaseModel):
+    activity: str
+    score: int
+    ok: bool
+
+class DayScores(BaseModel):
+    date: str
+    condition: Optional[str] = None
+    activities: List[ActivityScore]
+
+class CityWeather(BaseModel):
+    city: str
+    current: Optional[CurrentConditions] = None
+    forecast: Optional[List[ForecastDay]] = None
+    days: Optional[List[DayScores]] = None
+    fetched_at: Optional[int] = None
+    stale: Optional[bool] = None
+    stale_reason: Optional[str] = None
+    error: Optional[str] = None
+
+def _cities(city: List[str]) -> List[str]:
+    cities = list(dict.fromkeys(c.strip() for c in city if c.strip()))
+    if not cities:
+        raise HTTPException(status_code=400, detail="Pass at least one ?city=")
+    if len(cities) > WEATHER_API_MAX_CITIES:
+        raise HTTPException(status_code=400, detail=f"At most {WEATHER_API_MAX_CITIES} cities per request")
+    return cities
+
+def _city_weather(city: str, data: Dict, **fields) -> CityWeather:
+    if "error" in data:
+        return CityWeather(city=city, error=str(data["error"]))
+    return CityWeather(
+        city=city, fetched_at=data.get("fetched_at"),
+        stale=bool(data.get("stale")), stale_reason=data.get("stale_reason"), **fields,
+    )
+
+async def _answer(session_id: str, messages: List[Dict], pool: Optional[str] = None) -> str:
+    # Fast path: simple weather lookups skip the LLM entirely
+    routed = router.match(messages)
+    if routed:
+        route, handler, kwargs = routed
+        answer = await run_in_threadpool(run_route, handler, kwargs)
+        if answer is not None:
+            router.record(route)
+            annotate(route=route, **kwargs)
+            return answer
+        router.record("fallback")
+    else:
+        router.record("agent")
+
+    # Bind only the tool groups this turn needs to keep every model call's prompt small
+    groups = select_tool_groups(messages)
+    # Admission pool: the turn's cost class, unless the caller (e.g. a batch) names one
+    cost = pool or turn_cost(messages)
+    annotate(route="agent", tool_groups=sorted(groups), cost=cost)
+    log.info(f"[{session_id}] tool selection: {token_report(messages, groups)}")
+    agent = get_agent(groups)
+
+    # Bounded concurrent agent runs per cost pool; over capacity this raises AdmissionRejected.
+    # Repeated tool calls and weather lookups within the run are answered from the turn memo.
+    async with admission.slot(cost):
+        with turn_memo():
+            # Push new human message into graph; session_id selects the user's calendar partition
+            result = await agent.ainvoke(
+                {"messages": messages},
+                config={"configurable": {"session_id": session_id}},
+            )
+
+    # The graph agent usually appends AI reply to `messages`
+    return result["messages"][-1].content
+
+
+def _calendar_snapshot(session_id: str) -> List[Dict]:
+    manager = get_calendar_manager({"configurable": {"session_id": session_id}})
+    return copy.deepcopy(list(manager.events.values()))
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+
 @app.post("/chat")
-async def chat(req: ChatRequest):
+async def chat(
+    req: ChatRequest,
+    request: Request,
+    response: Response,
+    x_request_timeout: Optional[float] = Header(default=None),
+    x_profile: Optional[str] = Header(default=None),
+    x_cassette: Optional[str] = Header(default=None),
+    x_admin_token: Optional[str] = Header(default=None),
+):
     session_id = req.session_id
+    messages = [m.dict() for m in req.messages]
 
-    # Push new human message into graph
-    result = await agent.ainvoke({"messages": [m.dict() for m in req.messages]})
+    # Request-scoped deadline: tasks created below inherit it, and tools/scrapes size
+    # their timeouts from what is left. A client may ask for a shorter budget.
+    budget = min(CHAT_DEADLINE_SECONDS, x_request_timeout or CHAT_DEADLINE_SECONDS)
+    token = set_deadline(budget)
+    # Root span of the request's trace; the agent task below inherits it as parent.
+    # Opted-in requests (X-Profile header from an admin, or PROFILE_SAMPLE_RATE) are also profiled.
+    with span("chat", session_id=session_id, budget_s=budget) as root:
+        async with profiled(
+            should_profile(x_profile, trusted=_is_admin(x_admin_token)),
+            session_id=session_id, trace_id=root.trace_id if root else None,
+        ) as profile_id:
+            with record(
+                # Cassette of this turn's LLM and weather.com traffic for offline replay. A recorded
+                # turn starts cold and really scrapes, so only admins may ask for one.
+                CASSETTE_RECORD_ALL or ((x_cassette or "").lower() == "record" and _is_admin(x_admin_token)),
+                session_id, messages, lambda: _calendar_snapshot(session_id),
+            ) as cassette:
+                if profile_id:
+                    response.headers["X-Profile-Id"] = profile_id
+                    annotate(profile_id=profile_id)
+                if cassette:
+                    response.headers["X-Cassette-Id"] = cassette.id
+                try:
+                    work = asyncio.create_task(_answer(session_id, messages))
+                    watcher = asyncio.create_task(_wait_for_disconnect(request))
+                    done, _ = await asyncio.wait(
+                        {work, watcher}, timeout=remaining(), return_when=asyncio.FIRST_COMPLETED)
+                    watcher.cancel()
+                    if work in done:
+                        answer = work.result()
+                        if cassette:
+                            cassette.response = answer
+                        return {"response": answer}
+                    work.cancel()
+                    if watcher in done:
+                        log.info(f"[{session_id}] client disconnected; cancelled agent run")
+                        if root is not None:
+                            root.status = "disconnected"
+                        return Response(status_code=499)
+                    log.warning(f"[{session_id}] request deadline of {budget:.0f}s exceeded")
+                    if root is not None:
+                        root.status = "deadline"
+                    raise HTTPException(
+                        status_code=504, detail="The assistant took too long to answer. Please try again.")
+                finally:
+                    reset_deadline(token)
 
-    # The graph agent usually appends AI reply to `messages`
-    reply_msg = result["messages"][-1].content
 
-    return {"response": reply_msg}
+class UploadStreamingResponse(StreamingResponse):
+    """StreamingResponse sent while the endpoint is still reading the request body: watching
+    for a disconnect (which consumes `receive`) only starts once `uploaded` is set."""
+
+    def __init__(self, content, uploaded: asyncio.Event, **kwargs):
+        super().__init__(content, **kwargs)
+        self.uploaded = uploaded
+
+    async def listen_for_disconnect(self, receive) -> None:
+        await self.uploaded.wait()
+        await super().listen_for_disconnect(receive)
+
+
+@app.post("/chat/batch")
+async def chat_batch(request: Request, workers: int = CHAT_BATCH_WORKERS):
+    """JSONL conversations in, JSONL answers out, streamed as items finish (see app.batch).
+
+    The upload is read line by line while items run; past CHAT_BATCH_MAX_BYTES reading
+    stops and, after the items already read, a final line reports the error.
+    """
+    if int(request.headers.get("content-length") or 0) > CHAT_BATCH_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Batch larger than {CHAT_BATCH_MAX_BYTES} bytes")
+
+    uploaded = asyncio.Event()
+
+    async def lines():
+        try:
+            async for line in stream_lines(request.stream()):
+                yield line
+        finally:
+            uploaded.set()
+
+    async def results():
+        try:
+            async for result in run_batch(lines(), batch_answer(_answer), workers, CHAT_DEADLINE_SECONDS):
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+        except BatchTooLarge as e:
+            yield json.dumps({"error": str(e), "status": 413}) + "\n"
+
+    return UploadStreamingResponse(results(), uploaded, media_type="application/x-ndjson")
+
+
+@app.get("/weather/current", response_model=List[CityWeather], response_model_exclude_none=True)
+async def weather_current(city: List[str] = Query(...)):
+    """Current conditions for one or more cities (?city=Paris&city=Oslo), straight from the cache/scraper."""
+    cities = _cities(city)
+    results = await run_in_threadpool(get_current_conditions_many, cities)
+    return [_city_weather(c, d, current=d.get("current")) for c, d in results.items()]
+
+
+@app.get("/weather/forecast", response_model=List[CityWeather], response_model_exclude_none=True)
+async def weather_forecast(city: List[str] = Query(...), days: int = Query(5, ge=1, le=10)):
+    """Current conditions plus a 1..10-day forecast for one or more cities."""
+    cities = _cities(city)
+    results = await run_in_threadpool(get_weather_data_many, cities)
+    return [
+        _city_weather(c, d, current=d.get("current"), forecast=(d.get("forecast") or [])[:days])
+        for c, d in results.items()
+    ]
+
+
+@app.get("/activities/score", response_model=List[CityWeather], response_model_exclude_none=True)
+async def activities_score(
+    city: List[str] = Query(...),
+    activity: List[str] = Query(default=[]),
+    days: int = Query(3, ge=1, le=10),
+):
+    """Per-day activity scores (0..100; ok at 75+) for one or more cities, best activity first."""
+    cities = _cities(city)
+    activities = [a.strip().lower() for a in activity if a.strip()]
+    unknown = [a for a in activities if a not in _ACTIVITY_PREFS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown activity {', '.join(unknown)}; available: {', '.join(_ACTIVITY_PREFS)}",
+        )
+    results = await run_in_threadpool(get_weather_data_many, cities)
+    return [
+        _city_weather(c, d, days=[
+            DayScores(date=day["date"], condition=day.get("condition"), activities=[
+                ActivityScore(activity=a, ok=ok, score=sc) for a, ok, sc in score_activities(day, activities)
+            ])
+            for day in (d.get("forecast") or [])[:days]
+        ])
+        for c, d in results.items()
+    ]
+
+
+@app.get("/router/stats")
+async def router_stats():
+    """Per-route fast-path hit counts and the share of traffic that skipped the LLM."""
+    return router.report()
+
+
+@app.get("/agent/token_report")
+async def agent_token_report():
+    """Estimated per-call input tokens (all tools vs selected subset) for recent agent runs."""
+    return list(recent_reports)
+
+
+@app.get("/limiter/stats")
+async def limiter_stats():
+    """weather.com scrape stats: limiter throttling, circuit breaker state, conditional (304) hit rate."""
+    return {
+        **scrape_limiter.report(),
+        "circuit": scrape_breaker.report(),
+        "revalidation": revalidation_report(),
+    }
+
+
+@app.get("/admission/stats")
+async def admission_stats():
+    """Agent runs in flight and queued per cost pool, with the configured limits."""
+    return admission.report()
+
+
+# Stats other components already keep, read when /metrics is scraped
+registry.collector("scrape_limiter_events_total", "counter", "weather.com limiter events (requests, throttled, backoffs).", lambda: [
+    ("", {"event": k}, v) for k, v in scrape_limiter.report().items() if k in ("requests", "throttled", "backoffs")
+])
+registry.collector("scrape_throttle_seconds_total", "counter", "Time spent waiting for the weather.com limiter.", lambda: [
+    ("", {}, scrape_limiter.stats["throttle_seconds"]),
+])
+registry.collector("scrape_circuit_open", "gauge", "1 while the weather.com circuit is open or half-open.", lambda: [
+    ("", {"state": scrape_breaker.state}, 0 if scrape_breaker.state == "closed" else 1),
+])
+registry.collector("scrape_revalidations_total", "counter", "Conditional weather.com requests by outcome.", lambda: [
+    ("", {"result": k}, v) for k, v in revalidation_report().items() if k != "not_modified_ratio"
+])
+registry.collector("chat_runs", "gauge", "Agent runs in flight and waiting for admission, by cost pool.", lambda: [
+    ("", {"pool": name, "state": state}, pool.running if state == "running" else pool.waiting)
+    for name, pool in admission.pools.items() for state in ("running", "queued")
+])
+registry.collector("router_requests_total", "counter", "Chat turns by fast-path route, 'agent' or 'fallback'.", lambda: [
+    ("", {"route": k}, v) for k, v in router.report()["routes"].items()
+])
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of request, tool, cache, scrape and LLM metrics."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/debug/traces")
+async def debug_traces(limit: int = 20, min_ms: float = 0.0):
+    """Recent traces from the in-memory span buffer, newest first; min_ms filters to slow ones."""
+    return exporter.traces(limit=limit, min_ms=min_ms)
+
+
+@app.get("/admin/profiles")
+async def admin_profiles():
+    """Recently profiled /chat requests, newest first."""
+    return list_profiles()
+
+
+@app.get("/admin/profiles/{profile_id}", response_class=PlainTextResponse)
+async def admin_profile(profile_id: str):
+    """Folded stacks of one profile (flamegraph.pl / speedscope input)."""
+    folded = read_profile(profile_id)
+    if folded is None:
+        raise HTTPException(status_code=404, detail="Unknown profile")
+    return PlainTextResponse(folded)
+
+
+@app.get("/admin/cassettes")
+async def admin_cassettes():
+    """Recently recorded /chat cassettes (replay with `python -m loadtest.replay <path>`)."""
+    return list(reversed(recent_cassettes))
+
+
+@app.post("/admin/prewarm")
+async def admin_prewarm(req: PrewarmRequest):
+    """Refresh the given cities' forecasts now (at most PREWARM_MAX_PER_CYCLE), regardless of popularity."""
+    return {"warmed": await run_in_threadpool(warm_cities, req.cities)}
+
 
+@app.get("/admin/prewarm")
+async def admin_prewarm_status():
+    """Popular cities and the outcome of the last scheduled prewarm cycle."""
+    return last_cycle
@@ -0,0 +1,194 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# In-process metrics rendered in the Prometheus text format on /metrics. Counters and
+# histograms are updated inline (one lock, a dict lookup and an add); stats that other
+# components already keep (rate limiter, circuit breaker, router) are read at scrape
+# time through collectors instead of being counted twice.
+
+PREFIX = "weather_agent_"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    pairs = [f'{k}="{_escape(v)}"' for k, v in labels]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _fmt_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name, self.help, self.type = name, help, "counter"
+        self._lock = threading.Lock()
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_fmt_labels(k)} {_fmt_value(v)}" for k, v in items]
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name, self.help, self.type = name, help, "histogram"
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._values: Dict[Labels, List] = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _labels(labels)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 2)
+            if idx < len(self.buckets):
+                row[idx] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def time(self, **labels: str) -> "_Timer":
+        return _Timer(self, labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = []
+        for key, row in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, row):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_fmt_labels(key + (('le', _fmt_value(float(bound))),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_fmt_labels(key + (('le', '+Inf'),))} {row[-1]}")
+            lines.append(f"{self.name}_sum{_fmt_labels(key)} {_fmt_value(float(row[-2]))}")
+            lines.append(f"{self.name}_count{_fmt_labels(key)} {row[-1]}")
+        return lines
+
+
+class _Timer:
+    """Context manager observing the elapsed seconds; `labels` may be updated inside."""
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram, self.labels = histogram, labels
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Tuple[str, str, str, Callable[[], Iterable[Sample]]]] = []
+
+    def counter(self, name: str, help: str) -> Counter:
+        metric = Counter(PREFIX + name, help)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(PREFIX + name, help, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, name: str, type: str, help: str, fn: Callable[[], Iterable[Sample]]) -> None:
+        """Samples computed at scrape time: fn yields (suffix, labels, value)."""
+        self._collectors.append((PREFIX + name, type, help, fn))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines += [f"# HELP {metric.name} {metric.help}", f"# TYPE {metric.name} {metric.type}"]
+            lines += metric.render()
+        for name, type, help, fn in self._collectors:
+            try:
+                samples = list(fn())
+            except Exception as e:
+                lines.append(f"# {name} collector failed: {e}")
+                continue
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {type}"]
+            lines += [f"{name}{suffix}{_fmt_labels(_labels(labels))} {_fmt_value(value)}" for suffix, labels, value in samples]
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+request_seconds = registry.histogram("http_request_duration_seconds", "HTTP request latency by route and status.")
+tool_calls = registry.counter("tool_calls_total", "Agent tool invocations by tool and outcome.")
+tool_seconds = registry.histogram("tool_duration_seconds", "Agent tool latency by tool.")
+cache_ops = registry.counter("cache_operations_total", "Weather cache lookups by key prefix and result (hit/miss/error).")
+scrape_seconds = registry.histogram("scrape_duration_seconds", "weather.com request latency by page, including limiter wait.")
+scrape_requests = registry.counter("scrape_requests_total", "weather.com requests by page and status code.")
+scrape_bytes = registry.counter("scrape_response_bytes_total", "weather.com response body bytes by page.")
+turn_memo_lookups = registry.counter("turn_memo_lookups_total", "Per-turn memo lookups by layer (tool/weather) and result.")
+admissions = registry.counter("chat_admissions_total", "Agent run admission decisions by pool (admitted, queue_full, queue_timeout).")
+queue_wait_seconds = registry.histogram("chat_queue_wait_seconds", "Time admitted agent runs waited for a slot, by pool.")
+llm_calls = registry.counter("llm_calls_total", "LLM calls by model and outcome.")
+llm_seconds = registry.histogram("llm_duration_seconds", "LLM call latency by model.")
+
+
+def cache_prefix(key: str) -> str:
+    """Metric label for a cache key: its first segment, e.g. 'weather' for weather:cell:u09tv."""
+    return key.split(":", 1)[0]
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """LangChain callback counting and timing every chat model call it is attached to."""
+
+    def __init__(self):
+        self._started: Dict[UUID, Tuple[float, str]] = {}
+
+    def _start(self, serialized: Dict, run_id: UUID, kwargs: Dict) -> None:
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name") or (serialized or {}).get("name", "unknown")
+        self._started[run_id] = (time.perf_counter(), str(model).removeprefix("models/"))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs) -> None:
+        self._start(serialized, run_id, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs) -> None:
+        self._start(serialized, run_id, kwargs)
+
+    def _end(self, run_id: UUID, status: str) -> None:
+        started = self._started.pop(run_id, None)
+        if started:
+            llm_seconds.observe(time.perf_counter() - started[0], model=started[1])
+            llm_calls.inc(model=started[1], status=status)
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        self._end(run_id, "ok")
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        self._end(run_id, "error")
+
+
+llm_metrics = LLMMetricsCallback()
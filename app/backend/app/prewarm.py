@@ -0,0 +1,114 @@
+import asyncio
+import os
+import socket
+import time
+from typing import Dict, List
+
+from loguru import logger
+
+from app.cache import r
+from app.tools.weather_scraper import (
+    city_popularity,
+    get_weather_data,
+    scrape_breaker,
+    weather_cache_key,
+)
+
+# Background refresh of the most requested cities shortly before their cached
+# forecast expires, so the first request after expiry does not pay for the scrape.
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "true").lower() in ("1", "true", "yes")
+PREWARM_INTERVAL_SECONDS = float(os.getenv("PREWARM_INTERVAL_SECONDS", "300"))
+PREWARM_TOP_N = int(os.getenv("PREWARM_TOP_N", "20"))
+PREWARM_REFRESH_AHEAD_SECONDS = int(os.getenv("PREWARM_REFRESH_AHEAD_SECONDS", "1800"))
+# Scrapes per cycle; everything also goes through the shared weather.com rate limiter
+PREWARM_MAX_PER_CYCLE = int(os.getenv("PREWARM_MAX_PER_CYCLE", "10"))
+# Cities whose decayed request count drops below this are forgotten
+PREWARM_MIN_SCORE = float(os.getenv("PREWARM_MIN_SCORE", "0.5"))
+# Every worker runs the loop; a cycle only runs in the one that takes this lock, which
+# expires just before the next cycle is due instead of being released
+PREWARM_LOCK_KEY = "prewarm:lock"
+
+last_cycle: Dict = {}
+
+
+def _needs_refresh(city: str) -> bool:
+    try:
+        ttl = r.ttl(weather_cache_key(city))
+    except Exception as e:
+        logger.warning(f"prewarm ttl check failed for {city}: {e}")
+        return False
+    return ttl == -2 or 0 <= ttl < PREWARM_REFRESH_AHEAD_SECONDS
+
+
+def _warm(city: str) -> str:
+    data = get_weather_data(city, refresh=True)
+    if "error" in data:
+        return f"error: {data['error']}"
+    return "stale" if data.get("stale") else "ok"
+
+
+def warm_cities(cities: List[str]) -> Dict[str, str]:
+    """Force-refresh the given cities now; returns {city: 'ok' | 'stale' | 'error: ...' | 'skipped: ...'}.
+
+    Like a scheduled cycle, cities sharing a grid-cell entry are refreshed once and
+    nothing is scraped while the weather.com circuit is not closed.
+    """
+    warmed: Dict[str, str] = {}
+    by_key: Dict[str, str] = {}
+    for city in dict.fromkeys(cities):
+        key = weather_cache_key(city)
+        if key in by_key:
+            warmed[city] = f"skipped: shares the entry of {by_key[key]}"
+        elif scrape_breaker.state != "closed":
+            warmed[city] = "skipped: weather.com circuit not closed"
+        else:
+            by_key[key] = city
+            warmed[city] = _warm(city)
+    return warmed
+
+
+def prewarm_once() -> Dict:
+    """One scheduler cycle: refresh popular cities whose entries are missing or about to expire."""
+    started = time.monotonic()
+    popular = city_popularity.top(PREWARM_TOP_N, min_score=PREWARM_MIN_SCORE)
+    # Nearby cities share a grid-cell entry; refresh each entry once
+    due = list({weather_cache_key(c): c for c, _ in reversed(popular) if _needs_refresh(c)}.values())[::-1]
+    warmed: Dict[str, str] = {}
+    for key in due[:PREWARM_MAX_PER_CYCLE]:
+        if scrape_breaker.state != "closed":
+            logger.info("prewarm paused: weather.com circuit not closed")
+            break
+        warmed[key] = _warm(city_popularity.label(key))
+
+    last_cycle.clear()
+    last_cycle.update({
+        "at": time.time(),
+        "popular": [{"city": c, "score": round(s, 2)} for c, s in popular],
+        "due": len(due),
+        "warmed": warmed,
+        "seconds": round(time.monotonic() - started, 3),
+    })
+    if warmed:
+        logger.info(f"prewarmed {len(warmed)} cities: {warmed}")
+    return dict(last_cycle)
+
+
+def _take_cycle() -> bool:
+    """Whether this worker runs the current cycle (holds PREWARM_LOCK_KEY)."""
+    holder = f"{socket.gethostname()}:{os.getpid()}"
+    try:
+        return r.set_nx(PREWARM_LOCK_KEY, max(1, int(PREWARM_INTERVAL_SECONDS * 0.9)), holder)
+    except Exception as e:
+        logger.warning(f"prewarm lock unavailable, skipping cycle: {e}")
+        return False
+
+
+async def prewarm_loop() -> None:
+    """Run prewarm_once every PREWARM_INTERVAL_SECONDS in one worker at a time until cancelled."""
+    while True:
+        await asyncio.sleep(PREWARM_INTERVAL_SECONDS)
+        try:
+            if await asyncio.to_thread(_take_cycle):
+                await asyncio.to_thread(prewarm_once)
+        except Exception as e:
+            logger.error(f"prewarm cycle failed: {e}")
@@ -0,0 +1,135 @@
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+from loguru import logger
+
+# On-demand statistical profiling of single /chat requests. A sampler thread snapshots
+# every thread's stack (sys._current_frames) at a fixed interval while the request runs
+# and writes the counts in the folded-stack format read by flamegraph.pl and speedscope.
+# The whole process is sampled, so requests running concurrently show up too. Nothing
+# runs unless PROFILE_SAMPLE_RATE picks the request or an admin opts in via X-Profile.
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/chat-profiles")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+
+recent_profiles: deque = deque(maxlen=PROFILE_KEEP)
+# One sampler at a time; it already sees every thread
+_active = threading.Lock()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    path = "/".join(code.co_filename.replace("\\", "/").split("/")[-2:])
+    return f"{code.co_name} ({path}:{code.co_firstlineno})".replace(";", ":")
+
+
+class StackSampler:
+    """Counts folded stacks of all other threads every `interval` seconds until stopped."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="chat-profiler", daemon=True)
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+
+def should_profile(header: Optional[str], trusted: bool = False) -> bool:
+    """The X-Profile header decides for trusted (admin) callers; otherwise PROFILE_SAMPLE_RATE."""
+    if header is not None and trusted:
+        return header.strip().lower() in ("1", "true", "yes")
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def profile_path(profile_id: str) -> str:
+    return os.path.join(PROFILE_DIR, f"{profile_id}.folded")
+
+
+def _prune() -> None:
+    keep = {p["id"] for p in recent_profiles}
+    try:
+        for name in os.listdir(PROFILE_DIR):
+            if name.endswith(".folded") and name[:-len(".folded")] not in keep:
+                os.remove(os.path.join(PROFILE_DIR, name))
+    except OSError as e:
+        logger.warning(f"profile cleanup failed: {e}")
+
+
+def _finish(sampler: StackSampler, profile_id: str, started: float, meta: Dict) -> None:
+    """Stop the sampler and save its profile (blocking: joins the thread and writes the file)."""
+    sampler.stop()
+    _active.release()
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        with open(profile_path(profile_id), "w", encoding="utf-8") as f:
+            f.write(sampler.folded())
+        recent_profiles.append({
+            "id": profile_id, "started": started, "duration_ms": round((time.time() - started) * 1000, 1),
+            "samples": sampler.samples, "interval_ms": PROFILE_INTERVAL_MS, **meta,
+        })
+        _prune()
+    except OSError as e:
+        logger.warning(f"saving profile {profile_id} failed: {e}")
+
+
+@asynccontextmanager
+async def profiled(enabled: bool, **meta) -> AsyncIterator[Optional[str]]:
+    """Sample stacks while the block runs; yields the profile id, or None if not profiling."""
+    if not enabled or not _active.acquire(blocking=False):
+        yield None
+        return
+    profile_id = uuid.uuid4().hex[:16]
+    sampler = StackSampler(PROFILE_INTERVAL_MS / 1000)
+    started = time.time()
+    sampler.start()
+    try:
+        yield profile_id
+    finally:
+        # Off the event loop: the join waits up to one sampling interval
+        await asyncio.to_thread(_finish, sampler, profile_id, started, meta)
+
+
+def list_profiles() -> List[Dict]:
+    return list(reversed(recent_profiles))
+
+
+def read_profile(profile_id: str) -> Optional[str]:
+    if not any(p["id"] == profile_id for p in recent_profiles):
+        return None  # only serve ids we wrote; never arbitrary paths
+    try:
+        with open(profile_path(profile_id), encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
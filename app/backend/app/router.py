@@ -0,0 +1,121 @@
+import re
+import string
+from collections import Counter
+from typing import Callable, Dict, List, Tuple
+
+from loguru import logger
+
+from app.tools.weather_scraper import get_current_weather_tool, get_weather_forecast_tool
+
+# Front-door intent router: high-confidence simple weather questions are answered
+# straight from get_weather_data with the tools' templates, skipping the ReAct loop.
+
+_NUMBER_WORDS = {
+    'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
+    'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10,
+}
+_NUM = r"\d{1,2}|" + "|".join(_NUMBER_WORDS)
+_CITY = r"(?P<city>[^\W\d_](?:[^\W\d_]|[ .'\-]){0,40}?)"
+# Words that mean the query is more than a plain lookup and needs the agent. A capture
+# holding a time ("paris on saturday", "paris tonight", "the morning") or a unit ("in
+# fahrenheit") is not a place; weather.com's fuzzy search might still resolve it and
+# answer a Saturday question with today's conditions.
+_CITY_STOPWORDS = {
+    'and', 'or', 'if', 'then', 'but', 'vs', 'versus', 'tomorrow', 'weekend',
+    'week', 'next', 'calendar', 'schedule', 'should', 'good', 'best',
+    # prepositions that introduce a time after the place
+    'on', 'at', 'in', 'this', 'during', 'by', 'until', 'from', 'for',
+    # days and times of day
+    'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday',
+    'today', 'tonight', 'now', 'morning', 'afternoon', 'evening', 'night', 'noon', 'midnight',
+    'day', 'days', 'hour', 'hours', 'month', 'year', 'later', 'currently',
+    # units
+    'fahrenheit', 'celsius', 'kelvin', 'metric', 'imperial', 'degrees', 'f', 'c',
+}
+
+_CURRENT_RE = re.compile(
+    r"^(?:(?:what(?:'s| is)|how(?:'s| is)|tell me|show me|get)\s+)?(?:the\s+)?(?:current\s+)?"
+    r"weather(?:\s+like)?(?:\s+(?:right now|now|today))?\s+(?:in|for|at)\s+" + _CITY +
+    r"(?:\s+(?:right now|now|today))?$"
+)
+_FORECAST_RE = re.compile(
+    r"^(?:(?:what(?:'s| is)|give me|show me|get)\s+)?(?:the\s+|a\s+)?"
+    r"(?:(?P<days>" + _NUM + r")[\s-]*days?\s+)?(?:weather\s+)?forecast\s+(?:for|in)\s+" + _CITY +
+    r"(?:\s+for\s+(?:the\s+)?(?:next\s+)?(?P<days2>" + _NUM + r")\s+days)?$"
+)
+
+
+def _to_days(text: str | None, default: int = 5) -> int:
+    if not text:
+        return default
+    return _NUMBER_WORDS.get(text) or int(text)
+
+
+def _normalize(text: str) -> str:
+    text = re.sub(r"\s+", " ", text.strip().lower().replace("’", "'"))
+    return text.rstrip("?.! ")
+
+
+def _valid_city(city: str) -> bool:
+    return bool(city) and not (set(city.split()) & _CITY_STOPWORDS)
+
+
+def _route_current(m: re.Match) -> Tuple[Callable[..., str], dict]:
+    return get_current_weather_tool.func, {"city": string.capwords(m.group("city"))}
+
+
+def _route_forecast(m: re.Match) -> Tuple[Callable[..., str], dict]:
+    days = _to_days(m.group("days") or m.group("days2"))
+    return get_weather_forecast_tool.func, {"city": string.capwords(m.group("city")), "days": days}
+
+
+_ROUTES = [
+    ("current_weather", _CURRENT_RE, _route_current),
+    ("forecast", _FORECAST_RE, _route_forecast),
+]
+
+
+class IntentRouter:
+    """Rule-based matcher with per-route hit counters."""
+
+    def __init__(self):
+        self.stats: Counter = Counter()
+
+    def match(self, messages: List[Dict]) -> Tuple[str, Callable[..., str], dict] | None:
+        """Return (route, handler, kwargs) for the last user message, or None for the agent."""
+        if not messages or messages[-1].get("role") != "user":
+            return None
+        text = _normalize(messages[-1].get("content", ""))
+        for name, pattern, build in _ROUTES:
+            m = pattern.match(text)
+            if m and _valid_city(m.group("city")):
+                return (name, *build(m))
+        return None
+
+    def record(self, route: str) -> None:
+        self.stats[route] += 1
+
+    def report(self) -> Dict:
+        total = sum(self.stats.values())
+        routed = total - self.stats["agent"] - self.stats["fallback"]
+        return {
+            "total": total,
+            "fast_path": routed,
+            "hit_rate": round(routed / total, 4) if total else 0.0,
+            "routes": dict(self.stats),
+        }
+
+
+def run_route(handler: Callable[..., str], kwargs: dict) -> str | None:
+    """Run a fast-path handler; None means fall back to the agent (e.g. unknown city)."""
+    try:
+        answer = handler(**kwargs)
+    except Exception as e:
+        logger.warning(f"fast path failed for {kwargs}: {e}")
+        return None
+    if answer.startswith("Weather not found") or answer.startswith("No forecast available"):
+        return None
+    return answer
+
+
+router = IntentRouter()
@@ -0,0 +1,209 @@
+import asyncio
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Dict
+
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.prebuilt import ToolNode
+from langgraph.prebuilt.tool_node import ToolCall
+from loguru import logger
+
+from app.metrics import tool_calls, tool_seconds
+from app.tracing import span
+from app.turn_memo import current_memo, memo_key
+from app.utils.deadline import remaining
+
+DEFAULT_TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT_SECONDS", "20"))
+TURN_TOOL_TIMEOUT = float(os.getenv("TOOL_TURN_TIMEOUT_SECONDS", "45"))
+TOOL_MAX_CONCURRENCY = int(os.getenv("TOOL_MAX_CONCURRENCY", "8"))
+
+# Tools that fan out to an LLM call plus many scrapes get a longer budget
+TOOL_TIMEOUTS: Dict[str, float] = {
+    "recommend_places_tool": 40,
+    "recommend_places_with_timing_tool": 40,
+    "where_can_i_go_tool": 40,
+    "plan_trip_itinerary_tool": 40,
+}
+
+# Read-only tools whose result is reused when the model repeats a call within one turn.
+# Calendar tools (and slot finding, which reads the calendar) are never memoized.
+MEMOIZED_TOOLS = {
+    "get_current_weather_tool",
+    "get_weather_forecast_tool",
+    "get_weather_summary_tool",
+    "find_best_weather_day_tool",
+    "find_best_time_window_tool",
+    "suggest_activities_tool",
+    "get_activity_weather_summary_tool",
+    "recommend_places_tool",
+    "recommend_places_with_timing_tool",
+    "where_can_i_go_tool",
+    "plan_trip_itinerary_tool",
+}
+
+TIMEOUT_MARKER = "⏱️ TIMEOUT"
+
+
+class TimedToolNode(ToolNode):
+    """
+    ToolNode that runs a step's tool calls concurrently with per-tool and per-turn timeouts.
+
+    A call that runs out of time is answered with a TIMEOUT marker message instead of
+    blocking the step, so the model still gets every other result. Sync tools already
+    running in a worker thread cannot be interrupted; they finish in the background.
+    """
+
+    def __init__(
+        self,
+        tools,
+        *,
+        tool_timeouts: Dict[str, float] | None = None,
+        default_timeout: float = DEFAULT_TOOL_TIMEOUT,
+        turn_timeout: float = TURN_TOOL_TIMEOUT,
+        max_concurrency: int = TOOL_MAX_CONCURRENCY,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(tools, **kwargs)
+        self.tool_timeouts = {**TOOL_TIMEOUTS, **(tool_timeouts or {})}
+        self.default_timeout = default_timeout
+        self.turn_timeout = turn_timeout
+        self.max_concurrency = max(1, max_concurrency)
+
+    def _turn_budget(self) -> float:
+        """Per-turn budget, capped by what is left of the request deadline."""
+        left = remaining()
+        return self.turn_timeout if left is None else max(0.0, min(self.turn_timeout, left))
+
+    def _timeout_for(self, name: str) -> float:
+        return min(self.tool_timeouts.get(name, self.default_timeout), self._turn_budget())
+
+    @staticmethod
+    def _record(call: ToolCall, message: ToolMessage | None, started: float) -> None:
+        tool_seconds.observe(time.perf_counter() - started, tool=call["name"])
+        failed = message is None or message.status == "error" or str(message.content).startswith("Error:")
+        tool_calls.inc(tool=call["name"], status="error" if failed else "ok")
+
+    @staticmethod
+    def _span(call: ToolCall):
+        args = call.get("args") or {}
+        return span("tool", tool=call["name"], city=args.get("city"), activity=args.get("activity"))
+
+    @staticmethod
+    def _memo_key(call: ToolCall) -> str | None:
+        if call["name"] not in MEMOIZED_TOOLS or current_memo() is None:
+            return None
+        return memo_key(call["name"], call.get("args") or {})
+
+    @staticmethod
+    def _memo_hit(call: ToolCall, key: str | None) -> ToolMessage | None:
+        """Result of an identical earlier call in this turn, as a new message answering this call.
+
+        A fresh message (no copied `id`): add_messages would otherwise treat it as an
+        update of the earlier ToolMessage and replace it in the history.
+        """
+        cached = current_memo().get("tool", key) if key else None
+        if cached is None:
+            return None
+        return ToolMessage(cached.content, name=cached.name, tool_call_id=call["id"], artifact=cached.artifact)
+
+    @staticmethod
+    def _memo_store(key: str | None, message: ToolMessage) -> None:
+        if key and message.status != "error" and not str(message.content).startswith(("Error:", TIMEOUT_MARKER)):
+            current_memo().put(key, message)
+
+    def _run_one(self, call: ToolCall, config: RunnableConfig) -> ToolMessage:
+        started, message = time.perf_counter(), None
+        key = self._memo_key(call)
+        try:
+            with self._span(call) as s:
+                message = self._memo_hit(call, key)
+                if message is not None:
+                    if s is not None:
+                        s.set(memo="hit")
+                    return message
+                message = super()._run_one(call, config)
+                if s is not None and message.status == "error":
+                    s.status = "error"
+                self._memo_store(key, message)
+            return message
+        finally:
+            self._record(call, message, started)
+
+    async def _arun_one(self, call: ToolCall, config: RunnableConfig) -> ToolMessage:
+        started, message = time.perf_counter(), None
+        key = self._memo_key(call)
+        try:
+            with self._span(call) as s:
+                message = self._memo_hit(call, key)
+                if message is not None:
+                    if s is not None:
+                        s.set(memo="hit")
+                    return message
+                message = await super()._arun_one(call, config)
+                if s is not None and message.status == "error":
+                    s.status = "error"
+                self._memo_store(key, message)
+            return message
+        except asyncio.CancelledError:
+            started = None  # timed out; counted by _timeout_message
+            raise
+        finally:
+            if started is not None:
+                self._record(call, message, started)
+
+    @staticmethod
+    def _timeout_message(call: ToolCall, seconds: float) -> ToolMessage:
+        logger.warning(f"tool {call['name']} timed out after {seconds:g}s")
+        tool_calls.inc(tool=call["name"], status="timeout")
+        return ToolMessage(
+            f"{TIMEOUT_MARKER}: {call['name']} did not finish within {seconds:g}s; no result. "
+            f"Tell the user this part is unavailable right now or try a narrower request.",
+            name=call["name"],
+            tool_call_id=call["id"],
+            status="error",
+        )
+
+    def _func(self, input, config: RunnableConfig, *, store) -> Any:
+        tool_calls, output_type = self._parse_input(input, store)
+        deadline = time.monotonic() + self._turn_budget()
+        # No context manager: its exit would join threads that overran their timeout
+        executor = ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(tool_calls) or 1))
+        futures = [
+            executor.submit(contextvars.copy_context().run, self._run_one, call, config)
+            for call in tool_calls
+        ]
+        outputs = []
+        for call, future in zip(tool_calls, futures):
+            limit = self._timeout_for(call["name"])
+            try:
+                outputs.append(future.result(timeout=max(0.0, min(limit, deadline - time.monotonic()))))
+            except FutureTimeout:
+                outputs.append(self._timeout_message(call, limit))
+        executor.shutdown(wait=False, cancel_futures=True)
+        return outputs if output_type == "list" else {"messages": outputs}
+
+    async def _afunc(self, input, config: RunnableConfig, *, store) -> Any:
+        tool_calls, output_type = self._parse_input(input, store)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(call: ToolCall) -> ToolMessage:
+            async with semaphore:
+                limit = self._timeout_for(call["name"])
+                try:
+                    return await asyncio.wait_for(self._arun_one(call, config), timeout=limit)
+                except asyncio.TimeoutError:
+                    return self._timeout_message(call, limit)
+
+        tasks = [asyncio.create_task(run(call)) for call in tool_calls]
+        budget = self._turn_budget()
+        done, pending = await asyncio.wait(tasks, timeout=budget) if tasks else (set(), set())
+        for task in pending:
+            task.cancel()
+        outputs = [
+            task.result() if task in done else self._timeout_message(call, budget)
+            for call, task in zip(tool_calls, tasks)
+        ]
+        return outputs if output_type == "list" else {"messages": outputs}
@@ -0,0 +1,107 @@
+import json
+import re
+from collections import deque
+from typing import Dict, List
+
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from app.agent import TOOL_GROUPS, build_prompt, tools_for
+from app.utils.constants import _ACTIVITY_PREFS
+
+# Keyword rules deciding which tool groups a turn needs. Planning always brings the
+# weather tools along, and the calendar too: the planning prompt offers to add plans
+# to the calendar, and the "yes, add it" follow-up must find those tools bound.
+# A turn that matches nothing gets every group.
+
+_ACTIVITY_WORDS = "|".join(re.escape(a.replace('_', ' ')) for a in _ACTIVITY_PREFS)
+
+_GROUP_PATTERNS = {
+    "weather": re.compile(
+        r"\b(weather|forecast|rain\w*|sun(ny|shine|set|rise)?|snow\w*|wind\w*|temperature|hot|cold|humid\w*|storm\w*|"
+        r"cloud\w*|degrees?|best (day|time)|" + _ACTIVITY_WORDS + r")\b"
+    ),
+    "planning": re.compile(
+        r"\b(where (can|should) i|trip|itinerar\w*|travel\w*|visit\w*|places?|recommend\w*|go to|"
+        r"vacation|holiday|getaway|near|plan\w*|when (can|should) i|free slots?|when am i free)\b"
+    ),
+    "calendar": re.compile(
+        r"\b(calendar|schedul\w*|meeting|appointment|events?|book\w*|cancel\w*|remind\w*|agenda|add (it|that|this|them)|"
+        r"what do i have|am i (busy|free)|delete|move my|rename)\b"
+    ),
+}
+
+# How many trailing user messages to inspect when the last one has no keywords
+_CONTEXT_MESSAGES = 3
+
+
+def _match_groups(text: str) -> set[str]:
+    text = text.lower()
+    groups = {g for g, pattern in _GROUP_PATTERNS.items() if pattern.search(text)}
+    if "planning" in groups:
+        groups.update(("weather", "calendar"))
+    return groups
+
+
+def _matched_groups(messages: List[Dict]) -> set[str]:
+    """Groups the keywords point at: last user message, else recent context; empty if none."""
+    user_texts = [m.get("content", "") for m in messages if m.get("role") == "user"]
+    if not user_texts:
+        return set()
+    return _match_groups(user_texts[-1]) or _match_groups(" ".join(user_texts[-_CONTEXT_MESSAGES:]))
+
+
+def select_tool_groups(messages: List[Dict]) -> frozenset[str]:
+    """Tool groups for this turn: from the last user message, else recent context, else all."""
+    return frozenset(_matched_groups(messages) or TOOL_GROUPS)
+
+
+def turn_cost(messages: List[Dict]) -> str:
+    """'heavy' for place-planning turns (a candidate LLM call plus a scrape per place), else 'light'.
+
+    Turns with no keywords still get every tool group, but are usually general questions
+    the model answers directly, so they count as light.
+    """
+    return "heavy" if "planning" in _matched_groups(messages) else "light"
+
+
+# ---------- Token accounting ----------
+
+def _estimate_tokens(text: str) -> int:
+    """Rough local token estimate (~4 characters per token); avoids a count_tokens API call."""
+    return (len(text) + 3) // 4
+
+
+_schema_tokens: Dict[str, int] = {}
+
+
+def _tool_tokens(tool) -> int:
+    if tool.name not in _schema_tokens:
+        _schema_tokens[tool.name] = _estimate_tokens(json.dumps(convert_to_openai_tool(tool)))
+    return _schema_tokens[tool.name]
+
+
+def _input_tokens(groups, message_tokens: int) -> int:
+    return (
+        _estimate_tokens(build_prompt(groups))
+        + sum(_tool_tokens(t) for t in tools_for(groups))
+        + message_tokens
+    )
+
+
+recent_reports: deque = deque(maxlen=100)
+
+
+def token_report(messages: List[Dict], groups: frozenset[str]) -> Dict:
+    """Estimated input tokens per model call with all tools vs the selected subset."""
+    message_tokens = sum(_estimate_tokens(m.get("content", "")) for m in messages)
+    before = _input_tokens(TOOL_GROUPS, message_tokens)
+    after = _input_tokens(groups, message_tokens)
+    report = {
+        "groups": sorted(groups),
+        "tools": len(tools_for(groups)),
+        "input_tokens_all_tools": before,
+        "input_tokens_selected": after,
+        "saved_pct": round(100 * (before - after) / before, 1) if before else 0.0,
+    }
+    recent_reports.append(report)
+    return report
@@ -1,11 +1,21 @@
-from typing import List
-from app.utils.utils import _meets_prefs
+import math
+from datetime import date as dt_date, timedelta
+from typing import Iterable, List, Tuple
+from app.utils.utils import _best_window, _meets_prefs
 from langchain_core.tools import tool
 from app.utils.constants import _ACTIVITY_PREFS
-from app.tools.weather_scraper import get_weather_data
+from app.tools.weather_scraper import get_hourly_data, get_weather_data
 from loguru import logger
 
 
+def score_activities(day: dict, activities: Iterable[str] | None = None) -> List[Tuple[str, bool, int]]:
+    """(activity, ok, score) for one forecast day, best first; [] if the day has no temperature."""
+    if day.get('temp_high_c') is None:
+        return []
+    scored = [(act, *_meets_prefs(day, _ACTIVITY_PREFS[act])) for act in (activities or _ACTIVITY_PREFS)]
+    return sorted(scored, key=lambda s: (s[2], s[0]), reverse=True)
+
+
 @tool
 def find_best_weather_day_tool(city: str, activity: str = "outdoor") -> str:
     """Find the best day (next 7) for an activity using _ACTIVITY_PREFS."""
@@ -36,17 +46,76 @@ def suggest_activities_tool(cities: List[str], days: int = 3) -> str:
         data = get_weather_data(city)
         lines.append(f"Activity suggestions for {data['city']} (next {days} days):")
         for d in data['forecast'][:days]:
-            picks: List[str] = []
-            scored = []
-            for act, prefs in _ACTIVITY_PREFS.items():
-                ok, sc = _meets_prefs(d, prefs)
-                if ok:
-                    scored.append((sc, act))
-            scored.sort(reverse=True)
+            scored = [(sc, act) for act, ok, sc in score_activities(d) if ok]
             if not scored:
                 alt = 'Consider indoor plans (museums, cinema, gym).'
                 lines.append(f"- {d['date']} {d['condition']} {d['temp_high_c']:.0f}°C: {alt}")
             else:
                 top = ', '.join([f"{act} (score {sc})" for sc, act in scored[:3]])
                 lines.append(f"- {d['date']} {d['condition']} {d['temp_high_c']:.0f}°C: {top}")
-    return "\n".join(lines)
\ No newline at end of file
+    return "\n".join(lines)
+
+
+def _hour_score(hour: dict | None, prefs: dict) -> int | None:
+    """Score one hourly slot with the same heuristic as whole days."""
+    if hour is None:
+        return None
+    _, sc = _meets_prefs({
+        'temp_high_c': hour['temp_c'],
+        'precip': hour['precip'],
+        'wind_kmh': hour['wind_kmh'],
+        'condition_code': hour['condition_code'],
+    }, prefs)
+    return sc
+
+
+@tool
+def find_best_time_window_tool(city: str, activity: str, date: str = None) -> str:
+    """
+    Find the best contiguous hours on one day for an activity, using the hourly forecast.
+
+    Args:
+        city: City to check
+        activity: Activity to plan (uses its duration and preferred time of day)
+        date: Day in YYYY-MM-DD format (default: today); hourly data covers about 2 days
+
+    Returns:
+        Best start/end time with the average hourly score and conditions
+    """
+    prefs = _ACTIVITY_PREFS.get(activity.lower())
+    if not prefs:
+        return f"Unknown activity '{activity}'. Available: {', '.join(_ACTIVITY_PREFS.keys())}"
+    try:
+        day = dt_date.fromisoformat(date) if date else dt_date.today()
+    except ValueError:
+        return f"Invalid date '{date}', expected YYYY-MM-DD."
+
+    hours = get_hourly_data(city, day)
+    if not hours:
+        return f"No hourly forecast available for {city} on {day.isoformat()}."
+    # Windows like stargazing (20→2) run past midnight, so append the next day
+    timeline = hours + (get_hourly_data(city, day + timedelta(days=1)) or [None] * 24)
+
+    start_h, end_h = prefs.get('best_time_range', (8, 20))
+    if end_h <= start_h:
+        end_h += 24
+    length = min(math.ceil(prefs.get('duration_hours', 2)), 24)
+    end_h = max(end_h, start_h + length)
+
+    scores = [_hour_score(h, prefs) for h in timeline]
+    best = _best_window(scores, start_h, end_h, length)
+    if not best:
+        return f"Not enough hourly data for {activity} in {city} on {day.isoformat()}."
+
+    first, avg = best
+    window = timeline[first:first + length]
+    temps = [h['temp_c'] for h in window]
+    lines = [
+        f"⏰ Best time for {activity} in {city} on {day.strftime('%Y-%m-%d (%A)')}: "
+        f"{first % 24:02d}:00–{(first + length) % 24:02d}:00 (avg score {avg:.0f}/100)",
+        f"Temp {min(temps)}–{max(temps)}°C, max rain {max(h['precip'] for h in window)}%, "
+        f"max wind {max(h['wind_kmh'] for h in window)} km/h",
+    ]
+    if avg < 75:
+        lines.append(f"Conditions are marginal; alternative: {prefs.get('indoor_alternative', 'indoor plans')}.")
+    return "\n".join(lines)
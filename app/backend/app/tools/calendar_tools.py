@@ -1,17 +1,26 @@
+import os
 from datetime import datetime
-from app.utils.prop_calendar_manager import PropCalendarManager
+from app.utils.prop_calendar_manager import CalendarRegistry, PropCalendarManager
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 from loguru import logger
 
 
-# Global calendar manager
-_calendar_manager = None
+# One calendar partition per user, keyed by the /chat session_id; idle or least
+# recently used sessions are dropped past the limits
+_calendar_registry = CalendarRegistry(
+    max_users=int(os.getenv("CALENDAR_MAX_SESSIONS", "10000")),
+    idle_seconds=float(os.getenv("CALENDAR_IDLE_SECONDS", "86400")),
+)
 
-def get_calendar_manager():
-    global _calendar_manager
-    if _calendar_manager is None:
-        _calendar_manager = PropCalendarManager()
-    return _calendar_manager
+
+def get_user_id(config: RunnableConfig | None) -> str | None:
+    """Return the session/user id threaded through the agent run config."""
+    return ((config or {}).get("configurable") or {}).get("session_id")
+
+
+def get_calendar_manager(config: RunnableConfig | None = None) -> PropCalendarManager:
+    return _calendar_registry.get(get_user_id(config))
 
 
 @tool
@@ -21,7 +30,8 @@ def add_calendar_event(
     start_time: str = None,
     duration_hours: float = 2.0,
     location: str = None,
-    description: str = None
+    description: str = None,
+    config: RunnableConfig = None
 ) -> str:
     """
     Add an event to Google Calendar.
@@ -38,7 +48,7 @@ def add_calendar_event(
         Success message with event details
     """
     try:
-        manager = get_calendar_manager()
+        manager = get_calendar_manager(config)
         event = manager.create_event(title, date, start_time, duration_hours, location, description)
         
         # Format display
@@ -62,7 +72,7 @@ def add_calendar_event(
 
 
 @tool
-def delete_calendar_event(event_identifier: str) -> str:
+def delete_calendar_event(event_identifier: str, config: RunnableConfig = None) -> str:
     """
     Delete a calendar event by ID or search term.
     
@@ -73,7 +83,7 @@ def delete_calendar_event(event_identifier: str) -> str:
         Success/failure message or confirmation request
     """
     try:
-        manager = get_calendar_manager()
+        manager = get_calendar_manager(config)
         
         # First, try to delete directly (assume it's an event ID)
         try:
@@ -137,7 +147,8 @@ def update_calendar_event(
     start_time: str = None,
     duration_hours: float = None,
     location: str = None,
-    description: str = None
+    description: str = None,
+    config: RunnableConfig = None
 ) -> str:
     """
     Update an existing calendar event by ID or search term.
@@ -155,7 +166,7 @@ def update_calendar_event(
         Success message with updated details or confirmation request
     """
     try:
-        manager = get_calendar_manager()
+        manager = get_calendar_manager(config)
         
         # First, try to update directly (assume it's an event ID)
         try:
@@ -239,7 +250,8 @@ def update_calendar_event(
 def get_calendar_events(
     start_date: str,
     end_date: str,
-    max_results: int = 50
+    max_results: int = 50,
+    config: RunnableConfig = None
 ) -> str:
     """
     Get calendar events within a date range.
@@ -253,7 +265,7 @@ def get_calendar_events(
         List of events in the date range
     """
     try:
-        manager = get_calendar_manager()
+        manager = get_calendar_manager(config)
         events = manager.get_events(start_date, end_date, max_results)
         
         if not events:
@@ -282,7 +294,7 @@ def get_calendar_events(
 
 
 @tool
-def search_calendar_events(query: str, max_results: int = 20) -> str:
+def search_calendar_events(query: str, max_results: int = 20, config: RunnableConfig = None) -> str:
     """
     Search calendar events by title, location, or description.
     
@@ -294,7 +306,7 @@ def search_calendar_events(query: str, max_results: int = 20) -> str:
         List of matching events
     """
     try:
-        manager = get_calendar_manager()
+        manager = get_calendar_manager(config)
         events = manager.search_events(query, max_results)
         
         if not events:
@@ -1,11 +1,16 @@
+import asyncio
 from typing import List, Dict
 from app.utils.utils import _desc_sunny, _meets_prefs
 from app.utils.constants import _ACTIVITY_PREFS
 from langchain_core.tools import tool
 from langchain_google_genai import ChatGoogleGenerativeAI
-from app.tools.weather_scraper import get_weather_data
+from app.tools.weather_scraper import get_weather_data, get_weather_data_many
+from app.cassette import cassette_recorder
+from app.metrics import llm_metrics
+from app.tracing import llm_tracer
+from app.utils.deadline import timeout_for
 
-llm_flash = ChatGoogleGenerativeAI(model="gemini-2.5-flash")
+llm_flash = ChatGoogleGenerativeAI(model="gemini-2.5-flash", callbacks=[llm_metrics, llm_tracer, cassette_recorder])
 
 
 
@@ -42,18 +47,19 @@ async def _get_place_recommendations_with_timing(
         )
 
     try:
-        resp = await llm_flash.ainvoke(prompt)
+        resp = await asyncio.wait_for(llm_flash.ainvoke(prompt), timeout=timeout_for(20))
         text = (getattr(resp, 'content', None) or '').strip()
         candidates = [c.strip() for c in text.split(',') if c.strip()]
     except Exception as e:
         return f"Error generating location suggestions: {str(e)}"
 
-    # Analyze weather for each candidate
+    # Analyze weather for each candidate; fetched concurrently off the event loop
     place_recommendations: List[Dict] = []
+    weather_by_city = await asyncio.to_thread(get_weather_data_many, candidates[:k * 2])
     
     for city in candidates[:k * 2]:  # Check more than we need
         try:
-            weather_data = get_weather_data(city)
+            weather_data = weather_by_city[city]
             
             if "error" in weather_data:
                 continue
@@ -144,14 +150,15 @@ async def recommend_places_tool(activity: str, near_city: str = None, k: int = 6
             f"Return only city names, comma-separated."
         )
 
-    resp = await llm_flash.ainvoke(prompt)
+    resp = await asyncio.wait_for(llm_flash.ainvoke(prompt), timeout=timeout_for(20))
     text = (getattr(resp, 'content', None) or '').strip()
     candidates = [c.strip() for c in text.split(',') if c.strip()]
 
     accepted: List[str] = []
+    weather_by_city = await asyncio.to_thread(get_weather_data_many, candidates)
     for city in candidates:
         try:
-            d = get_weather_data(city)
+            d = weather_by_city[city]
             cur = d['current']
             # basic filter using prefs
             ok_temp = cur['temperature_c'] >= prefs['min_temp_c']
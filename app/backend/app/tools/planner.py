@@ -0,0 +1,245 @@
+import heapq
+from datetime import date as dt_date, datetime, time, timedelta
+from typing import Dict, List, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import tool
+from loguru import logger
+
+from app.tools.calendar_tools import get_calendar_manager
+from app.tools.weather_scraper import get_weather_data, get_weather_data_many
+from app.utils.constants import _ACTIVITY_PREFS
+from app.utils.utils import Interval, _free_gaps, _meets_prefs, _merge_intervals
+
+
+# ---------- Helpers ----------
+
+def _busy_intervals(events: List[Dict]) -> List[Interval]:
+    """Convert calendar events to (start, end) intervals; all-day events block the whole day."""
+    intervals: List[Interval] = []
+    for e in events:
+        try:
+            if "dateTime" in e["start"]:
+                start = datetime.fromisoformat(e["start"]["dateTime"])
+                end = datetime.fromisoformat(e["end"]["dateTime"])
+            else:
+                start = datetime.combine(dt_date.fromisoformat(e["start"]["date"]), time.min)
+                end = start + timedelta(days=1)
+            intervals.append((start, end))
+        except Exception as ex:
+            logger.debug(f"Skipping unparsable event {e.get('id')}: {ex}")
+    return intervals
+
+
+def _day_date(day: dict, fallback: dt_date) -> dt_date:
+    """Real date of a forecast day; entries without an ISO date fall back to position."""
+    try:
+        return dt_date.fromisoformat(day.get('date') or '')
+    except ValueError:
+        return fallback
+
+
+def _activity_window(day: dt_date, prefs: dict) -> Interval:
+    """Preferred window for an activity on a given day.
+
+    Windows ending before they start (e.g. stargazing 20→2) wrap past midnight,
+    and windows shorter than the activity are stretched to fit its duration.
+    """
+    start_h, end_h = prefs.get('best_time_range', (8, 20))
+    duration = prefs.get('duration_hours', 2)
+    if end_h <= start_h:
+        end_h += 24
+    end_h = max(end_h, start_h + duration)
+    base = datetime.combine(day, time.min)
+    return base + timedelta(hours=start_h), base + timedelta(hours=end_h)
+
+
+def _find_free_weather_slots(
+    city: str,
+    activity: str,
+    days: int = 7,
+    k: int = 5,
+    config: RunnableConfig = None,
+) -> List[Dict] | str:
+    """Core slot search: ranked free, good-weather slots or an error string."""
+    prefs = _ACTIVITY_PREFS.get(activity.lower())
+    if not prefs:
+        return f"Unknown activity '{activity}'. Available: {', '.join(_ACTIVITY_PREFS.keys())}"
+    days = max(1, min(10, int(days)))
+
+    data = get_weather_data(city)
+    if "error" in data:
+        return f"Weather not found for {city}"
+    forecast = data.get('forecast', [])[:days]
+    if not forecast:
+        return f"No forecast available for {city}."
+
+    today = dt_date.today()
+    manager = get_calendar_manager(config)
+    events = manager.get_events(
+        (today - timedelta(days=1)).isoformat(),
+        (today + timedelta(days=days + 1)).isoformat(),
+        max_results=1000,
+    )
+    busy = _merge_intervals(_busy_intervals(events))
+    need = timedelta(hours=prefs.get('duration_hours', 2))
+
+    slots: List[Dict] = []
+    now = datetime.now()
+    for i, day in enumerate(forecast):
+        ok, score = _meets_prefs(day, prefs)
+        if not ok:
+            continue
+        window_start, window_end = _activity_window(_day_date(day, today + timedelta(days=i)), prefs)
+        # Today's window only counts from now on; too-short leftovers drop out below
+        window_start = max(window_start, now)
+        if window_end - window_start < need:
+            continue
+        for gap_start, gap_end in _free_gaps(busy, window_start, window_end):
+            if gap_end - gap_start >= need:
+                slots.append({
+                    'day': day,
+                    'score': score,
+                    'start': gap_start,
+                    'end': gap_end,
+                })
+
+    slots.sort(key=lambda s: (-s['score'], -(s['end'] - s['start']).total_seconds(), s['start']))
+    return slots[:k]
+
+
+def _best_activity(day: dict, activities: List[str]) -> Tuple[int, str | None]:
+    """Highest-scoring activity for one forecast day."""
+    best_score, best_act = -1, None
+    for act in activities:
+        _, sc = _meets_prefs(day, _ACTIVITY_PREFS[act])
+        if sc > best_score:
+            best_score, best_act = sc, act
+    return best_score, best_act
+
+
+def _optimize_itinerary(
+    scores: List[List[int]],
+    k: int = 3,
+    travel_penalty: int = 10,
+) -> List[Tuple[int, Tuple[int, ...]]]:
+    """
+    Top-k itineraries by dynamic programming over (day, city).
+
+    scores[c][d] is the value of spending day d in city c. Cities are visited in
+    the given order, each for one contiguous block of at least one day, and every
+    move to the next city costs travel_penalty. Runs in O(days * cities * k).
+    Returns [(total, city index per day)], best first.
+    """
+    n_cities = len(scores)
+    n_days = len(scores[0]) if scores else 0
+    if n_cities == 0 or n_days < n_cities:
+        return []
+
+    # best[c] holds the top-k (total, path) ending the current day in city c
+    best: List[List[Tuple[int, Tuple[int, ...]]]] = [[] for _ in range(n_cities)]
+    best[0] = [(scores[0][0], (0,))]
+    for d in range(1, n_days):
+        nxt = []
+        for c in range(n_cities):
+            cands = [(t + scores[c][d], path + (c,)) for t, path in best[c]]
+            if c > 0:
+                cands += [(t + scores[c][d] - travel_penalty, path + (c,)) for t, path in best[c - 1]]
+            nxt.append(heapq.nlargest(k, cands))
+        best = nxt
+    return best[-1]
+
+
+# ---------- LangChain Tools ----------
+
+@tool
+def find_free_weather_slots_tool(
+    city: str,
+    activity: str,
+    days: int = 7,
+    k: int = 5,
+    config: RunnableConfig = None
+) -> str:
+    """
+    Find free calendar slots with good weather for an activity in one call.
+
+    Args:
+        city: City where the activity takes place
+        activity: Activity to plan (e.g., 'hiking', 'beach', 'picnic')
+        days: Number of days to look ahead (1-10)
+        k: Maximum number of slots to return
+
+    Returns:
+        Ranked free slots that fit the activity's duration and preferred time of day
+    """
+    slots = _find_free_weather_slots(city, activity, days, k, config)
+    if isinstance(slots, str):
+        return slots
+    if not slots:
+        return f"No free, good-weather slots for {activity} in {city} over the next {days} days."
+
+    hours = _ACTIVITY_PREFS[activity.lower()].get('duration_hours', 2)
+    lines = [f"🗓️ Free slots for {activity} ({hours:g}h) in {city}:"]
+    for i, s in enumerate(slots, 1):
+        d = s['day']
+        lines.append(
+            f"{i}. {s['start'].strftime('%Y-%m-%d (%a)')} {s['start'].strftime('%H:%M')}–{s['end'].strftime('%H:%M')}: "
+            f"{d['condition']}, H {d['temp_high_c']:.0f}°C, Rain {d['precip']}%, Wind {d['wind_kmh']:.0f} km/h "
+            f"(Score: {s['score']}/100)"
+        )
+    return "\n".join(lines)
+
+
+@tool
+def plan_trip_itinerary_tool(
+    cities: List[str],
+    days: int = 7,
+    activities: List[str] = None,
+    k: int = 3
+) -> str:
+    """
+    Plan a multi-city trip: which city to be in each day and what to do there.
+
+    Args:
+        cities: Cities in travel order; each is visited for at least one day
+        days: Trip length in days starting today (1-10)
+        activities: Activities to consider (default: all known activities)
+        k: Number of alternative plans to return
+
+    Returns:
+        The top-k day-by-day plans ranked by total weather suitability
+    """
+    days = max(1, min(10, int(days)))
+    k = max(1, min(5, int(k)))
+    activities = [a.lower() for a in (activities or _ACTIVITY_PREFS.keys())]
+    unknown = [a for a in activities if a not in _ACTIVITY_PREFS]
+    if unknown:
+        return f"Unknown activity '{unknown[0]}'. Available: {', '.join(_ACTIVITY_PREFS.keys())}"
+
+    weather = get_weather_data_many(cities)
+    usable = [c for c in dict.fromkeys(cities) if weather[c].get('forecast')]
+    skipped = [c for c in dict.fromkeys(cities) if c not in usable]
+    if not usable:
+        return f"Weather not found for {', '.join(cities)}"
+
+    days = min([days] + [len(weather[c]['forecast']) for c in usable])
+    if days < len(usable):
+        return f"A {days}-day trip can't cover {len(usable)} cities; add days or drop a city."
+
+    picks = [[_best_activity(weather[c]['forecast'][d], activities) for d in range(days)] for c in usable]
+    plans = _optimize_itinerary([[sc for sc, _ in row] for row in picks], k)
+
+    today = dt_date.today()
+    lines = [f"🧳 Top {len(plans)} itinerar{'y' if len(plans) == 1 else 'ies'} for {' → '.join(usable)} ({days} days):"]
+    if skipped:
+        lines.append(f"(Skipped, no forecast: {', '.join(skipped)})")
+    for i, (total, path) in enumerate(plans, 1):
+        lines.append(f"\nPlan {i} — total score {total}:")
+        for d, c in enumerate(path):
+            sc, act = picks[c][d]
+            day = weather[usable[c]]['forecast'][d]
+            lines.append(
+                f"  • {_day_date(day, today + timedelta(days=d)).strftime('%Y-%m-%d (%a)')}: {usable[c]} — {act} "
+                f"({day['condition']}, H {day['temp_high_c']:.0f}°C, Rain {day['precip']}%, Score {sc}/100)"
+            )
+    return "\n".join(lines)
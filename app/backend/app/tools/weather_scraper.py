@@ -1,38 +1,144 @@
+import base64
+import contextvars
 import json
+import os
 import random
 import re
 import time
-from datetime import date as dt_date
-from typing import Dict
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date as dt_date, datetime, timedelta, timezone
+from typing import Dict, List
 
 import requests
 from bs4 import BeautifulSoup
 from langchain_core.tools import tool
 from loguru import logger
 
-from app.cache import r
+from app.cache import r, redis_client
+from app.cassette import record_http, turn_cache
+from app.metrics import cache_ops, cache_prefix, scrape_bytes, scrape_requests, scrape_seconds
+from app.tracing import annotate, span
+from app.turn_memo import memo_key, weather_memo
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.utils.deadline import DeadlineExceeded, check_deadline, timeout_for
+from app.utils import geohash
+from app.utils.popularity import DecayingCounter
+from app.utils.rate_limiter import HostRateLimiter
 
 # ---------- Cache Helpers ----------
 
-def _cache_get(key: str):
+def _cache_lookup(key: str):
+    """(result, value) where result is 'hit', 'miss' or 'error'."""
+    recorded = turn_cache()
+    if recorded is not None:
+        # Recording a cassette: behave as if the turn started with an empty cache
+        raw = recorded.get(key)
+        return ("hit", json.loads(raw)) if raw else ("miss", None)
     try:
         if r.exists(key):
             raw = r.get(key)
-            return json.loads(raw) if raw else None
+            if raw:
+                return "hit", json.loads(raw)
     except Exception as e:
         logger.warning(f"cache get failed: {e}")
-    return None
+        return "error", None
+    return "miss", None
+
+
+def _cache_get(key: str):
+    prefix = cache_prefix(key)
+    with span("cache.get", prefix=prefix) as s:
+        result, value = _cache_lookup(key)
+        if s is not None:
+            s.set(outcome=result)
+    cache_ops.inc(prefix=prefix, result=result)
+    return value
+
+
+def _cache_get_many(keys: List[str]) -> Dict[str, object]:
+    """Values of several keys in one round trip (MGET); missing keys are left out."""
+    if not keys:
+        return {}
+    with span("cache.mget", prefix=cache_prefix(keys[0]), keys=len(keys)):
+        recorded = turn_cache()
+        try:
+            raws = [recorded.get(k) for k in keys] if recorded is not None else r.mget(keys)
+        except Exception as e:
+            logger.warning(f"cache mget failed: {e}")
+            for key in keys:
+                cache_ops.inc(prefix=cache_prefix(key), result="error")
+            return {}
+    found = {}
+    for key, raw in zip(keys, raws):
+        cache_ops.inc(prefix=cache_prefix(key), result="hit" if raw else "miss")
+        if raw:
+            found[key] = json.loads(raw)
+    return found
 
 
 def _cache_set(key: str, value, ttl: int):
-    try:
-        r.setex(key, ttl, json.dumps(value))
-    except Exception as e:
-        logger.error(f"cache set failed: {e}")
+    with span("cache.set", prefix=cache_prefix(key), ttl=ttl):
+        try:
+            raw = json.dumps(value)
+            recorded = turn_cache()
+            if recorded is not None:
+                recorded[key] = raw
+            r.setex(key, ttl, raw)
+        except Exception as e:
+            logger.error(f"cache set failed: {e}")
+
+
+# Failed lookups are remembered briefly (with the reason) so the same bad place or
+# an outage is not retried on every request.
+NEGATIVE_CACHE_TTL = int(os.getenv("NEGATIVE_CACHE_TTL", "300"))
+NOT_FOUND_CACHE_TTL = int(os.getenv("NOT_FOUND_CACHE_TTL", "3600"))
+# Last good forecast per city, served while weather.com is failing
+STALE_WEATHER_TTL = 172800  # 48h
+
+
+# Request popularity per city (decaying, labelled with the display name), used by the
+# cache prewarmer; bounded so every place name an LLM ever suggests is not kept forever
+city_popularity = DecayingCounter(
+    half_life=float(os.getenv("PREWARM_HALF_LIFE_HOURS", "6")) * 3600,
+    max_keys=int(os.getenv("PREWARM_MAX_TRACKED_CITIES", "5000")),
+)
+
+
+def _negative_get(key: str) -> str | None:
+    cached = _cache_get(f"neg:{key}")
+    return cached.get("reason") if cached else None
+
+
+def _negative_set(key: str, reason: str, ttl: int = NEGATIVE_CACHE_TTL) -> None:
+    _cache_set(f"neg:{key}", {"reason": reason}, ttl)
 
 
 # ---------- HTTP Session ----------
 
+# Overridable so the load-test harness can point the scraper at a local stub
+WEATHER_BASE_URL = os.getenv("WEATHER_BASE_URL", "https://weather.com").rstrip("/")
+
+# Politeness towards weather.com, shared by all workers through Redis
+SCRAPE_RATE_PER_SEC = float(os.getenv("SCRAPE_RATE_PER_SEC", "2"))
+SCRAPE_BURST = int(os.getenv("SCRAPE_BURST", "5"))
+SCRAPE_MAX_CONCURRENCY = int(os.getenv("SCRAPE_MAX_CONCURRENCY", "4"))
+
+scrape_limiter = HostRateLimiter(
+    "weather.com",
+    rate=SCRAPE_RATE_PER_SEC,
+    burst=SCRAPE_BURST,
+    max_concurrency=SCRAPE_MAX_CONCURRENCY,
+    client=redis_client,
+)
+
+scrape_breaker = CircuitBreaker(
+    "weather.com",
+    failure_threshold=int(os.getenv("SCRAPE_BREAKER_FAILURES", "5")),
+    reset_timeout=float(os.getenv("SCRAPE_BREAKER_RESET_SECONDS", "30")),
+)
+
+
 def _get_session():
     s = requests.Session()
     s.headers.update({
@@ -44,6 +150,105 @@ def _get_session():
     return s
 
 
+def _page_label(url: str) -> str:
+    """Metric label for a weather.com URL: the page type (tenday, today, ...) or the location API."""
+    m = re.search(r"/weather/([^/]+)/", url)
+    return m.group(1) if m else "location_search"
+
+
+def _polite_request(method: str, url: str, session=None, timeout: float = 15, **kwargs) -> requests.Response:
+    """weather.com request gated by the circuit breaker and the shared rate limiter.
+
+    Raises CircuitOpenError without touching the network while the circuit is open;
+    connection errors, timeouts, 429 and 5xx count as host failures.
+    """
+    page = _page_label(url)
+    with span("http", method=method, page=page) as s:
+        scrape_breaker.check()
+        try:
+            with scrape_seconds.time(page=page), scrape_limiter.slot() as throttled:
+                if s is not None:
+                    s.set(throttle_ms=round(throttled * 1000, 1))
+                resp = (session or requests).request(method, url, timeout=timeout_for(timeout), **kwargs)
+        except requests.RequestException:
+            scrape_breaker.record_failure()
+            scrape_requests.inc(page=page, status="exception")
+            raise
+        except BaseException:
+            scrape_breaker.abandon()
+            raise
+        size = len(resp.content or b"")
+        if s is not None:
+            s.set(status=resp.status_code, bytes=size)
+    scrape_requests.inc(page=page, status=str(resp.status_code))
+    scrape_bytes.inc(size, page=page)
+    record_http(method, url, kwargs.get("json"), resp)
+    scrape_limiter.observe(resp.status_code, resp.headers.get("Retry-After"))
+    if resp.status_code == 429 or resp.status_code >= 500:
+        scrape_breaker.record_failure()
+    else:
+        scrape_breaker.record_success()
+    return resp
+
+
+# ---------- Conditional revalidation ----------
+# Validators (ETag / Last-Modified) and the parsed payload of each page are kept
+# after the data entry expires; a 304 answer reuses the payload without parsing.
+
+VALIDATOR_TTL = 172800  # 48h
+revalidation_stats: Dict[str, int] = {"conditional": 0, "not_modified": 0, "full": 0}
+
+
+def _fetch_revalidated(url: str, session=None):
+    """GET url, conditionally when validators are stored.
+
+    Returns (response, None) for a full 2xx response, or (None, payload) on 304
+    where payload is what _store_validators saved for that response. A 304 keeps the
+    stored entry (and its payload) alive for another VALIDATOR_TTL.
+    """
+    stored = _cache_get(f"revalidate:{url}")
+    headers = {}
+    if stored:
+        if stored.get("etag"):
+            headers["If-None-Match"] = stored["etag"]
+        if stored.get("last_modified"):
+            headers["If-Modified-Since"] = stored["last_modified"]
+    if headers:
+        revalidation_stats["conditional"] += 1
+    resp = _polite_request("GET", url, session=session, headers=headers)
+    if resp.status_code == 304:
+        if not stored:
+            # Nothing to reuse; an empty 304 body must not be parsed as the page
+            raise requests.HTTPError(f"304 Not Modified without a stored copy of {url}", response=resp)
+        revalidation_stats["not_modified"] += 1
+        stored = {
+            **stored,
+            "etag": resp.headers.get("ETag") or stored.get("etag"),
+            "last_modified": resp.headers.get("Last-Modified") or stored.get("last_modified"),
+        }
+        _cache_set(f"revalidate:{url}", stored, VALIDATOR_TTL)
+        return None, stored["payload"]
+    revalidation_stats["full"] += 1
+    resp.raise_for_status()
+    return resp, None
+
+
+def _store_validators(url: str, resp: requests.Response, payload) -> None:
+    etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+    if etag or last_modified:
+        _cache_set(f"revalidate:{url}", {
+            "etag": etag, "last_modified": last_modified, "payload": payload,
+        }, VALIDATOR_TTL)
+
+
+def revalidation_report() -> Dict:
+    conditional = revalidation_stats["conditional"]
+    return {
+        **revalidation_stats,
+        "not_modified_ratio": round(revalidation_stats["not_modified"] / conditional, 4) if conditional else 0.0,
+    }
+
+
 # ---------- Location Lookup ----------
 
 def get_place_id_from_coords(city: str) -> str | None:
@@ -52,8 +257,12 @@ def get_place_id_from_coords(city: str) -> str | None:
     cached = _cache_get(key)
     if cached:
         return cached
-    
-    url = "https://weather.com/api/v1/p/redux-dal"
+    reason = _negative_get(key)
+    if reason:
+        logger.debug(f"placeId for {city} recently failed ({reason}); not retrying")
+        return None
+
+    url = f"{WEATHER_BASE_URL}/api/v1/p/redux-dal"
     payload = [
         {
             "name": "getSunV3LocationSearchUrlConfig",
@@ -65,18 +274,31 @@ def get_place_id_from_coords(city: str) -> str | None:
         }
     ]
     try:
-        resp = requests.post(url, json=payload, headers={"content-type": "application/json"})
+        resp = _polite_request("POST", url, json=payload, headers={"content-type": "application/json"}, timeout=10)
         resp.raise_for_status()
         data = resp.json()
         # Extract first placeId
         obj = list(data["dal"]["getSunV3LocationSearchUrlConfig"].values())[0]
-        place_id = obj["data"]["location"]["placeId"][0]
+        location = obj["data"]["location"]
+        place_id = location["placeId"][0]
 
         # Cache for 7 days (604800s)
         _cache_set(key, place_id, 604800)
+        try:
+            _cache_set(f"geo:{city.lower()}", [float(location["latitude"][0]), float(location["longitude"][0])], 604800)
+        except (KeyError, IndexError, TypeError, ValueError):
+            pass  # no coordinates: the city keeps its own weather entry
         return place_id
+    except (KeyError, IndexError, TypeError) as e:
+        logger.error(f"No placeId for {city}: {e}")
+        _negative_set(key, "not found", NOT_FOUND_CACHE_TTL)
+        return None
+    except (CircuitOpenError, DeadlineExceeded) as e:
+        logger.warning(f"Skipping placeId lookup for {city}: {e}")
+        return None
     except Exception as e:
         logger.error(f"Failed to fetch placeId for {city}: {e}")
+        _negative_set(key, f"lookup failed: {e}")
         return None
 
 
@@ -162,17 +384,52 @@ def _extract_current(soup: BeautifulSoup) -> Dict | None:
         return None
 
 
-def _extract_forecast(soup: BeautifulSoup) -> list[dict] | None:
+_DAY_OF_MONTH_RE = re.compile(r"\b(\d{1,2})$")
+
+
+def _card_dates(names: list[str | None], start: dt_date) -> list[dt_date]:
+    """Dates of consecutive ten-day cards, read from their names ("Today", "Tonight", "Tue 21").
+
+    The names are in the city's local time, so they win over `start` (our estimate of the
+    city's today): each dated card takes the day of month nearest the expected date, and
+    leading "Today"/"Tonight" cards count back from the first dated one.
+    """
+    dates: list[dt_date] = []
+    expected = start
+    first_dated = None
+    for i, name in enumerate(names):
+        m = _DAY_OF_MONTH_RE.search(name or "")
+        date = expected
+        if m:
+            shifts = (expected + timedelta(days=s) for s in (0, 1, -1, 2, -2))
+            date = next((d for d in shifts if d.day == int(m.group(1))), expected)
+            if first_dated is None:
+                first_dated = i
+        dates.append(date)
+        expected = date + timedelta(days=1)
+    if first_dated:
+        dates[:first_dated] = [dates[first_dated] - timedelta(days=first_dated - i) for i in range(first_dated)]
+    return dates
+
+
+def _extract_forecast(soup: BeautifulSoup, start: dt_date | None = None) -> list[dict] | None:
+    """Parse ten-day cards; dates come from the card names, `start` (default today) only fills gaps."""
+    start = start or dt_date.today()
     try:
         cards = soup.find_all("div", {"data-testid": "DetailsSummary"})
         if not cards:
             logger.warning("No forecast cards found")
             return []
 
-        forecast = []
+        names = []
         for card in cards:
+            name = card.find("h2", {"data-testid": "daypartName"})
+            names.append(name.get_text(strip=True) if name else None)
+        dates = _card_dates(names, start)
+
+        forecast = []
+        for i, card in enumerate(cards):
             try:
-                day = card.find("h2", {"data-testid": "daypartName"})
                 condition = card.find("span", class_="DetailsSummary--wxPhrase--nhYpy")
                 temps = card.find_all("span", {"data-testid": "TemperatureValue"})
                 precip = card.find("span", {"data-testid": "PercentageValue"})
@@ -186,8 +443,8 @@ def _extract_forecast(soup: BeautifulSoup) -> list[dict] | None:
                 wind_kmh = _parse_wind_kmh(wind.get_text(strip=True)) if wind else None
 
                 forecast.append({
-                    "day": day.get_text(strip=True) if day else None,
-                    "date": day.get_text(strip=True) if day else None,
+                    "day": names[i],
+                    "date": dates[i].isoformat(),
                     "condition": condition.get_text(strip=True) if condition else None,
                     "condition_code": condition_code,
                     "temp_high_c": temps_high_c,
@@ -205,42 +462,411 @@ def _extract_forecast(soup: BeautifulSoup) -> list[dict] | None:
         return []
 
 
-def get_weather_data(city: str) -> Dict:
-    """Unified fetch: current + 10-day forecast; cached for 6h per city-date."""
-    today = dt_date.today().strftime('%Y-%m-%d')
-    key = f"weather:{city.lower()}:{today}"
+def _parse_hour(text: str) -> int | None:
+    """'1 pm' -> 13, '12 am' -> 0, '13:00' -> 13."""
+    m = re.search(r"(\d{1,2})(?::\d{2})?\s*([ap])?\.?m?", (text or '').lower())
+    if not m:
+        return None
+    hour = int(m.group(1))
+    if m.group(2) == 'p' and hour != 12:
+        hour += 12
+    elif m.group(2) == 'a' and hour == 12:
+        hour = 0
+    return hour if 0 <= hour < 24 else None
+
+
+def _extract_hourly(soup: BeautifulSoup, start: dt_date) -> Dict[str, list[dict]]:
+    """Parse hour-by-hour cards into {YYYY-MM-DD: [hour rows]}; a falling hour means the next day."""
+    by_day: Dict[str, list[dict]] = {}
+    day = start
+    prev_hour = -1
+    for card in soup.find_all("div", {"data-testid": "DetailsSummary"}):
+        try:
+            name = card.find("h2", {"data-testid": "daypartName"})
+            hour = _parse_hour(name.get_text(strip=True)) if name else None
+            if hour is None:
+                continue
+            if hour <= prev_hour:
+                day += timedelta(days=1)
+            prev_hour = hour
+
+            condition = card.find("span", class_=re.compile("wxPhrase"))
+            temp = card.find("span", {"data-testid": "TemperatureValue"})
+            precip = card.find("span", {"data-testid": "PercentageValue"})
+            wind = card.find("span", {"data-testid": "Wind"}) or card.find("div", {"data-testid": "wind"})
+            by_day.setdefault(day.isoformat(), []).append({
+                "hour": hour,
+                "temp_c": _parse_temp_c(temp.get_text(strip=True)) if temp else None,
+                "precip": _parse_percent(precip.get_text(strip=True)) if precip else 0,
+                "wind_kmh": _parse_wind_kmh(wind.get_text(strip=True)) if wind else 0.0,
+                "condition_code": _condition_to_code(condition.get_text(strip=True)) if condition else 2,
+            })
+        except Exception as e:
+            logger.debug(f"Skipping one hourly card: {e}")
+    return by_day
+
+
+# ---------- Compact hourly storage ----------
+# One fixed-width int16 array per city/day: 24 slots x (temp_c, precip, wind_kmh, condition_code),
+# base64-encoded. Missing hours hold _HOUR_MISSING.
+
+_HOURLY_FIELDS = ("temp_c", "precip", "wind_kmh", "condition_code")
+_HOUR_MISSING = -32768
+
+
+def _pack_hours(rows: list[dict]) -> str:
+    packed = array('h', [_HOUR_MISSING]) * (24 * len(_HOURLY_FIELDS))
+    for row in rows:
+        if row.get("temp_c") is None:
+            continue
+        base = row["hour"] * len(_HOURLY_FIELDS)
+        for i, field in enumerate(_HOURLY_FIELDS):
+            packed[base + i] = int(round(row[field]))
+    return base64.b64encode(packed.tobytes()).decode("ascii")
+
+
+def _unpack_hours(blob: str) -> list[dict | None]:
+    """Return 24 entries (index = hour), None where the hour is missing."""
+    packed = array('h')
+    packed.frombytes(base64.b64decode(blob))
+    n = len(_HOURLY_FIELDS)
+    hours: list[dict | None] = []
+    for h in range(24):
+        vals = packed[h * n:(h + 1) * n]
+        if vals[0] == _HOUR_MISSING:
+            hours.append(None)
+        else:
+            hours.append(dict(zip(_HOURLY_FIELDS, vals), hour=h))
+    return hours
+
+
+def get_hourly_data(city: str, day: dt_date) -> list[dict | None] | None:
+    """Hourly forecast for one city/day (24 slots, None for unknown hours); cached 3h per city-day."""
+    key = f"hourly:{city.lower()}:{day.isoformat()}"
     cached = _cache_get(key)
     if cached:
-        return cached
+        return _unpack_hours(cached)
+
+    loc = get_place_id_from_coords(city)
+    if not loc:
+        logger.error(f"No weather.com location found for {city}")
+        return None
+
+    session = _get_session()
+    url = f"{WEATHER_BASE_URL}/weather/hourbyhour/l/{loc}"
+    try:
+        resp, blobs = _fetch_revalidated(url, session)
+        if resp is not None:
+            soup = BeautifulSoup(resp.content, 'html.parser')
+            blobs = {iso: _pack_hours(rows) for iso, rows in _extract_hourly(soup, _local_today(_utc_offset_hours(city))).items()}
+            _store_validators(url, resp, blobs)
+    except Exception as e:
+        logger.error(f"hourly fetch failed for {city}: {e}")
+        return None
+
+    result = None
+    for iso, blob in blobs.items():
+        _cache_set(f"hourly:{city.lower()}:{iso}", blob, 10800)  # 3h
+        if iso == day.isoformat():
+            result = _unpack_hours(blob)
+    return result
+
+
+def _stale_or_error(city: str, reason: str) -> Dict:
+    """Last good forecast flagged as stale, or an error carrying the failure reason."""
+    stale = _cache_get(f"weather_stale:{_weather_id(city)}")
+    if stale:
+        return {**_roll_forward(stale), "city": city, "stale": True, "stale_reason": reason}
+    return {"error": reason, "city": city}
+
+
+# Geographic sharing: places whose coordinates fall in the same geohash cell share
+# one forecast entry, so several nearby parks/towns cost a single scrape. Coordinates
+# come with the placeId lookup; 0 disables sharing.
+GEO_CELL_PRECISION = int(os.getenv("GEO_CELL_PRECISION", "5"))  # ~4.9 x 4.9 km
+
+
+def grid_cell(city: str) -> str | None:
+    """Geohash cell of a resolved city, or None if its coordinates are not cached."""
+    if GEO_CELL_PRECISION <= 0:
+        return None
+    coords = _cache_get(f"geo:{city.lower()}")
+    return geohash.encode(coords[0], coords[1], GEO_CELL_PRECISION) if coords else None
+
+
+def _weather_id(city: str) -> str:
+    cell = grid_cell(city)
+    return f"cell:{cell}" if cell else city.lower()
+
+
+def _weather_ids(cities: List[str]) -> Dict[str, str]:
+    """_weather_id for many cities with one cache round trip for their coordinates."""
+    coords = _cache_get_many([f"geo:{c.lower()}" for c in cities]) if GEO_CELL_PRECISION > 0 else {}
+    ids = {}
+    for city in cities:
+        xy = coords.get(f"geo:{city.lower()}")
+        ids[city] = f"cell:{geohash.encode(xy[0], xy[1], GEO_CELL_PRECISION)}" if xy else city.lower()
+    return ids
+
+
+# Freshness-based weather caching: keys carry no date, entries carry fetched_at and
+# real forecast dates, and the TTL is jittered so entries written together (e.g. by
+# the prewarmer) do not all expire in the same second.
+WEATHER_TTL = 21600  # 6h
+WEATHER_TTL_JITTER = 0.1
+
+
+def weather_cache_key(city: str) -> str:
+    return f"weather:{_weather_id(city)}"
+
+
+def _jittered(ttl: int, jitter: float = WEATHER_TTL_JITTER) -> int:
+    return int(ttl * random.uniform(1 - jitter, 1 + jitter))
+
+
+# Current conditions live in their own, much shorter-lived tier
+CURRENT_TTL = int(os.getenv("CURRENT_WEATHER_TTL", "900"))  # 15 min
+
+
+def current_cache_key(city: str) -> str:
+    return f"current:{_weather_id(city)}"
+
+
+def _utc_offset_hours(city: str) -> float | None:
+    """Solar estimate of the city's UTC offset from its cached longitude (None if unknown).
+
+    Only used to tell where the city's midnight falls; weather.com pages carry no zone.
+    """
+    coords = _cache_get(f"geo:{city.lower()}")
+    return round(coords[1] / 15, 2) if coords else None
+
+
+def _local_today(utc_offset: float | None) -> dt_date:
+    if utc_offset is None:
+        return dt_date.today()
+    return (datetime.now(timezone.utc) + timedelta(hours=utc_offset)).date()
+
+
+def _roll_forward(data: Dict) -> Dict:
+    """Drop forecast days that are already in the past (after the city's midnight)."""
+    forecast = data.get('forecast') or []
+    today = _local_today(data.get('utc_offset_hours')).isoformat()
+    if forecast and (forecast[0].get('date') or today) < today:
+        data = {**data, 'forecast': [d for d in forecast if (d.get('date') or today) >= today]}
+    return data
+
+
+def get_weather_data(city: str, refresh: bool = False) -> Dict:
+    """Unified fetch: current + 10-day forecast; cached ~6h per grid cell (jittered).
+
+    A cached forecast stays valid across midnight: days already past in the city are dropped on read.
+    A place is only scraped if no nearby place in its cell has been fetched, and
+    within one agent run (or batch) a place fetched successfully is looked up once
+    (see app.turn_memo); errors and stale fallbacks are retried.
+    refresh=True skips the cache lookups (used by the prewarmer) and is not
+    counted towards the city's popularity.
+    """
+    memo = None if refresh else weather_memo()
+    with span("weather", city=city, refresh=refresh or None) as s:
+        if memo is None:
+            data = _get_weather_data(city, refresh)
+        else:
+            # Same place asked for again in this agent run: reuse the decoded result, rolled
+            # forward again since a batch-wide memo entry may have been stored before midnight
+            data = {**_roll_forward(memo.get_or_compute("weather", memo_key("weather", {"city": city}),
+                                                        lambda: _get_weather_data(city, refresh),
+                                                        keep=lambda d: "error" not in d and not d.get("stale")))}
+        if s is not None:
+            s.set(source=s.attributes.get("source", "memo"), stale=data.get("stale"), error=data.get("error"))
+        return data
+
+
+def _count_request(city: str) -> None:
+    city_popularity.hit(city.lower(), label=city)
+
+
+def _get_weather_data(city: str, refresh: bool) -> Dict:
+    today = dt_date.today().strftime('%Y-%m-%d')
+    key = weather_cache_key(city)
+    if not refresh:
+        _count_request(city)
+        cached = _cache_get(key)
+        if cached:
+            annotate(source="cache")
+            return _roll_forward({**cached, 'city': city})
+        reason = _negative_get(key)
+        if reason:
+            return _stale_or_error(city, reason)
 
     loc = get_place_id_from_coords(city)
     if not loc:
         logger.error(f"No weather.com location found for {city}")
-        return {"error": f"City '{city}' not found on Weather.com"}
+        reason = _negative_get(f"placeid:{city}") or "location lookup unavailable"
+        return {"error": f"City '{city}' not found on Weather.com ({reason})"}
+
+    # Coordinates are known now; a neighbour in the same cell may already have the forecast
+    key = weather_cache_key(city)
+    if not refresh:
+        cached = _cache_get(key)
+        if cached:
+            annotate(source="cell")
+            return _roll_forward({**cached, 'city': city})
     
+    utc_offset = _utc_offset_hours(city)
     session = _get_session()
-    url = f"https://weather.com/weather/tenday/l/{loc}"
+    url = f"{WEATHER_BASE_URL}/weather/tenday/l/{loc}"
     try:
-        time.sleep(random.uniform(0.5, 1.0))
-        resp = session.get(url, timeout=15)
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.content, 'html.parser')        
-        current = _extract_current(soup)
-        forecast = _extract_forecast(soup)
-        data = {'city': city, 'date_retrieved': today, 'current': current, 'forecast': forecast}
-        _cache_set(key, data, 21600)  # 6h
+        resp, previous = _fetch_revalidated(url, session)
+        if resp is None:
+            # 304: page unchanged, reuse the parsed payload
+            annotate(source="not_modified")
+            current, forecast = previous['current'], previous['forecast']
+        else:
+            annotate(source="scrape")
+            soup = BeautifulSoup(resp.content, 'html.parser')        
+            current = _extract_current(soup)
+            forecast = _extract_forecast(soup, _local_today(utc_offset))
+            _store_validators(url, resp, {'current': current, 'forecast': forecast})
+        data = _roll_forward({
+            'city': city, 'date_retrieved': today, 'fetched_at': int(time.time()),
+            'utc_offset_hours': utc_offset, 'current': current, 'forecast': forecast,
+        })
+        _cache_set(key, data, _jittered(WEATHER_TTL))
+        if current:
+            _cache_set(current_cache_key(city), {
+                'city': city, 'date_retrieved': today, 'fetched_at': data['fetched_at'], 'current': current,
+            }, CURRENT_TTL)
+        _cache_set(f"weather_stale:{_weather_id(city)}", data, STALE_WEATHER_TTL)
         return data
+    except CircuitOpenError as e:
+        logger.warning(f"weather fetch skipped for {city}: {e}")
+        return _stale_or_error(city, "weather.com unavailable (circuit open)")
+    except DeadlineExceeded as e:
+        return _stale_or_error(city, str(e))
     except Exception as e:
         logger.error(f"weather fetch failed for {city}: {e}")
-        return {"error": "not found", "city": city}
+        reason = f"fetch failed: {e}"
+        _negative_set(key, reason)
+        return _stale_or_error(city, reason)
+
+
+def get_current_conditions(city: str) -> Dict:
+    """Current conditions only; cached CURRENT_TTL and refreshed from the lighter 'today' page.
+
+    Falls back to the conditions captured with the cached (or stale) forecast, flagged
+    stale, if the refresh fails; never to a ten-day scrape.
+    """
+    key = current_cache_key(city)
+    cached = _cache_get(key)
+    if cached:
+        return {**cached, 'city': city}
+
+    loc = get_place_id_from_coords(city)
+    if not loc:
+        reason = _negative_get(f"placeid:{city}") or "location lookup unavailable"
+        return {"error": f"City '{city}' not found on Weather.com ({reason})"}
+    if current_cache_key(city) != key:
+        # Coordinates were just resolved; a neighbour in the same cell may have them
+        key = current_cache_key(city)
+        cached = _cache_get(key)
+        if cached:
+            return {**cached, 'city': city}
+
+    try:
+        url = f"{WEATHER_BASE_URL}/weather/today/l/{loc}"
+        resp, current = _fetch_revalidated(url, _get_session())
+        if resp is not None:
+            current = _extract_current(BeautifulSoup(resp.content, 'html.parser'))
+            if not current:
+                raise ValueError("no current conditions on page")
+            _store_validators(url, resp, current)
+        data = {
+            'city': city, 'date_retrieved': dt_date.today().isoformat(),
+            'fetched_at': int(time.time()), 'current': current,
+        }
+        _cache_set(key, data, CURRENT_TTL)
+        return data
+    except Exception as e:
+        logger.warning(f"current conditions refresh failed for {city}: {e}")
+        fallback = _cache_get(weather_cache_key(city)) or _cache_get(f"weather_stale:{_weather_id(city)}")
+        if not fallback or not fallback.get('current'):
+            return {"error": f"current conditions unavailable: {e}", "city": city}
+        return {
+            'city': city, 'date_retrieved': fallback.get('date_retrieved'),
+            'fetched_at': fallback.get('fetched_at'), 'current': fallback['current'],
+            'stale': True, 'stale_reason': f"current conditions refresh failed: {e}",
+        }
+
+
+def get_weather_data_many(cities: List[str], max_workers: int = 8) -> Dict[str, Dict]:
+    """Fetch several cities concurrently; returns {city: get_weather_data(city)}.
+
+    Cached places come from one batched cache lookup. The rest are resolved first and
+    grouped by grid cell, so each cell is scraped once and the other places in it are
+    served from that entry.
+    """
+    unique = list(dict.fromkeys(cities))
+    if not unique:
+        return {}
+    check_deadline()
+    # Cached places are answered from one batched lookup; only the rest go through the workers
+    results = {c: _roll_forward(data) for c, data in _cached_many(unique, "weather").items()}
+    for city in results:
+        _count_request(city)
+    pending = [c for c in unique if c not in results]
+    if not pending:
+        return results
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as pool:
+        # Each worker runs in a copy of the caller's context so the request deadline follows it
+        def run_all(fn, items):
+            futures = [pool.submit(contextvars.copy_context().run, fn, c) for c in items]
+            return [f.result() for f in futures]
+
+        run_all(get_place_id_from_coords, pending)
+        first_by_key: Dict[str, str] = {}
+        for city in pending:
+            first_by_key.setdefault(weather_cache_key(city), city)
+        leaders = list(first_by_key.values())
+        results.update(zip(leaders, run_all(get_weather_data, leaders)))
+        followers = [c for c in pending if c not in results]
+        results.update(zip(followers, run_all(get_weather_data, followers)))
+    return {c: results[c] for c in unique}
+
+
+def get_current_conditions_many(cities: List[str], max_workers: int = 8) -> Dict[str, Dict]:
+    """get_current_conditions for several cities: one batched cache lookup, then concurrent refreshes."""
+    unique = list(dict.fromkeys(cities))
+    if not unique:
+        return {}
+    check_deadline()
+    results = _cached_many(unique, "current")
+    pending = [c for c in unique if c not in results]
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, get_current_conditions, c) for c in pending]
+            results.update(zip(pending, (f.result() for f in futures)))
+    return {c: results[c] for c in unique}
+
+
+def _cached_many(cities: List[str], prefix: str) -> Dict[str, Dict]:
+    """{city: cached entry} for the cities whose `prefix` tier entry is cached."""
+    keys = {city: f"{prefix}:{wid}" for city, wid in _weather_ids(cities).items()}
+    found = _cache_get_many(list(dict.fromkeys(keys.values())))
+    return {city: {**found[key], 'city': city} for city, key in keys.items() if key in found}
 
 
 # ---------- LangChain Tools ----------
 
+def _stale_note(data: Dict) -> str:
+    if not data.get("stale"):
+        return ""
+    return f"\n(Cached data from {data.get('date_retrieved')}; live source unavailable: {data.get('stale_reason')})"
+
+
 @tool
 def get_current_weather_tool(city: str) -> str:
     """Return formatted current weather for a city."""
-    data = get_weather_data(city)
+    data = get_current_conditions(city)
     if "error" in data:
         return f"Weather not found for {city}"
     c = data['current']
@@ -249,7 +875,7 @@ def get_current_weather_tool(city: str) -> str:
         f"Temp: {c['temperature_c']:.1f}°C ({c['temperature_f']:.1f}°F)\n"
         f"Condition: {c['condition']}\n"
         f"Humidity: {c['humidity']}% | Wind: {c['wind_kmh']:.0f} km/h"
-    )
+    ) + _stale_note(data)
 
 
 @tool
@@ -267,7 +893,7 @@ def get_weather_forecast_tool(city: str, days: int = 5) -> str:
         out.append(
             f"{d['date']}: {d['condition']}, H {d['temp_high_c']:.0f}°C / L {d['temp_low_c']:.0f}°C, Rain {d['precip']}%, Wind {d['wind_kmh']:.0f} km/h"
         )
-    return "\n".join(out)
+    return "\n".join(out) + _stale_note(data)
 
 
 @tool
@@ -276,7 +902,8 @@ def get_weather_summary_tool(city: str) -> str:
     data = get_weather_data(city)
     if "error" in data:
         return f"Weather not found for {city}"
-    c = data['current']
+    now = get_current_conditions(city)
+    c = now['current'] if "error" not in now else data['current']
     f = data['forecast'][:3]
     lines = [
         f"Weather Summary for {data['city']}",
@@ -287,7 +914,7 @@ def get_weather_summary_tool(city: str) -> str:
         lines.append(
             f"  - {d['date']}: {d['condition']}, H {d['temp_high_c']:.0f}°C / L {d['temp_low_c']:.0f}°C, Rain {d['precip']}%, Wind {d['wind_kmh']:.0f} km/h"
         )
-    return "\n".join(lines)
+    return "\n".join(lines) + _stale_note(data)
 
 
 
@@ -0,0 +1,172 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from loguru import logger
+
+# Lightweight request tracing: one span per request, LLM call, tool invocation, cache
+# operation and weather.com fetch. The current span lives in a contextvar, so it follows
+# asyncio tasks and worker threads started with contextvars.copy_context(). Finished
+# spans go to an in-memory ring buffer (GET /debug/traces) and, if TRACE_JSONL_PATH is
+# set, are appended to that file one JSON object per line.
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() in ("1", "true", "yes")
+TRACE_BUFFER_SPANS = int(os.getenv("TRACE_BUFFER_SPANS", "5000"))
+TRACE_JSONL_PATH = os.getenv("TRACE_JSONL_PATH")
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start", "_t0", "duration_ms", "attributes", "status")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict):
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.duration_ms: float | None = None
+        self.attributes = {k: v for k, v in attributes.items() if v is not None}
+        self.status = "ok"
+
+    def set(self, **attributes) -> None:
+        self.attributes.update({k: v for k, v in attributes.items() if v is not None})
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+            "name": self.name, "start": self.start, "duration_ms": self.duration_ms,
+            "status": self.status, "attributes": self.attributes,
+        }
+
+
+class SpanExporter:
+    """Ring buffer of finished spans plus the optional JSONL file."""
+
+    def __init__(self, max_spans: int, path: str | None = None):
+        self.spans: deque = deque(maxlen=max_spans)
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        record = span.to_dict()
+        self.spans.append(record)
+        if self.path:
+            try:
+                line = json.dumps(record, default=str)
+                with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except OSError as e:
+                logger.warning(f"trace export to {self.path} failed: {e}")
+
+    def traces(self, limit: int = 20, min_ms: float = 0.0) -> List[Dict]:
+        """Most recent finished traces, newest first; min_ms keeps only slower ones."""
+        by_trace: Dict[str, List[Dict]] = {}
+        for record in list(self.spans):
+            by_trace.setdefault(record["trace_id"], []).append(record)
+        result = []
+        for trace_id, spans in reversed(by_trace.items()):
+            root = next((s for s in spans if s["parent_id"] is None), None)
+            if root is None or root["duration_ms"] < min_ms:
+                continue
+            result.append({
+                "trace_id": trace_id, "name": root["name"], "start": root["start"],
+                "duration_ms": root["duration_ms"], "status": root["status"],
+                "spans": sorted(spans, key=lambda s: s["start"]),
+            })
+            if len(result) >= limit:
+                break
+        return result
+
+
+exporter = SpanExporter(TRACE_BUFFER_SPANS, TRACE_JSONL_PATH)
+
+
+def start_span(name: str, parent: Optional[Span] = None, **attributes) -> Optional[Span]:
+    """Open a span without making it current (for callbacks that end it elsewhere)."""
+    if not TRACING_ENABLED:
+        return None
+    return Span(name, parent or _current.get(), attributes)
+
+
+def end_span(span: Optional[Span], status: str | None = None) -> None:
+    if span is None:
+        return
+    span.duration_ms = round((time.perf_counter() - span._t0) * 1000, 3)
+    if status:
+        span.status = status
+    exporter.export(span)
+
+
+def annotate(**attributes) -> None:
+    """Add attributes to the current span, if any."""
+    current = _current.get()
+    if current is not None:
+        current.set(**attributes)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """Span around a block; it is the parent of spans opened inside, including in copied contexts."""
+    current = start_span(name, **attributes)
+    if current is None:
+        yield None
+        return
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.set(error=f"{type(e).__name__}: {e}"[:200])
+        if current.status == "ok":
+            current.status = "error"
+        raise
+    finally:
+        _current.reset(token)
+        end_span(current)
+
+
+class LLMTraceCallback(BaseCallbackHandler):
+    """LangChain callback opening a span per chat model call under the caller's current span."""
+
+    def __init__(self):
+        self._open: Dict[UUID, Span] = {}
+
+    def _start(self, serialized: Dict, run_id: UUID, kwargs: Dict) -> None:
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name") or (serialized or {}).get("name")
+        opened = start_span("llm", model=str(model).removeprefix("models/") if model else None)
+        if opened is not None:
+            self._open[run_id] = opened
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs) -> None:
+        self._start(serialized, run_id, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs) -> None:
+        self._start(serialized, run_id, kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        opened = self._open.pop(run_id, None)
+        if opened is not None:
+            opened.set(tool_calls=sum(
+                len(getattr(getattr(g, "message", None), "tool_calls", None) or [])
+                for gens in response.generations for g in gens
+            ))
+            end_span(opened)
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        opened = self._open.pop(run_id, None)
+        if opened is not None:
+            opened.set(error=str(error)[:200])
+            end_span(opened, "error")
+
+
+llm_tracer = LLMTraceCallback()
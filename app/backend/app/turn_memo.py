@@ -0,0 +1,122 @@
+import contextvars
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from app.metrics import turn_memo_lookups
+
+# Request-scoped memo for one agent run. The model often asks for the same city through
+# several tools in one turn (forecast, then summary, then best day); within the turn a
+# repeated read-only tool call or weather lookup is answered from here instead of going
+# back to the cache and decoding the forecast again. Nothing outlives the turn, except
+# weather lookups inside a /chat/batch run, which share one memo across all its items;
+# a batch can run for hours, so that memo forgets entries after `max_age` seconds.
+
+_active: contextvars.ContextVar[Optional["TurnMemo"]] = contextvars.ContextVar("turn_memo", default=None)
+_shared_weather: contextvars.ContextVar[Optional["TurnMemo"]] = contextvars.ContextVar("batch_weather_memo", default=None)
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def memo_key(name: str, args: Dict) -> str:
+    """Key of a call: name plus arguments with whitespace/case-insensitive strings, Nones dropped."""
+    return json.dumps([name, _normalize(args or {})], sort_keys=True, default=str)
+
+
+class TurnMemo:
+    def __init__(self, max_age: float | None = None):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._values: Dict[str, Tuple[Any, float]] = {}  # key -> (value, stored_at)
+        self._pending: Dict[str, threading.Lock] = {}
+
+    def _lookup(self, key: str) -> Tuple[bool, Any]:
+        """(found, value) for `key`; entries older than max_age are dropped. Call with the lock held."""
+        entry = self._values.get(key)
+        if entry is None:
+            return False, None
+        if self.max_age is not None and time.monotonic() - entry[1] > self.max_age:
+            del self._values[key]
+            return False, None
+        return True, entry[0]
+
+    def get(self, layer: str, key: str) -> Any:
+        with self._lock:
+            _, value = self._lookup(key)
+        turn_memo_lookups.inc(layer=layer, result="miss" if value is None else "hit")
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._values[key] = (value, time.monotonic())
+
+    def get_or_compute(self, layer: str, key: str, compute: Callable[[], Any],
+                       keep: Callable[[Any], bool] = lambda value: True) -> Any:
+        """Memoized `compute()`; concurrent callers for the same key wait for the first one.
+
+        Results failing `keep` (errors, stale fallbacks) are returned but not stored, so
+        the next caller tries again instead of inheriting the failure.
+        """
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                turn_memo_lookups.inc(layer=layer, result="hit")
+                return value
+            key_lock = self._pending.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                found, value = self._lookup(key)
+                if found:
+                    turn_memo_lookups.inc(layer=layer, result="hit")
+                    return value
+            turn_memo_lookups.inc(layer=layer, result="miss")
+            value = compute()
+            with self._lock:
+                if keep(value):
+                    self._values[key] = (value, time.monotonic())
+                self._pending.pop(key, None)
+            return value
+
+
+def current_memo() -> TurnMemo | None:
+    return _active.get()
+
+
+def weather_memo() -> TurnMemo | None:
+    """Memo for get_weather_data: the batch-wide one if a batch is running, else the turn's."""
+    return _shared_weather.get() or _active.get()
+
+
+@contextmanager
+def turn_memo() -> Iterator[TurnMemo]:
+    """Memoize read-only tool calls and weather lookups for the block (one agent run)."""
+    memo = TurnMemo()
+    token = _active.set(memo)
+    try:
+        yield memo
+    finally:
+        _active.reset(token)
+
+
+@contextmanager
+def shared_weather_memo(max_age: float | None = None) -> Iterator[TurnMemo]:
+    """Share weather lookups across every agent run started inside the block (a batch).
+
+    Lookups older than `max_age` seconds are fetched again.
+    """
+    memo = TurnMemo(max_age)
+    token = _shared_weather.set(memo)
+    try:
+        yield memo
+    finally:
+        _shared_weather.reset(token)
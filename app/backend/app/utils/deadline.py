@@ -0,0 +1,47 @@
+import contextvars
+import time
+from typing import Optional
+
+# Request-scoped absolute deadline (time.monotonic() seconds), set by /chat and read by
+# tools and network calls. Copied into worker threads via contextvars.copy_context().
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's time budget is used up."""
+
+
+def set_deadline(seconds: float) -> contextvars.Token:
+    """Start a budget of `seconds` for the current context; never extends an outer deadline."""
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+    return _deadline.set(deadline)
+
+
+def reset_deadline(token: contextvars.Token) -> None:
+    _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current request, or None when no deadline is set."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def timeout_for(default: float) -> float:
+    """Timeout for the next blocking call: `default` capped by the remaining budget."""
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded("request deadline exceeded")
+    return min(default, left)
+
+
+def check_deadline() -> None:
+    """Raise DeadlineExceeded if the request's budget is gone."""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("request deadline exceeded")
@@ -0,0 +1,60 @@
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class DecayingCounter:
+    """Per-key request counts that halve every `half_life` seconds (thread-safe).
+
+    Each key may carry a label (e.g. the display name of a lower-cased city) that is
+    dropped together with it. At most `max_keys` keys are tracked; past that the
+    lowest current scores are evicted, so the counter stays bounded even when
+    nothing calls top().
+    """
+
+    def __init__(self, half_life: float, max_keys: int = 10_000):
+        self.half_life = half_life
+        self.max_keys = max(1, max_keys)
+        self._lock = threading.Lock()
+        self._scores: Dict[str, Tuple[float, float]] = {}  # key -> (score, updated_at)
+        self._labels: Dict[str, str] = {}
+
+    def _decayed(self, score: float, updated_at: float, now: float) -> float:
+        return score * math.pow(0.5, (now - updated_at) / self.half_life)
+
+    def _drop(self, key: str) -> None:
+        self._scores.pop(key, None)
+        self._labels.pop(key, None)
+
+    def hit(self, key: str, weight: float = 1.0, label: Optional[str] = None) -> None:
+        now = time.monotonic()
+        with self._lock:
+            score, ts = self._scores.get(key, (0.0, now))
+            self._scores[key] = (self._decayed(score, ts, now) + weight, now)
+            if label is not None:
+                self._labels[key] = label
+            if len(self._scores) > self.max_keys:
+                # Evict down to 90% so this sort runs once per ~max_keys/10 new keys
+                ranked = sorted(self._scores, key=lambda k: self._decayed(*self._scores[k], now))
+                for k in ranked[:len(ranked) - int(self.max_keys * 0.9)]:
+                    if k != key:
+                        self._drop(k)
+
+    def label(self, key: str) -> str:
+        """The label last given with `key`, else the key itself."""
+        with self._lock:
+            return self._labels.get(key, key)
+
+    def top(self, n: int, min_score: float = 0.0) -> List[Tuple[str, float]]:
+        """The n highest current scores, dropping keys that have decayed below min_score."""
+        now = time.monotonic()
+        with self._lock:
+            current = {k: self._decayed(s, ts, now) for k, (s, ts) in self._scores.items()}
+            for k in [k for k, s in current.items() if s < min_score]:
+                self._drop(k)
+        ranked = sorted(((k, s) for k, s in current.items() if s >= min_score), key=lambda x: x[1], reverse=True)
+        return ranked[:n]
+
+    def __len__(self) -> int:
+        return len(self._scores)
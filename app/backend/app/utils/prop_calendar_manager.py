@@ -1,11 +1,45 @@
+import bisect
+import threading
+import time as clock
 import uuid
-from datetime import datetime, timedelta, date
+from collections import OrderedDict
+from datetime import datetime, timedelta, date, time
+from typing import Optional, Tuple
+
+DEFAULT_USER_ID = "default"
+
+
+def _start_key(start: dict) -> datetime:
+    """Sortable start instant for an event; all-day events sort at midnight."""
+    if "dateTime" in start:
+        return datetime.fromisoformat(start["dateTime"])
+    return datetime.combine(date.fromisoformat(start["date"]), time.min)
+
 
 class PropCalendarManager:
     """Prop in-memory Google Calendar replacement for testing."""
 
     def __init__(self):
         self.events = {}
+        # Sorted (start, event_id) index so range scans only touch matching events
+        self._by_start = []
+
+    def _index_add(self, event: dict):
+        bisect.insort(self._by_start, (_start_key(event["start"]), event["id"]))
+
+    def _index_remove(self, event: dict):
+        entry = (_start_key(event["start"]), event["id"])
+        i = bisect.bisect_left(self._by_start, entry)
+        if i < len(self._by_start) and self._by_start[i] == entry:
+            self._by_start.pop(i)
+
+    def restore(self, events):
+        """Load previously exported events (e.g. a recorded session's calendar)."""
+        for event in events:
+            if event["id"] in self.events:
+                self._index_remove(self.events[event["id"]])
+            self.events[event["id"]] = event
+            self._index_add(event)
 
     def _parse_datetime(self, date_str: str, time_str: str = None):
         """Return event start format compatible with Google Calendar."""
@@ -38,10 +72,15 @@ class PropCalendarManager:
             "link": f"http://Prop.calendar/{event_id}"
         }
         self.events[event_id] = event
+        self._index_add(event)
         return event
 
     def delete_event(self, event_id: str) -> bool:
-        return self.events.pop(event_id, None) is not None
+        event = self.events.pop(event_id, None)
+        if event is None:
+            return False
+        self._index_remove(event)
+        return True
 
     def update_event(self, event_id, title=None, date=None, start_time=None,
                      duration_hours=None, location=None, description=None):
@@ -55,6 +94,7 @@ class PropCalendarManager:
 
         if date or start_time or duration_hours:
             old_start = event["start"]
+            self._index_remove(event)
 
             # current values
             current_date = old_start.get("date") or datetime.fromisoformat(
@@ -82,6 +122,7 @@ class PropCalendarManager:
                 }
             else:
                 event["end"] = {"date": new_date}
+            self._index_add(event)
 
         if location is not None:
             event["location"] = location
@@ -94,8 +135,12 @@ class PropCalendarManager:
     def get_events(self, start_date, end_date, max_results=50):
         start = datetime.fromisoformat(start_date)
         end = datetime.fromisoformat(end_date)
+        lo = bisect.bisect_left(self._by_start, (datetime.combine(start.date(), time.min), ""))
         results = []
-        for e in self.events.values():
+        for key, event_id in self._by_start[lo:]:
+            if key > end:
+                break
+            e = self.events[event_id]
             if "dateTime" in e["start"]:
                 dt = datetime.fromisoformat(e["start"]["dateTime"])
                 if start <= dt <= end:
@@ -115,3 +160,43 @@ class PropCalendarManager:
                 query_lower in e.get("description", "").lower()):
                 results.append(e)
         return results[:max_results]
+
+
+class CalendarRegistry:
+    """Per-user calendar partitions, keyed by the chat session id.
+
+    Partitions unused for `idle_seconds` are dropped, and past `max_users` the least
+    recently used one goes, so memory stays bounded as sessions come and go.
+    """
+
+    def __init__(self, max_users: int = 10_000, idle_seconds: Optional[float] = None):
+        self.max_users = max(1, max_users)
+        self.idle_seconds = idle_seconds
+        # user id -> (manager, last used), least recently used first
+        self._managers: OrderedDict[str, Tuple[PropCalendarManager, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float) -> None:
+        """Make room for one more partition and drop idle ones. Call with the lock held."""
+        while len(self._managers) >= self.max_users:
+            self._managers.popitem(last=False)
+        if self.idle_seconds is not None:
+            while self._managers and now - next(iter(self._managers.values()))[1] > self.idle_seconds:
+                self._managers.popitem(last=False)
+
+    def get(self, user_id: str = None) -> PropCalendarManager:
+        user_id = user_id or DEFAULT_USER_ID
+        now = clock.monotonic()
+        with self._lock:
+            entry = self._managers.pop(user_id, None)
+            manager = entry[0] if entry else PropCalendarManager()
+            self._evict(now)
+            self._managers[user_id] = (manager, now)
+        return manager
+
+    def drop(self, user_id: str) -> bool:
+        with self._lock:
+            return self._managers.pop(user_id, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._managers)
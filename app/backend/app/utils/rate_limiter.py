@@ -0,0 +1,234 @@
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from loguru import logger
+
+from app.utils.deadline import DeadlineExceeded, remaining
+
+# Token bucket with reservation semantics: every caller takes a token (the balance may
+# go negative) and is told how long to wait for it, so one round trip per request.
+# The wait also covers any active backoff window set after 429/5xx responses.
+_RESERVE_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local b = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(b[1]) or burst
+local ts = tonumber(b[2]) or now
+tokens = math.min(burst, tokens + (now - ts) * rate) - 1
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+local wait = 0
+if tokens < 0 then wait = -tokens / rate end
+local until_ts = tonumber(redis.call('GET', KEYS[2]) or '0')
+if until_ts - now > wait then wait = until_ts - now end
+return tostring(wait)
+"""
+
+# Global concurrency cap: holders live in a sorted set scored by start time and
+# expire after a lease so a crashed worker cannot leak a slot forever.
+_ENTER_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local lease = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - lease)
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[1]) then
+  redis.call('ZADD', KEYS[1], now, ARGV[2])
+  redis.call('PEXPIRE', KEYS[1], lease)
+  return 1
+end
+return 0
+"""
+
+_BACKOFF_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local failures = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], 300)
+local delay = math.min(tonumber(ARGV[2]), tonumber(ARGV[1]) * 2 ^ (failures - 1))
+if tonumber(ARGV[3]) > 0 then delay = tonumber(ARGV[3]) end
+redis.call('SET', KEYS[2], tostring(now + delay), 'EX', math.ceil(delay) + 1)
+return tostring(delay)
+"""
+
+
+def _parse_retry_after(value: Optional[str]) -> float:
+    try:
+        return max(0.0, float(value)) if value else 0.0
+    except ValueError:
+        return 0.0  # HTTP-date form is rare here; fall back to exponential backoff
+
+
+class HostRateLimiter:
+    """
+    Per-host politeness limiter shared across workers through Redis.
+
+    Combines a token bucket (rate/s with a burst allowance), a global cap on
+    in-flight requests, and exponential backoff after 429/5xx responses. Without
+    Redis (or if it is unreachable) the same policy is enforced per process.
+    """
+
+    ENTER_POLL_SECONDS = 0.05
+    LEASE_MS = 60_000
+
+    def __init__(
+        self,
+        host: str,
+        rate: float,
+        burst: int,
+        max_concurrency: int,
+        backoff_base: float = 2.0,
+        backoff_max: float = 60.0,
+        client=None,
+    ):
+        self.host = host
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._client = client
+        self._keys = {
+            "bucket": f"ratelimit:{host}:bucket",
+            "until": f"ratelimit:{host}:backoff_until",
+            "failures": f"ratelimit:{host}:failures",
+            "inflight": f"ratelimit:{host}:inflight",
+        }
+        if client is not None:
+            self._reserve_script = client.register_script(_RESERVE_LUA)
+            self._enter_script = client.register_script(_ENTER_LUA)
+            self._backoff_script = client.register_script(_BACKOFF_LUA)
+
+        # Local fallback state
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._ts = time.monotonic()
+        self._backoff_until = 0.0
+        self._failures = 0
+        self._backed_off = False
+        self._redis_down = False
+        self._local_slots = threading.BoundedSemaphore(max_concurrency)
+
+        # Throttling metrics
+        self.stats: Dict[str, float] = {
+            "requests": 0,
+            "throttled": 0,
+            "throttle_seconds": 0.0,
+            "backoffs": 0,
+        }
+
+    # ---------- Redis with local fallback ----------
+
+    def _redis(self, fn, *args):
+        if self._client is None:
+            return None
+        try:
+            result = fn(*args)
+        except Exception as e:
+            # Warn on the way down and on recovery only; every call fails while Redis is out
+            if not self._redis_down:
+                self._redis_down = True
+                logger.warning(f"rate limiter redis unavailable for {self.host}, using local limits: {e}")
+            return None
+        if self._redis_down:
+            self._redis_down = False
+            logger.info(f"rate limiter redis reachable again for {self.host}")
+        return result
+
+    def _reserve(self) -> tuple[float, bool]:
+        """(seconds to wait for the token, whether it was taken from the shared Redis bucket)."""
+        wait = self._redis(lambda: self._reserve_script(
+            keys=[self._keys["bucket"], self._keys["until"]], args=[self.rate, self.burst]))
+        if wait is not None:
+            return float(wait), True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._ts) * self.rate) - 1
+            self._ts = now
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._backoff_until - now), False
+
+    def _refund(self, shared: bool) -> None:
+        """Give back a reserved token whose request was never sent."""
+        if shared:
+            self._redis(lambda: self._client.hincrbyfloat(self._keys["bucket"], "tokens", 1))
+            return
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+
+    def _try_enter(self, holder: str) -> Optional[bool]:
+        """None if no slot is free, else whether the slot is held in Redis (True) or locally (False)."""
+        entered = self._redis(lambda: self._enter_script(
+            keys=[self._keys["inflight"]], args=[self.max_concurrency, holder, self.LEASE_MS]))
+        if entered is not None:
+            return True if entered else None
+        return False if self._local_slots.acquire(blocking=False) else None
+
+    def _leave(self, holder: str, shared: bool) -> None:
+        if shared:
+            self._redis(lambda: self._client.zrem(self._keys["inflight"], holder))
+        else:
+            self._local_slots.release()
+
+    # ---------- Public API ----------
+
+    def _sleep(self, seconds: float) -> None:
+        left = remaining()
+        if left is not None and seconds > left:
+            raise DeadlineExceeded(f"{self.host} throttled for {seconds:.1f}s, beyond the request deadline")
+        time.sleep(seconds)
+
+    @contextmanager
+    def slot(self):
+        """Wait for a token and a concurrency slot, then hold the slot for one request."""
+        started = time.monotonic()
+        wait, reserved_shared = self._reserve()
+        holder = uuid.uuid4().hex
+        try:
+            if wait > 0:
+                self._sleep(wait)
+            while (shared := self._try_enter(holder)) is None:
+                self._sleep(self.ENTER_POLL_SECONDS)
+        except DeadlineExceeded:
+            # Giving up: the token goes back, or later callers would wait for requests never sent
+            self._refund(reserved_shared)
+            raise
+
+        delay = time.monotonic() - started
+        self.stats["requests"] += 1
+        if delay >= 0.01:
+            self.stats["throttled"] += 1
+            self.stats["throttle_seconds"] += delay
+        try:
+            yield delay
+        finally:
+            self._leave(holder, shared)
+
+    def observe(self, status_code: int, retry_after: Optional[str] = None) -> None:
+        """Feed back a response status: 429/5xx start or extend backoff, success clears it."""
+        if status_code == 429 or status_code >= 500:
+            self.stats["backoffs"] += 1
+            self._backed_off = True
+            hint = _parse_retry_after(retry_after)
+            delay = self._redis(lambda: self._backoff_script(
+                keys=[self._keys["failures"], self._keys["until"]],
+                args=[self.backoff_base, self.backoff_max, hint]))
+            if delay is None:
+                with self._lock:
+                    self._failures += 1
+                    delay = hint or min(self.backoff_max, self.backoff_base * 2 ** (self._failures - 1))
+                    self._backoff_until = time.monotonic() + float(delay)
+            logger.warning(f"{self.host} answered {status_code}; backing off {float(delay):.1f}s")
+        elif status_code < 400 and self._backed_off:
+            # Only reset after this process saw a failure; avoids a round trip per success
+            self._backed_off = False
+            with self._lock:
+                self._failures = 0
+            self._redis(lambda: self._client.delete(self._keys["failures"]))
+
+    def report(self) -> Dict:
+        return {"host": self.host, **self.stats}
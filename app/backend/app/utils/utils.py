@@ -1,6 +1,9 @@
-from typing import Tuple
+from datetime import datetime
+from typing import List, Tuple
 from app.utils.constants import SUNNY_CODES
 
+Interval = Tuple[datetime, datetime]
+
 def _desc_sunny(code: int) -> bool:
     return code in SUNNY_CODES
 
@@ -25,4 +28,62 @@ def _meets_prefs(day: dict, prefs: dict) -> Tuple[bool, int]:
     if 'min_wind_kmh' in prefs:
         if day.get('wind_kmh', 0) < prefs['min_wind_kmh']:
             score -= int((prefs['min_wind_kmh'] - day.get('wind_kmh', 0)))
-    return (score >= 75, max(0, score))
\ No newline at end of file
+    return (score >= 75, max(0, score))
+
+
+def _merge_intervals(intervals: List[Interval]) -> List[Interval]:
+    """Sweep-line merge of (start, end) intervals into sorted, disjoint ones."""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _free_gaps(busy: List[Interval], window_start: datetime, window_end: datetime) -> List[Interval]:
+    """Return free gaps inside [window_start, window_end) given merged busy intervals."""
+    gaps: List[Interval] = []
+    cursor = window_start
+    for start, end in busy:
+        if end <= cursor:
+            continue
+        if start >= window_end:
+            break
+        if start > cursor:
+            gaps.append((cursor, start))
+        cursor = max(cursor, end)
+    if cursor < window_end:
+        gaps.append((cursor, window_end))
+    return gaps
+
+
+def _best_window(scores: List[int | None], start: int, end: int, length: int) -> Tuple[int, float] | None:
+    """
+    Best contiguous window of `length` slots inside scores[start:end], by mean score.
+
+    One sliding pass (O(end - start)); windows touching a None slot are skipped.
+    Returns (window start index, mean score) or None if no complete window fits.
+    """
+    end = min(end, len(scores))
+    if length <= 0 or end - start < length:
+        return None
+    best = None
+    total, missing = 0, 0
+    for i in range(start, end):
+        if scores[i] is None:
+            missing += 1
+        else:
+            total += scores[i]
+        j = i - length
+        if j >= start:
+            if scores[j] is None:
+                missing -= 1
+            else:
+                total -= scores[j]
+        if i - start + 1 >= length and missing == 0:
+            if best is None or total > best[1]:
+                best = (i - length + 1, total)
+    return (best[0], best[1] / length) if best else None
@@ -0,0 +1,226 @@
+"""
+Offline load test for /chat.
+
+Starts the FastAPI app with a deterministic fake chat model and a local weather.com
+stub, drives concurrent virtual users through scripted conversations, and reports
+throughput, latency percentiles and error rates. Results are saved as JSON so runs
+can be compared:
+
+    cd app/backend
+    python -m loadtest --users 20 --duration 60
+    python -m loadtest --users 20 --duration 60 --compare loadtest/results/<previous>.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from loadtest.env import configure, quiet_logs
+from loadtest.stub_weather import StubWeatherServer
+
+CITIES = ["Paris", "Denver", "Lisbon", "Tokyo", "Cape Town", "Vancouver", "Oslo", "Austin"]
+
+# Conversation scripts: each is a list of user turns ({city} is filled per session)
+SCRIPTS: Dict[str, List[str]] = {
+    "forecast": [
+        "What's the weather in {city}?",
+        "Forecast for {city} this weekend?",
+        "What is the best time for running in {city} tomorrow?",
+    ],
+    "where_can_i_go": [
+        "Where can I go hiking near {city} next week?",
+        "Where can I go cycling near {city}?",
+    ],
+    "calendar": [
+        "Add Team standup tomorrow at 2pm",
+        "What do I have this week?",
+    ],
+}
+DEFAULT_MIX = "forecast=5,where_can_i_go=2,calendar=3"
+
+
+def _percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)  # nearest-rank
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def _summary(samples: List[Dict], seconds: float) -> Dict:
+    latencies = [s["ms"] for s in samples]
+    errors = sum(1 for s in samples if s["status"] != 200)
+    return {
+        "requests": len(samples),
+        "rps": round(len(samples) / seconds, 2) if seconds else 0.0,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "p50_ms": round(_percentile(latencies, 50), 1),
+        "p95_ms": round(_percentile(latencies, 95), 1),
+        "p99_ms": round(_percentile(latencies, 99), 1),
+        "max_ms": round(max(latencies, default=0.0), 1),
+        "statuses": dict(Counter(str(s["status"]) for s in samples)),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _start_app(args, stub_url: str) -> tuple:
+    """Import the app against the stub with the scripted model; serve it with uvicorn in a thread."""
+    configure(stub_url, args.real_limits)
+
+    import uvicorn
+
+    import app.agent
+    import app.tools.places
+    from app.main import app as fastapi_app
+    from app.metrics import llm_metrics
+    from app.tracing import llm_tracer
+    from loadtest.fake_llm import ScriptedChatModel
+
+    quiet_logs()
+
+    fake = ScriptedChatModel(latency_ms=args.llm_latency_ms, callbacks=[llm_metrics, llm_tracer])
+    app.agent.llm = fake
+    app.tools.places.llm_flash = fake
+    app.agent.get_agent.cache_clear()
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(fastapi_app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="loadtest-app", daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+async def _user(client, base_url: str, rnd: random.Random, mix: List[tuple], stop_at: float, samples: List[Dict]) -> None:
+    names, weights = zip(*mix)
+    while time.monotonic() < stop_at:
+        script = rnd.choices(names, weights)[0]
+        city = rnd.choice(CITIES)
+        session_id = f"lt-{uuid.uuid4().hex[:12]}"
+        history: List[Dict] = []
+        for turn, text in enumerate(SCRIPTS[script]):
+            if time.monotonic() >= stop_at:
+                return
+            history.append({"role": "user", "content": text.format(city=city)})
+            started = time.perf_counter()
+            try:
+                resp = await client.post(f"{base_url}/chat", json={"session_id": session_id, "messages": history})
+                status = resp.status_code
+                reply = resp.json().get("response", "") if status == 200 else ""
+            except Exception as e:
+                status, reply = f"exception:{type(e).__name__}", ""
+            samples.append({"script": script, "turn": turn, "status": status,
+                            "ms": (time.perf_counter() - started) * 1000})
+            if status != 200:
+                break
+            history.append({"role": "assistant", "content": reply})
+
+
+async def _drive(args, base_url: str) -> tuple:
+    import httpx
+
+    mix = []
+    for part in args.mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCRIPTS:
+            raise SystemExit(f"unknown script '{name}'; available: {', '.join(SCRIPTS)}")
+        mix.append((name.strip(), float(weight or 1)))
+
+    samples: List[Dict] = []
+    started = time.monotonic()
+    stop_at = started + args.duration
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        await asyncio.gather(*(
+            _user(client, base_url, random.Random(args.seed + i), mix, stop_at, samples)
+            for i in range(args.users)
+        ))
+    return samples, time.monotonic() - started
+
+
+def _compare(current: Dict, previous_path: str) -> None:
+    with open(previous_path, encoding="utf-8") as f:
+        previous = json.load(f)
+    print(f"\nvs {previous_path} ({previous.get('commit') or '?'}):")
+    for key in ("rps", "p50_ms", "p95_ms", "p99_ms", "error_rate"):
+        old, new = previous["overall"].get(key, 0), current["overall"][key]
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"  {key:<10} {old:>10} -> {new:<10} ({change})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m loadtest", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to run")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"script weights (default {DEFAULT_MIX})")
+    parser.add_argument("--llm-latency-ms", type=float, default=300, help="fake model latency per call")
+    parser.add_argument("--stub-latency-ms", type=float, default=150, help="weather.com stub latency")
+    parser.add_argument("--stub-jitter-ms", type=float, default=50)
+    parser.add_argument("--fixtures", help="directory with recorded redux-dal.json / today.html / tenday.html / hourbyhour.html")
+    parser.add_argument("--real-limits", action="store_true", help="keep the configured weather.com rate limits")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default=os.path.join(os.path.dirname(__file__), "results"))
+    parser.add_argument("--compare", help="previous result file to compare against")
+    args = parser.parse_args()
+
+    stub = StubWeatherServer(args.stub_latency_ms, args.stub_jitter_ms, args.fixtures).start()
+    server, thread, base_url = _start_app(args, stub.base_url)
+    try:
+        samples, seconds = asyncio.run(_drive(args, base_url))
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+        stub.stop()
+
+    by_script: Dict[str, List[Dict]] = defaultdict(list)
+    for s in samples:
+        by_script[s["script"]].append(s)
+    result = {
+        "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        "seconds": round(seconds, 2),
+        "overall": _summary(samples, seconds),
+        "scripts": {name: _summary(rows, seconds) for name, rows in sorted(by_script.items())},
+        "stub_requests": dict(stub.requests),
+    }
+
+    print(f"{'script':<16}{'reqs':>7}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'err%':>7}")
+    for name, row in [("overall", result["overall"]), *result["scripts"].items()]:
+        print(f"{name:<16}{row['requests']:>7}{row['rps']:>8}{row['p50_ms']:>9}{row['p95_ms']:>9}"
+              f"{row['p99_ms']:>9}{row['error_rate'] * 100:>6.1f}%")
+    print(f"weather.com stub requests: {result['stub_requests']}")
+
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"saved {path}")
+    if args.compare:
+        _compare(result, args.compare)
+
+
+if __name__ == "__main__":
+    main()
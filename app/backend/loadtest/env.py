@@ -0,0 +1,26 @@
+import logging
+import os
+import sys
+
+
+def configure(weather_base_url: str | None = None, real_limits: bool = False) -> None:
+    """Environment for running the app offline; must run before anything imports `app`."""
+    if weather_base_url:
+        os.environ["WEATHER_BASE_URL"] = weather_base_url
+    os.environ.setdefault("GOOGLE_API_KEY", "loadtest")
+    os.environ.setdefault("REDIS_HOST", "")  # in-memory cache unless a Redis is given
+    os.environ.setdefault("PREWARM_ENABLED", "false")
+    os.environ.setdefault("LANGCHAIN_TRACING_V2", "false")
+    if not real_limits:
+        # Measure the app, not the weather.com politeness policy
+        os.environ.setdefault("SCRAPE_RATE_PER_SEC", "1000")
+        os.environ.setdefault("SCRAPE_BURST", "1000")
+        os.environ.setdefault("SCRAPE_MAX_CONCURRENCY", "64")
+
+
+def quiet_logs() -> None:
+    from loguru import logger
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    logging.getLogger().setLevel(logging.WARNING)
@@ -0,0 +1,88 @@
+import asyncio
+import hashlib
+import re
+import time
+from datetime import date, timedelta
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+# Deterministic stand-in for Gemini. A user turn is mapped to one tool call by keywords
+# (the way the real model picks tools for the load-test scripts); once the tool result
+# is back the model answers with a short summary. Place-suggestion prompts from
+# app.tools.places get a fixed comma-separated list.
+
+_CITY_RE = re.compile(r"\b(?:in|near|for|at) ([A-Z][\w'.-]*(?: [A-Z][\w'.-]*)*)")
+_ACTIVITY_RE = re.compile(r"\bgo ([a-z_]+)")
+_TITLE_RE = re.compile(r"^(?:add|schedule|book)\s+(.*?)(?:\s+tomorrow\b.*)?$", re.IGNORECASE)
+_PLACES = ["Alder Park", "Birch Valley", "Cedar Lake", "Dune Point", "Elm Ridge",
+           "Fern Hollow", "Granite Peak", "Harbor Bay", "Iris Meadow", "Juniper Falls"]
+
+
+def _plan(text: str):
+    """(tool name, args) for a user message, or None for a plain answer."""
+    lower = text.lower()
+    city = (_CITY_RE.search(text) or [None, None])[1]
+    today = date.today()
+    if "where can i go" in lower:
+        activity = (_ACTIVITY_RE.search(lower) or [None, "hiking"])[1]
+        return "where_can_i_go_tool", {"activity": activity, "days": 7, "near_city": city}
+    if lower.startswith(("add ", "schedule ", "book ")):
+        title = _TITLE_RE.match(text)[1].strip() or "Event"
+        return "add_calendar_event", {
+            "title": title, "date": (today + timedelta(days=1)).isoformat(), "start_time": "14:00",
+        }
+    if "what do i have" in lower or "my schedule" in lower:
+        return "get_calendar_events", {
+            "start_date": today.isoformat(), "end_date": (today + timedelta(days=7)).isoformat(),
+        }
+    if city and "best time" in lower:
+        activity = next((w for w in ("running", "cycling", "picnic", "hiking") if w in lower), "running")
+        return "find_best_time_window_tool", {"city": city, "activity": activity}
+    if city and ("forecast" in lower or "weekend" in lower or "week" in lower):
+        return "get_weather_forecast_tool", {"city": city, "days": 5}
+    if city and "weather" in lower:
+        return "get_current_weather_tool", {"city": city}
+    return None
+
+
+class ScriptedChatModel(BaseChatModel):
+    latency_ms: float = 0.0
+    tool_names: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model": "scripted"}
+
+    def bind_tools(self, tools, **kwargs: Any):
+        return self.model_copy(update={"tool_names": [t.name for t in tools]})
+
+    def _respond(self, messages: List[BaseMessage]) -> AIMessage:
+        last = messages[-1]
+        if isinstance(last, ToolMessage):
+            return AIMessage(content=f"Here is what I found:\n{str(last.content)[:400]}")
+        text = str(last.content) if isinstance(last, HumanMessage) else ""
+        if "comma-separated" in text:
+            return AIMessage(content=", ".join(_PLACES))
+        plan = _plan(text)
+        if plan and plan[0] in self.tool_names:
+            name, args = plan
+            call_id = "call_" + hashlib.sha1(f"{len(messages)}:{text}".encode()).hexdigest()[:12]
+            return AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": call_id}])
+        return AIMessage(content="Happy to help! Could you tell me a bit more?")
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _agenerate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
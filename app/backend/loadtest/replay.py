@@ -0,0 +1,239 @@
+"""
+Replay recorded /chat cassettes offline and report agent-level cost.
+
+Each cassette (recorded with the X-Cassette: record header) is re-run through the
+app's turn handler with recorded model answers and recorded weather.com responses;
+no network is used. Reports LLM calls, tool calls (and duplicates), tokens, fetches
+and wall time next to the recorded values, so extra ReAct iterations or repeated
+tool calls show up as a diff:
+
+    cd app/backend
+    python -m loadtest.replay /tmp/chat-cassettes            # every cassette in a directory
+    python -m loadtest.replay a.json.gz b.json.gz --json out.json --fail-on-diff
+"""
+import argparse
+import asyncio
+import glob
+import gzip
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from typing import Dict, List
+from unittest import mock
+from urllib.parse import urlsplit
+
+from loadtest.env import configure, quiet_logs
+
+
+def _load(path: str) -> Dict:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _http_key(method: str, url: str, body) -> str:
+    # Host-independent, so cassettes recorded against the stub or weather.com both match
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    return f"{method.upper()} {path} {json.dumps(body, sort_keys=True) if body is not None else ''}"
+
+
+def _tool_calls(message: Dict) -> List[Dict]:
+    data = message.get("data", message)
+    return data.get("tool_calls") or []
+
+
+def _usage(messages: List[Dict]) -> Dict[str, int]:
+    total = Counter()
+    for m in messages:
+        usage = m.get("data", m).get("usage_metadata") or {}
+        total["input_tokens"] += usage.get("input_tokens", 0)
+        total["output_tokens"] += usage.get("output_tokens", 0)
+    return dict(total)
+
+
+class ReplayBook:
+    """Recorded answers for one cassette, matched by input key with an in-order fallback."""
+
+    def __init__(self, cassette: Dict):
+        self._lock = threading.Lock()
+        self.llm_by_key: Dict[str, deque] = defaultdict(deque)
+        self.llm_order = deque(cassette["llm"])
+        for entry in cassette["llm"]:
+            self.llm_by_key[entry["key"]].append(entry)
+        self.http: Dict[str, deque] = defaultdict(deque)
+        for entry in cassette["http"]:
+            self.http[_http_key(entry["method"], entry["url"], entry.get("json"))].append(entry)
+        self.llm_outputs: List[Dict] = []
+        self.stats = Counter()
+
+    def next_llm(self, key: str) -> Dict | None:
+        with self._lock:
+            entry = self.llm_by_key[key].popleft() if self.llm_by_key[key] else None
+            if entry is None:
+                # Input changed since recording: fall back to the next unused answer
+                self.stats["llm_mismatches"] += 1
+                entry = next((e for e in self.llm_order if e.get("_used") is None), None)
+                if entry is not None:
+                    self.llm_by_key[entry["key"]].remove(entry)
+            if entry is None:
+                self.stats["llm_exhausted"] += 1
+                return None
+            entry["_used"] = True
+            self.llm_outputs.append(entry["output"])
+            return entry["output"]
+
+    def next_http(self, method: str, url: str, body) -> Dict | None:
+        with self._lock:
+            queue = self.http.get(_http_key(method, url, body))
+            self.stats["http_fetches"] += 1
+            if not queue:
+                self.stats["http_unmatched"] += 1
+                return None
+            return queue.popleft()
+
+
+def _replay_model(book: ReplayBook):
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage, messages_from_dict
+    from langchain_core.outputs import ChatGeneration, ChatResult
+
+    from app.cassette import llm_input_key
+
+    class ReplayChatModel(BaseChatModel):
+        @property
+        def _llm_type(self) -> str:
+            return "replay"
+
+        def bind_tools(self, tools, **kwargs):
+            return self
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            output = book.next_llm(llm_input_key(messages))
+            message = messages_from_dict([output])[0] if output else AIMessage(content="[replay: no recorded answer]")
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+    return ReplayChatModel()
+
+
+def _transport(book: ReplayBook):
+    import requests
+    from requests.structures import CaseInsensitiveDict
+
+    def request(method, url, json=None, **kwargs):
+        entry = book.next_http(method, url, json)
+        resp = requests.Response()
+        resp.url = url
+        if entry is None:
+            resp.status_code, resp._content = 404, b"not in cassette"
+            return resp
+        resp.status_code = entry["status"]
+        resp.headers = CaseInsensitiveDict(entry["headers"])
+        resp._content = entry["body"].encode("utf-8")
+        return resp
+
+    def session_request(self, method, url, **kwargs):
+        return request(method, url, **kwargs)
+
+    return request, session_request
+
+
+def replay(cassette: Dict) -> Dict:
+    """Re-run one recorded turn offline; returns recorded vs replayed figures."""
+    import app.agent
+    import app.tools.places
+    from app.cache import r
+    from app.main import _answer
+    from app.tools.calendar_tools import _calendar_registry, get_calendar_manager
+
+    book = ReplayBook(cassette)
+    model = _replay_model(book)
+    app.agent.llm = model
+    app.tools.places.llm_flash = model
+    app.agent.get_agent.cache_clear()
+
+    # Same starting state as the recording: cold cache, the session's calendar
+    getattr(r, "_store", {}).clear()
+    session_id = cassette["session_id"]
+    _calendar_registry.drop(session_id)
+    get_calendar_manager({"configurable": {"session_id": session_id}}).restore(cassette.get("calendar") or [])
+
+    request, session_request = _transport(book)
+    started = time.perf_counter()
+    with mock.patch("requests.request", request), mock.patch("requests.Session.request", session_request):
+        try:
+            response = asyncio.run(_answer(session_id, cassette["messages"]))
+        except Exception as e:
+            response = f"[replay failed: {type(e).__name__}: {e}]"
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    recorded_outputs = [e["output"] for e in cassette["llm"]]
+    replayed_calls = [(c["name"], json.dumps(c["args"], sort_keys=True)) for o in book.llm_outputs for c in _tool_calls(o)]
+    return {
+        "id": cassette["id"],
+        "recorded": {
+            "llm_calls": len(cassette["llm"]),
+            "tool_calls": sum(len(_tool_calls(o)) for o in recorded_outputs),
+            **_usage(recorded_outputs),
+            "http_fetches": len(cassette["http"]),
+            "wall_ms": cassette["wall_ms"],
+            "llm_ms": round(sum(e.get("ms", 0) for e in cassette["llm"]), 1),
+        },
+        "replayed": {
+            "llm_calls": len(book.llm_outputs),
+            "tool_calls": len(replayed_calls),
+            "duplicate_tool_calls": sum(n - 1 for n in Counter(replayed_calls).values()),
+            **_usage(book.llm_outputs),
+            "http_fetches": book.stats["http_fetches"],
+            "wall_ms": round(wall_ms, 1),
+        },
+        "llm_mismatches": book.stats["llm_mismatches"],
+        "llm_exhausted": book.stats["llm_exhausted"],
+        "http_unmatched": book.stats["http_unmatched"],
+        "same_response": response == cassette.get("response"),
+    }
+
+
+def _differs(row: Dict) -> bool:
+    """Agent-level change; the answer text alone may differ (e.g. new calendar event ids)."""
+    rec, rep = row["recorded"], row["replayed"]
+    return bool(
+        rep["llm_calls"] != rec["llm_calls"] or rep["tool_calls"] != rec["tool_calls"]
+        or rep["http_fetches"] != rec["http_fetches"] or rep["duplicate_tool_calls"]
+        or row["llm_mismatches"] or row["http_unmatched"]
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m loadtest.replay", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="cassette files or directories of *.json.gz")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--fail-on-diff", action="store_true", help="exit 1 if any replay differs from its recording")
+    args = parser.parse_args()
+
+    configure()
+    import app.main  # noqa: F401  (configures logging on import; quieten it afterwards)
+    quiet_logs()
+    files = []
+    for path in args.paths:
+        files += sorted(glob.glob(os.path.join(path, "*.json*"))) if os.path.isdir(path) else [path]
+
+    rows = [replay(_load(f)) for f in files]
+    print(f"{'cassette':<18}{'llm':>9}{'tools':>9}{'dup':>5}{'tokens in/out':>22}{'fetches':>10}{'ms rec/rep':>18}  diff")
+    for row in rows:
+        rec, rep = row["recorded"], row["replayed"]
+        tokens = f"{rep.get('input_tokens', 0)}/{rep.get('output_tokens', 0)}"
+        print(f"{row['id']:<18}{rec['llm_calls']:>4}/{rep['llm_calls']:<4}{rec['tool_calls']:>4}/{rep['tool_calls']:<4}"
+              f"{rep['duplicate_tool_calls']:>5}{tokens:>22}{rec['http_fetches']:>5}/{rep['http_fetches']:<4}"
+              f"{rec['wall_ms']:>9.0f}/{rep['wall_ms']:<8.0f}  {'DIFF' if _differs(row) else 'same'}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    if args.fail_on_diff and any(_differs(r) for r in rows):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+# Local stand-in for weather.com: answers the location search (redux-dal) and the
+# today / tenday / hourbyhour pages. Responses come from recorded files in a fixtures
+# directory when present (redux-dal.json, today.html, tenday.html, hourbyhour.html) and
+# are otherwise generated deterministically from the location, in the markup the
+# scraper parses. Every response waits latency_ms +/- jitter_ms and carries an ETag.
+
+_CONDITIONS = ["Sunny", "Mostly Sunny", "Partly Cloudy", "Cloudy", "Rain", "Thunderstorms"]
+_PAGE_RE = re.compile(r"^/weather/(today|tenday|hourbyhour)/l/([^/?]+)")
+
+
+def _seed(text: str) -> int:
+    return int(hashlib.sha1(text.encode()).hexdigest()[:8], 16)
+
+
+def _location(query: str) -> Dict:
+    rnd = random.Random(_seed(query.lower()))
+    return {
+        "placeId": [hashlib.sha1(query.lower().encode()).hexdigest()[:16]],
+        "latitude": [round(rnd.uniform(-60, 70), 4)],
+        "longitude": [round(rnd.uniform(-180, 180), 4)],
+    }
+
+
+def _card(name: str, condition: str, temps, precip: int, wind: int) -> str:
+    temp_spans = "".join(f'<span data-testid="TemperatureValue">{t}°</span>' for t in temps)
+    return (
+        '<div data-testid="DetailsSummary">'
+        f'<h2 data-testid="daypartName">{name}</h2>'
+        f'<span class="DetailsSummary--wxPhrase--nhYpy">{condition}</span>{temp_spans}'
+        f'<span data-testid="PercentageValue">{precip}%</span>'
+        f'<div data-testid="wind">W {wind} mph</div></div>'
+    )
+
+
+def _hour_label(hour: int) -> str:
+    return f"{hour % 12 or 12} {'am' if hour < 12 else 'pm'}"
+
+
+def synthetic_page(page: str, loc: str) -> str:
+    """Deterministic page for a location; values change once a day like the real forecast."""
+    rnd = random.Random(_seed(f"{loc}:{datetime.now().date()}"))
+    current = (
+        f'<span data-testid="TemperatureValue">{rnd.randint(30, 95)}°</span>'
+        f'<div data-testid="wxPhrase">{rnd.choice(_CONDITIONS)}</div>'
+        f'<p>Humidity {rnd.randint(20, 95)}% Wind {rnd.randint(0, 25)} mph</p>'
+    )
+    if page == "today":
+        return f"<html><body>{current}</body></html>"
+    if page == "tenday":
+        days = [datetime.now().date() + timedelta(days=i) for i in range(10)]
+        cards = [
+            _card("Tonight" if i == 0 else f"{day:%a} {day.day}", rnd.choice(_CONDITIONS),
+                  (rnd.randint(55, 95), rnd.randint(35, 60)), rnd.randint(0, 90), rnd.randint(0, 30))
+            for i, day in enumerate(days)
+        ]
+        return f"<html><body>{current}{''.join(cards)}</body></html>"
+    start = datetime.now().replace(minute=0, second=0, microsecond=0)
+    cards = [
+        _card(_hour_label((start + timedelta(hours=i)).hour), rnd.choice(_CONDITIONS),
+              (rnd.randint(40, 90),), rnd.randint(0, 90), rnd.randint(0, 30))
+        for i in range(48)
+    ]
+    return f"<html><body>{''.join(cards)}</body></html>"
+
+
+class StubWeatherServer:
+    """weather.com stub on 127.0.0.1 running in a background thread."""
+
+    def __init__(self, latency_ms: float = 150, jitter_ms: float = 50, fixtures: Optional[str] = None, port: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.fixtures = fixtures
+        self.requests: Counter = Counter()
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, page: str, status: int, body: bytes, content_type: str) -> None:
+                etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+                if status == 200 and self.headers.get("If-None-Match") == etag:
+                    status, body = 304, b""
+                stub._count(page, status)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                stub._delay()
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    query = json.loads(self.rfile.read(length))[0]["params"]["query"]
+                except (ValueError, LookupError, TypeError):
+                    return self._reply("redux-dal", 400, b"{}", "application/json")
+                recorded = stub._fixture("redux-dal.json")  # replayed as-is for every query
+                body = recorded or json.dumps({"dal": {"getSunV3LocationSearchUrlConfig": {
+                    query: {"data": {"location": _location(query)}},
+                }}})
+                self._reply("redux-dal", 200, body.encode(), "application/json")
+
+            def do_GET(self):
+                stub._delay()
+                m = _PAGE_RE.match(self.path)
+                if not m:
+                    return self._reply("unknown", 404, b"not found", "text/plain")
+                page, loc = m.groups()
+                html = stub._fixture(f"{page}.html") or synthetic_page(page, loc)
+                self._reply(page, 200, html.encode(), "text/html; charset=utf-8")
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, name="stub-weather", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _delay(self) -> None:
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def _count(self, page: str, status: int) -> None:
+        with self._lock:
+            self.requests[f"{page} {status}"] += 1
+
+    def _fixture(self, name: str) -> Optional[str]:
+        if not self.fixtures:
+            return None
+        path = os.path.join(self.fixtures, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def start(self) -> "StubWeatherServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Tests run offline: in-memory cache, no prewarmer, a dummy model key
+os.environ["REDIS_HOST"] = ""
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+os.environ.setdefault("PREWARM_ENABLED", "false")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
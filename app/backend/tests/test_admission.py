@@ -0,0 +1,131 @@
+import asyncio
+import contextlib
+from unittest import mock
+
+import pytest
+
+from langchain_core.messages import AIMessage
+
+from app.admission import AdmissionController, AdmissionRejected, CostScheduler
+
+
+def _pool(max_concurrent=1, max_queue=1, queue_timeout=0.1):
+    return AdmissionController("test", max_concurrent, max_queue, queue_timeout, avg_run=4.0)
+
+
+async def _hold(pool, release: asyncio.Event):
+    async with pool.slot():
+        await release.wait()
+
+
+def test_full_queue_is_rejected_with_429():
+    async def run():
+        pool, release = _pool(), asyncio.Event()
+        holder = asyncio.create_task(_hold(pool, release))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(_hold(pool, release))
+        await asyncio.sleep(0)
+        assert (pool.running, pool.waiting) == (1, 1)
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with pool.slot():
+                pass
+        release.set()
+        await asyncio.gather(holder, queued)
+        return rejected.value
+
+    rejected = asyncio.run(run())
+    assert (rejected.status, rejected.reason) == (429, "queue_full")
+    assert rejected.retry_after == 8  # avg run 4s x (1 waiting + 1) / 1 slot
+
+
+def test_queue_wait_past_the_timeout_is_rejected_with_503():
+    async def run():
+        pool, release = _pool(), asyncio.Event()
+        holder = asyncio.create_task(_hold(pool, release))
+        await asyncio.sleep(0)
+        try:
+            async with pool.slot():
+                pass
+        finally:
+            release.set()
+            await holder
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        asyncio.run(run())
+    assert (rejected.value.status, rejected.value.reason) == (503, "queue_timeout")
+
+
+def test_queued_run_gets_the_freed_slot():
+    async def run():
+        pool, release = _pool(queue_timeout=5), asyncio.Event()
+        holder = asyncio.create_task(_hold(pool, release))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(_hold(pool, asyncio.Event()))
+        await asyncio.sleep(0)
+        release.set()
+        await holder
+        await asyncio.sleep(0.01)
+        assert (pool.running, pool.waiting) == (1, 0)
+        queued.cancel()
+
+    asyncio.run(run())
+
+
+def test_rejection_is_a_json_response_with_retry_after():
+    from fastapi.testclient import TestClient
+    from app import main
+
+    async def busy(session_id, messages, pool=None):
+        raise AdmissionRejected(429, "queue_full", 7)
+
+    with mock.patch.object(main, "_answer", busy):
+        resp = TestClient(main.app).post("/chat", json={"session_id": "s", "messages": [{"role": "user", "content": "hi"}]})
+
+    assert resp.status_code == 429
+    assert resp.headers["Retry-After"] == "7"
+    assert "busy" in resp.json()["detail"]
+
+
+def test_full_heavy_pool_does_not_block_light_runs():
+    async def run():
+        scheduler = CostScheduler({"light": _pool(), "heavy": _pool(max_queue=0)})
+        release = asyncio.Event()
+        heavy = asyncio.create_task(_hold(scheduler.pools["heavy"], release))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected):
+            async with scheduler.slot("heavy"):
+                pass
+        async with scheduler.slot("light"):
+            light_running = scheduler.report()["light"]["running"]
+        async with scheduler.slot("unknown"):  # anything unrecognised counts as light
+            fallback_running = scheduler.report()["light"]["running"]
+        release.set()
+        await heavy
+        return light_running, fallback_running
+
+    assert asyncio.run(run()) == (1, 1)
+
+
+def test_planning_turns_run_in_the_heavy_pool():
+    from app import main
+
+    pools = []
+
+    class Agent:
+        async def ainvoke(self, state, config):
+            return {"messages": [AIMessage("done")]}
+
+    @contextlib.asynccontextmanager
+    async def slot(cost):
+        pools.append(cost)
+        yield
+
+    def turn(text):
+        return [{"role": "user", "content": text}]
+
+    with mock.patch.object(main, "get_agent", return_value=Agent()), mock.patch.object(main.admission, "slot", slot):
+        asyncio.run(main._answer("s", turn("Where can I go hiking near Denver next week?")))
+        asyncio.run(main._answer("s", turn("Who painted the Mona Lisa?")))
+        asyncio.run(main._answer("s", turn("Where can I go hiking near Denver?"), pool="batch"))
+
+    assert pools == ["heavy", "light", "batch"]
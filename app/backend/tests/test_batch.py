@@ -0,0 +1,79 @@
+import asyncio
+import json
+from datetime import date, timedelta
+from unittest import mock
+
+import pytest
+
+from app import batch, turn_memo
+from app.tools import weather_scraper
+
+
+def _collect(lines, answer, workers=1):
+    async def source():
+        for line in lines:
+            yield line
+
+    async def run():
+        return [r async for r in batch.run_batch(source(), answer, workers, deadline=10)]
+
+    return asyncio.run(run())
+
+
+def test_batch_weather_memo_rolls_forward_across_midnight():
+    monday = date(2026, 3, 2)
+    clock = {"today": monday}
+    fetched = {"forecast": [{"date": (monday + timedelta(days=i)).isoformat()} for i in range(3)]}
+
+    async def answer(session_id, messages):
+        first_day = weather_scraper.get_weather_data("Paris")["forecast"][0]["date"]
+        clock["today"] += timedelta(days=1)  # the next item runs after the city's midnight
+        return first_day
+
+    with mock.patch.object(weather_scraper, "_get_weather_data", return_value=fetched) as fetch, \
+            mock.patch.object(weather_scraper, "_local_today", side_effect=lambda offset: clock["today"]):
+        results = _collect([json.dumps({"id": i, "messages": [{"role": "user", "content": "hi"}]}) for i in range(2)],
+                           answer)
+
+    assert sorted(r["response"] for r in results) == ["2026-03-02", "2026-03-03"]
+    assert fetch.call_count == 1  # second item answered from the batch memo
+
+
+def test_shared_memo_entries_expire():
+    memo = turn_memo.TurnMemo(max_age=60)
+    memo.put("k", "v")
+    assert memo.get("weather", "k") == "v"
+    with mock.patch.object(turn_memo.time, "monotonic", return_value=turn_memo.time.monotonic() + 61):
+        assert memo.get("weather", "k") is None
+
+
+def test_stream_lines_splits_chunks_and_caps_size():
+    async def chunks(parts):
+        for part in parts:
+            yield part
+
+    async def read(parts, max_bytes):
+        return [line async for line in batch.stream_lines(chunks(parts), max_bytes)]
+
+    assert asyncio.run(read([b'{"a": 1}\n{"b"', b': "\xc3', b'\xa9"}\n', b"tail"], 100)) == ['{"a": 1}', '{"b": "é"}', "tail"]
+    with pytest.raises(batch.BatchTooLarge):
+        asyncio.run(read([b"x" * 60, b"y" * 60], 100))
+
+
+def test_batch_endpoint_streams_answers_and_rejects_oversized_uploads():
+    from fastapi.testclient import TestClient
+    from app import main
+
+    async def answer(session_id, messages, pool=None):
+        return f"{pool}: {messages[-1]['content']}"
+
+    body = "\n".join(json.dumps({"id": i, "messages": [{"role": "user", "content": f"q{i}"}]}) for i in range(3))
+    client = TestClient(main.app)
+    with mock.patch.object(main, "_answer", answer):
+        resp = client.post("/chat/batch", content=body)
+        with mock.patch.object(main, "CHAT_BATCH_MAX_BYTES", 10):
+            too_large = client.post("/chat/batch", content=body)
+
+    assert resp.status_code == 200
+    assert sorted(json.loads(line)["response"] for line in resp.text.splitlines()) == ["batch: q0", "batch: q1", "batch: q2"]
+    assert too_large.status_code == 413
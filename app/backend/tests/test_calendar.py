@@ -0,0 +1,46 @@
+from unittest import mock
+
+from app.utils import prop_calendar_manager
+from app.utils.prop_calendar_manager import CalendarRegistry
+
+
+def test_registry_evicts_least_recently_used_sessions_past_the_cap():
+    registry = CalendarRegistry(max_users=2)
+    a = registry.get("a")
+    registry.get("b")
+    assert registry.get("a") is a  # a is now the most recent
+    registry.get("c")
+
+    assert len(registry) == 2
+    assert registry.get("a") is a
+    assert not registry.drop("b")
+
+
+def test_registry_drops_idle_sessions():
+    registry = CalendarRegistry(idle_seconds=60)
+    with mock.patch.object(prop_calendar_manager.clock, "monotonic", return_value=1000.0):
+        old = registry.get("old")
+    with mock.patch.object(prop_calendar_manager.clock, "monotonic", return_value=1061.0):
+        registry.get("new")
+
+    assert len(registry) == 1
+    assert registry.get("old") is not old
+
+
+def test_get_events_uses_the_start_index_in_order():
+    cal = prop_calendar_manager.PropCalendarManager()
+    late = cal.create_event("late", "2026-03-05", "18:00")
+    cal.create_event("outside", "2026-03-09", "09:00")
+    early = cal.create_event("early", "2026-03-03", "08:00")
+    all_day = cal.create_event("all day", "2026-03-04")
+    moved = cal.create_event("moved", "2026-03-04", "10:00")
+    gone = cal.create_event("gone", "2026-03-04", "11:00")
+
+    cal.update_event(moved["id"], date="2026-03-10")
+    cal.delete_event(gone["id"])
+    events = cal.get_events("2026-03-03T00:00:00", "2026-03-05T23:59:59")
+
+    assert [e["title"] for e in events] == ["early", "all day", "late"]
+    assert cal.get_events("2026-03-03T00:00:00", "2026-03-05T23:59:59", max_results=1) == [early]
+    assert [e["id"] for e in cal.get_events("2026-03-10T00:00:00", "2026-03-10T23:59:59")] == [moved["id"]]
+    assert all_day in events and late in events
@@ -0,0 +1,24 @@
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+from app import cassette, main
+
+
+async def _answer(session_id, messages, pool=None):
+    return "ok"
+
+
+def test_x_cassette_records_only_for_admins(tmp_path):
+    body = {"session_id": "s", "messages": [{"role": "user", "content": "hi"}]}
+    client = TestClient(main.app)
+    with mock.patch.object(main, "_answer", _answer), mock.patch.object(main, "ADMIN_TOKEN", "s3cret"), \
+            mock.patch.object(main, "_calendar_snapshot", return_value=[]), \
+            mock.patch.object(cassette, "CASSETTE_DIR", str(tmp_path)):
+        anonymous = client.post("/chat", json=body, headers={"X-Cassette": "record"})
+        wrong = client.post("/chat", json=body, headers={"X-Cassette": "record", "X-Admin-Token": "guess"})
+        admin = client.post("/chat", json=body, headers={"X-Cassette": "record", "X-Admin-Token": "s3cret"})
+
+    assert "x-cassette-id" not in anonymous.headers and "x-cassette-id" not in wrong.headers
+    assert (tmp_path / f"{admin.headers['x-cassette-id']}.json.gz").exists()
+    assert len(list(tmp_path.iterdir())) == 1
@@ -0,0 +1,61 @@
+from unittest import mock
+
+import pytest
+
+from app.utils import circuit_breaker
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def _at(seconds):
+    return mock.patch.object(circuit_breaker.time, "monotonic", return_value=seconds)
+
+
+def test_opens_after_consecutive_failures_only():
+    breaker = CircuitBreaker("t", failure_threshold=3, reset_timeout=30)
+    with _at(0):
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()  # resets the streak
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state == "closed"
+        breaker.record_failure()
+        assert breaker.state == "open"
+        with pytest.raises(CircuitOpenError):
+            breaker.check()
+    assert breaker.report()["opened"] == 1 and breaker.report()["rejected"] == 1
+
+
+def test_half_open_lets_one_trial_through():
+    breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=30)
+    with _at(0):
+        breaker.record_failure()
+    with _at(31):
+        assert breaker.state == "half_open"
+        assert breaker.allow() is True
+        assert breaker.allow() is False  # the trial is still in flight
+
+
+def test_trial_outcome_closes_or_reopens():
+    breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=30)
+    with _at(0):
+        breaker.record_failure()
+    with _at(31):
+        breaker.check()
+        breaker.record_failure()
+        assert breaker.state == "open"  # re-opened for another reset_timeout
+    with _at(62):
+        breaker.check()
+        breaker.record_success()
+        assert breaker.state == "closed"
+        assert breaker.allow() and breaker.allow()
+
+
+def test_abandoned_trial_frees_the_half_open_slot():
+    breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=30)
+    with _at(0):
+        breaker.record_failure()
+    with _at(31):
+        assert breaker.allow()
+        breaker.abandon()
+        assert breaker.allow()
@@ -0,0 +1,8 @@
+from loadtest.fake_llm import _plan
+
+
+def test_calendar_titles_drop_the_verb_in_any_case():
+    for text in ("Add Team standup tomorrow at 2pm", "add Team standup tomorrow at 2pm", "BOOK Team standup"):
+        name, args = _plan(text)
+        assert name == "add_calendar_event"
+        assert args["title"] == "Team standup"
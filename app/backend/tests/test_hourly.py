@@ -0,0 +1,41 @@
+import random
+
+from app.tools.weather_scraper import _HOURLY_FIELDS, _pack_hours, _unpack_hours
+from app.utils.utils import _best_window
+
+
+def _brute_force(scores, start, end, length):
+    windows = [(i, sum(scores[i:i + length]) / length) for i in range(start, min(end, len(scores)) - length + 1)
+               if None not in scores[i:i + length]]
+    return max(windows, key=lambda w: (w[1], -w[0])) if windows else None
+
+
+def test_best_window_matches_brute_force():
+    rnd = random.Random(29)
+    for _ in range(200):
+        scores = [None if rnd.random() < 0.15 else rnd.randint(0, 100) for _ in range(24)]
+        start, end, length = rnd.randint(0, 10), rnd.randint(12, 26), rnd.randint(1, 5)
+        assert _best_window(scores, start, end, length) == _brute_force(scores, start, end, length)
+
+
+def test_best_window_needs_a_complete_window():
+    assert _best_window([50, None, 50], 0, 3, 2) is None
+    assert _best_window([50, 60], 0, 2, 3) is None
+    assert _best_window([10, 90, 80, 20], 0, 4, 2) == (1, 85.0)
+
+
+def test_pack_hours_round_trip():
+    rows = [
+        {"hour": 0, "temp_c": -3.4, "precip": 10, "wind_kmh": 12.6, "condition_code": 3},
+        {"hour": 13, "temp_c": 21.5, "precip": 0, "wind_kmh": 0.0, "condition_code": 0},
+        {"hour": 23, "temp_c": 8, "precip": 90, "wind_kmh": 40, "condition_code": 5},
+        {"hour": 5, "temp_c": None, "precip": 0, "wind_kmh": 0, "condition_code": 2},  # unparsed: left missing
+    ]
+    hours = _unpack_hours(_pack_hours(rows))
+
+    assert len(hours) == 24
+    assert hours[0] == {"hour": 0, "temp_c": -3, "precip": 10, "wind_kmh": 13, "condition_code": 3}
+    assert hours[13] == {"hour": 13, "temp_c": 22, "precip": 0, "wind_kmh": 0, "condition_code": 0}
+    assert hours[23]["precip"] == 90 and hours[23]["wind_kmh"] == 40
+    assert [h for h in range(24) if hours[h] is not None] == [0, 13, 23]
+    assert set(hours[0]) == {"hour", *_HOURLY_FIELDS}
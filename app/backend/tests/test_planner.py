@@ -0,0 +1,54 @@
+import itertools
+import random
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+from app.tools import planner
+
+
+def _forecast(days):
+    today = date.today()
+    return [{
+        "date": (today + timedelta(days=i)).isoformat(), "condition": "Sunny", "condition_code": 0,
+        "temp_high_c": 22, "temp_low_c": 12, "precip": 0, "wind_kmh": 5,
+    } for i in range(days)]
+
+
+def test_today_windows_start_no_earlier_than_now():
+    at_six_pm = datetime.combine(date.today(), datetime.min.time()).replace(hour=18)
+    with mock.patch.object(planner, "get_weather_data", return_value={"city": "Paris", "forecast": _forecast(2)}), \
+            mock.patch.object(planner, "datetime", wraps=datetime) as fake_datetime:
+        fake_datetime.now.return_value = at_six_pm
+        slots = planner._find_free_weather_slots("Paris", "hiking", days=2,
+                                                 config={"configurable": {"session_id": "test-planner"}})
+
+    assert slots
+    assert all(s["start"] >= at_six_pm for s in slots)
+    assert all(s["start"].date() != date.today() for s in slots)  # hiking ends at 17:00
+
+
+def _brute_force(scores, travel_penalty):
+    n_cities, n_days = len(scores), len(scores[0])
+    paths = []
+    for path in itertools.product(range(n_cities), repeat=n_days):
+        steps = [b - a for a, b in zip(path, path[1:])]
+        if path[0] != 0 or path[-1] != n_cities - 1 or any(s not in (0, 1) for s in steps):
+            continue
+        paths.append((sum(scores[c][d] for d, c in enumerate(path)) - travel_penalty * sum(steps), path))
+    return sorted(paths, reverse=True)
+
+
+def test_optimize_itinerary_matches_brute_force_top_k():
+    rnd = random.Random(7)
+    for _ in range(50):
+        n_cities, n_days = rnd.randint(1, 3), rnd.randint(3, 6)
+        scores = [[rnd.randint(0, 100) for _ in range(n_days)] for _ in range(n_cities)]
+        expected = _brute_force(scores, travel_penalty=10)[:3]
+        got = planner._optimize_itinerary(scores, k=3, travel_penalty=10)
+        assert [t for t, _ in got] == [t for t, _ in expected]
+        assert all(sum(scores[c][d] for d, c in enumerate(p)) - 10 * (len(set(p)) - 1) == t for t, p in got)
+
+
+def test_optimize_itinerary_needs_a_day_per_city():
+    assert planner._optimize_itinerary([[1], [2]]) == []
+    assert planner._optimize_itinerary([]) == []
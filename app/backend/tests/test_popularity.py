@@ -0,0 +1,21 @@
+from app.utils.popularity import DecayingCounter
+
+
+def test_labels_are_dropped_with_their_keys():
+    counter = DecayingCounter(half_life=3600)
+    counter.hit("paris", label="Paris")
+    counter.hit("oslo", weight=0.1, label="Oslo")
+    counter.top(10, min_score=0.5)
+    assert counter.label("paris") == "Paris"
+    assert counter.label("oslo") == "oslo"
+    assert len(counter) == 1
+
+
+def test_size_is_capped_without_top():
+    counter = DecayingCounter(half_life=3600, max_keys=100)
+    counter.hit("popular", weight=50, label="Popular")
+    for i in range(1000):
+        counter.hit(f"city{i}", label=f"City {i}")
+    assert len(counter) <= 100
+    assert len(counter._labels) <= 100
+    assert counter.label("popular") == "Popular"
@@ -0,0 +1,41 @@
+from unittest import mock
+
+from app import prewarm
+from app.cache import _InMemory
+from app.utils.circuit_breaker import CircuitBreaker
+
+
+def test_warm_cities_refreshes_each_cell_once_and_stops_on_open_circuit():
+    breaker = CircuitBreaker("test", failure_threshold=1)
+    warmed = []
+
+    def warm(city):
+        warmed.append(city)
+        if city == "Lyon":
+            breaker.record_failure()
+        return "ok"
+
+    cells = {"Paris": "cell:u09t", "Versailles": "cell:u09t", "Lyon": "lyon", "Nice": "nice"}
+    with mock.patch.object(prewarm, "weather_cache_key", cells.get), \
+            mock.patch.object(prewarm, "scrape_breaker", breaker), \
+            mock.patch.object(prewarm, "_warm", side_effect=warm):
+        result = prewarm.warm_cities(["Paris", "Versailles", "Lyon", "Nice"])
+
+    assert warmed == ["Paris", "Lyon"]
+    assert result["Versailles"].startswith("skipped")
+    assert result["Nice"] == "skipped: weather.com circuit not closed"
+
+
+def test_only_one_worker_takes_a_cycle():
+    shared = _InMemory()
+    with mock.patch.object(prewarm, "r", shared):
+        assert prewarm._take_cycle() is True
+        assert prewarm._take_cycle() is False
+
+
+def test_admin_prewarm_caps_the_city_list():
+    from fastapi.testclient import TestClient
+    from app import main
+
+    resp = TestClient(main.app).post("/admin/prewarm", json={"cities": ["x"] * (prewarm.PREWARM_MAX_PER_CYCLE + 1)})
+    assert resp.status_code == 422
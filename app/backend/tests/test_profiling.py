@@ -0,0 +1,27 @@
+import asyncio
+import os
+from unittest import mock
+
+from app import profiling
+
+
+def test_x_profile_header_only_counts_for_trusted_callers():
+    with mock.patch.object(profiling, "PROFILE_SAMPLE_RATE", 0):
+        assert profiling.should_profile("1", trusted=True) is True
+        assert profiling.should_profile("1", trusted=False) is False
+        assert profiling.should_profile(None, trusted=True) is False
+
+
+def test_profile_is_saved_off_the_event_loop(tmp_path):
+    async def run():
+        async with profiling.profiled(True, session_id="s") as profile_id:
+            await asyncio.sleep(0.02)
+        return profile_id
+
+    with mock.patch.object(profiling, "PROFILE_DIR", str(tmp_path)), \
+            mock.patch.object(profiling.asyncio, "to_thread", wraps=asyncio.to_thread) as to_thread:
+        profile_id = asyncio.run(run())
+
+    assert to_thread.call_args.args[0] is profiling._finish
+    assert os.path.exists(os.path.join(tmp_path, f"{profile_id}.folded"))
+    assert profiling.list_profiles()[0]["id"] == profile_id
@@ -0,0 +1,106 @@
+import threading
+from unittest import mock
+
+import pytest
+from loguru import logger
+
+from app.utils import rate_limiter
+from app.utils.deadline import DeadlineExceeded, reset_deadline, set_deadline
+from app.utils.rate_limiter import HostRateLimiter
+
+
+class FlakyRedis:
+    """Just enough of a redis client for the limiter; `up` switches it on and off."""
+
+    def __init__(self):
+        self.up = False
+
+    def register_script(self, source):
+        def script(keys, args):
+            if not self.up:
+                raise ConnectionError("redis down")
+            return "0"  # no wait to reserve; a truthy "entered" for the in-flight set
+        return script
+
+    def zrem(self, *args):
+        pass
+
+
+def test_redis_outage_is_logged_once_and_recovery_once():
+    client = FlakyRedis()
+    limiter = HostRateLimiter("flaky.example", rate=1000, burst=100, max_concurrency=4, client=client)
+    messages = []
+    sink = logger.add(lambda m: messages.append(m.record["message"]), level="INFO")
+    try:
+        for _ in range(20):
+            with limiter.slot():
+                pass
+        client.up = True
+        for _ in range(5):
+            with limiter.slot():
+                pass
+    finally:
+        logger.remove(sink)
+
+    assert sum("unavailable" in m for m in messages) == 1
+    assert sum("reachable again" in m for m in messages) == 1
+
+
+def _local(**kwargs) -> HostRateLimiter:
+    return HostRateLimiter("local.example", **{"rate": 10, "burst": 2, "max_concurrency": 2, **kwargs})
+
+
+def test_burst_then_rate():
+    limiter = _local()
+    with mock.patch.object(rate_limiter.time, "sleep") as sleep:
+        for _ in range(3):
+            with limiter.slot():
+                pass
+
+    assert sleep.call_count == 1  # two burst tokens, then one token per 1/rate seconds
+    assert 0.05 < sleep.call_args.args[0] <= 0.1
+    assert limiter.report()["requests"] == 3
+
+
+def test_backoff_after_429_honors_retry_after_and_clears_on_success():
+    limiter = _local(burst=10)
+    limiter.observe(429, "3")
+    with mock.patch.object(rate_limiter.time, "sleep") as sleep:
+        with limiter.slot():
+            pass
+    assert 2.5 < sleep.call_args.args[0] <= 3
+
+    limiter.observe(200)
+    assert limiter._failures == 0
+
+
+def test_concurrency_cap_holds_until_a_slot_is_released():
+    limiter = _local(burst=10, max_concurrency=1)
+    entered = threading.Event()
+
+    def second_request():
+        with limiter.slot():
+            entered.set()
+
+    with limiter.slot():
+        worker = threading.Thread(target=second_request)
+        worker.start()
+        assert not entered.wait(0.2)
+    assert entered.wait(1)
+    worker.join()
+
+
+def test_token_is_refunded_when_the_deadline_cuts_the_wait():
+    limiter = _local(rate=1, burst=1)
+    with limiter.slot():
+        pass  # bucket now empty: the next caller waits ~1s
+    token = set_deadline(0.1)
+    try:
+        with pytest.raises(DeadlineExceeded):
+            with limiter.slot():
+                pass
+    finally:
+        reset_deadline(token)
+
+    wait, _ = limiter._reserve()
+    assert wait <= 1.0  # not ~2s: the abandoned request's token came back
@@ -0,0 +1,31 @@
+import pytest
+
+from app.router import IntentRouter
+
+
+def _route(text):
+    match = IntentRouter().match([{"role": "user", "content": text}])
+    return None if match is None else (match[0], match[2])
+
+
+@pytest.mark.parametrize("text", [
+    "what is the weather in paris on saturday",
+    "what's the weather in Paris tonight",
+    "what is the weather in Paris in Fahrenheit",
+    "weather in the morning",
+    "forecast for Oslo this weekend",
+])
+def test_times_and_units_are_not_cities(text):
+    assert _route(text) is None
+
+
+@pytest.mark.parametrize("text, route, city", [
+    ("What's the weather in Paris?", "current_weather", "Paris"),
+    ("weather in Paris today", "current_weather", "Paris"),
+    ("weather in new york right now", "current_weather", "New York"),
+    ("forecast for The Hague", "forecast", "The Hague"),
+    ("3 day forecast for Rio de Janeiro", "forecast", "Rio De Janeiro"),
+])
+def test_plain_lookups_still_route(text, route, city):
+    assert _route(text)[0] == route
+    assert _route(text)[1]["city"] == city
@@ -0,0 +1,44 @@
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import tool
+from langgraph.prebuilt import create_react_agent
+
+from app.tool_node import TimedToolNode
+from app.turn_memo import turn_memo
+
+calls = []
+
+
+@tool
+def get_weather_forecast_tool(city: str) -> str:
+    """Forecast for a city."""
+    calls.append(city)
+    return f"Sunny in {city}"
+
+
+class _ScriptedModel(GenericFakeChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def _call(call_id: str) -> AIMessage:
+    return AIMessage("", tool_calls=[{"name": "get_weather_forecast_tool", "args": {"city": "Paris"}, "id": call_id}])
+
+
+def test_repeated_call_in_later_step_is_appended_not_replaced():
+    calls.clear()
+    model = _ScriptedModel(messages=iter([_call("call_0"), _call("call_1"), AIMessage("done")]))
+    agent = create_react_agent(model, tools=TimedToolNode([get_weather_forecast_tool]))
+
+    with turn_memo():
+        result = agent.invoke({"messages": [HumanMessage("Forecast for Paris?")]})
+
+    history = result["messages"]
+    assert [type(m).__name__ for m in history] == [
+        "HumanMessage", "AIMessage", "ToolMessage", "AIMessage", "ToolMessage", "AIMessage",
+    ]
+    tool_messages = [m for m in history if isinstance(m, ToolMessage)]
+    assert [m.tool_call_id for m in tool_messages] == ["call_0", "call_1"]
+    assert tool_messages[0].id != tool_messages[1].id
+    assert [m.content for m in tool_messages] == ["Sunny in Paris", "Sunny in Paris"]
+    assert calls == ["Paris"]  # the second call was answered from the turn memo
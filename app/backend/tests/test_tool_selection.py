@@ -0,0 +1,36 @@
+from app.tool_selection import select_tool_groups, turn_cost
+
+
+def _conversation(*texts):
+    roles = ["user", "assistant"]
+    return [{"role": roles[i % 2], "content": t} for i, t in enumerate(texts)]
+
+
+def test_planning_binds_calendar_for_the_offered_follow_up():
+    messages = _conversation(
+        "Where can I go hiking near Denver next week?",
+        "Boulder looks great on Saturday. Want me to add it to your calendar?",
+        "Yes please, add it for Saturday at 9",
+    )
+    assert "calendar" in select_tool_groups(messages)
+
+
+def test_follow_up_without_keywords_keeps_calendar_from_planning_context():
+    messages = _conversation(
+        "Where can I go hiking near Denver next week?",
+        "Boulder looks great on Saturday. Want me to add it to your calendar?",
+        "Yes please",
+    )
+    assert select_tool_groups(messages) == {"planning", "weather", "calendar"}
+
+
+def test_turn_cost():
+    assert turn_cost(_conversation("Where can I go hiking near Denver?")) == "heavy"
+    assert turn_cost(_conversation("Who was Napoleon?")) == "light"
+    assert turn_cost(_conversation("What's the weather in Paris?")) == "light"
+
+
+def test_sunday_is_not_weather():
+    assert select_tool_groups(_conversation("Book a meeting with Sam on Sunday")) == {"calendar"}
+    assert "weather" in select_tool_groups(_conversation("Will it be sunny on Sunday?"))
+    assert "weather" in select_tool_groups(_conversation("When is sunset tonight?"))
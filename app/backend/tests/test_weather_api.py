@@ -0,0 +1,59 @@
+from unittest import mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+
+_CURRENT = {"temperature_c": 20.0, "temperature_f": 68.0, "condition": "Sunny", "condition_code": 0,
+            "humidity": 40, "wind_kmh": 8.0}
+_DAYS = [{"date": f"2026-03-0{i + 2}", "day": "Mon", "condition": "Sunny", "condition_code": 0,
+          "temp_high_c": 22, "temp_low_c": 12, "precip": 0, "wind_kmh": 8} for i in range(5)]
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+def test_current_returns_each_city_or_its_error(client):
+    results = {"Paris": {"current": _CURRENT, "fetched_at": 1},
+               "Atlantis": {"error": "City 'Atlantis' not found", "city": "Atlantis"}}
+    with mock.patch.object(main, "get_current_conditions_many", return_value=results) as many:
+        resp = client.get("/weather/current", params=[("city", "Paris"), ("city", " Paris "), ("city", "Atlantis")])
+
+    many.assert_called_once_with(["Paris", "Atlantis"])
+    assert resp.status_code == 200
+    assert resp.json() == [
+        {"city": "Paris", "current": _CURRENT, "fetched_at": 1, "stale": False},
+        {"city": "Atlantis", "error": "City 'Atlantis' not found"},
+    ]
+
+
+def test_forecast_is_cut_to_the_requested_days(client):
+    with mock.patch.object(main, "get_weather_data_many",
+                           return_value={"Oslo": {"current": _CURRENT, "forecast": _DAYS, "stale": True}}):
+        resp = client.get("/weather/forecast", params={"city": "Oslo", "days": 2})
+
+    body = resp.json()[0]
+    assert [d["date"] for d in body["forecast"]] == ["2026-03-02", "2026-03-03"]
+    assert body["stale"] is True
+
+
+def test_activity_scores_per_day(client):
+    with mock.patch.object(main, "get_weather_data_many", return_value={"Nice": {"forecast": _DAYS}}):
+        resp = client.get("/activities/score", params=[("city", "Nice"), ("activity", "hiking"), ("days", "1")])
+
+    (day,) = resp.json()[0]["days"]
+    assert day["date"] == "2026-03-02"
+    assert [a["activity"] for a in day["activities"]] == ["hiking"]
+    assert day["activities"][0]["ok"] is True
+
+
+def test_bad_requests_are_rejected(client):
+    assert client.get("/weather/current", params={"city": " "}).status_code == 400
+    too_many = [("city", f"c{i}") for i in range(main.WEATHER_API_MAX_CITIES + 1)]
+    assert client.get("/weather/current", params=too_many).status_code == 400
+    assert client.get("/weather/forecast", params={"city": "Oslo", "days": 11}).status_code == 422
+    resp = client.get("/activities/score", params=[("city", "Nice"), ("activity", "skydiving")])
+    assert resp.status_code == 400 and "skydiving" in resp.json()["detail"]
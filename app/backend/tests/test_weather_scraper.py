@@ -0,0 +1,116 @@
+from datetime import date, datetime, timedelta, timezone
+from unittest import mock
+
+import pytest
+import requests
+from bs4 import BeautifulSoup
+
+from app.tools import weather_scraper
+
+
+def _tenday(names):
+    cards = "".join(
+        '<div data-testid="DetailsSummary">'
+        f'<h2 data-testid="daypartName">{name}</h2>'
+        '<span class="DetailsSummary--wxPhrase--nhYpy">Sunny</span>'
+        '<span data-testid="TemperatureValue">70°</span><span data-testid="TemperatureValue">50°</span>'
+        '</div>' for name in names)
+    return BeautifulSoup(f"<html><body>{cards}</body></html>", "html.parser")
+
+
+def test_forecast_dates_follow_the_card_names_not_the_server_date():
+    server_today = date(2026, 3, 30)
+    local = [server_today + timedelta(days=i) for i in range(1, 5)]  # city already on the 31st
+    names = ["Tonight"] + [f"{d:%a} {d.day}" for d in local[1:]]
+
+    forecast = weather_scraper._extract_forecast(_tenday(names), start=server_today)
+
+    assert [d["date"] for d in forecast] == [d.isoformat() for d in local]
+    assert forecast[2]["date"] == "2026-04-02"  # month rollover
+
+
+def test_roll_forward_uses_the_city_midnight():
+    utc_now = datetime.now(timezone.utc)
+    forecast = [{"date": (utc_now + timedelta(days=i)).date().isoformat()} for i in (-1, 0, 1)]
+
+    behind = weather_scraper._roll_forward({"forecast": forecast, "utc_offset_hours": -utc_now.hour - 1})
+    assert behind["forecast"] == forecast  # still yesterday (UTC) there
+
+    ahead = weather_scraper._roll_forward({"forecast": forecast, "utc_offset_hours": 24 - utc_now.hour})
+    assert ahead["forecast"] == forecast[2:]
+
+
+def _response(status, headers=None, body=b""):
+    resp = requests.Response()
+    resp.status_code = status
+    resp.headers.update(headers or {})
+    resp._content = body
+    return resp
+
+
+def test_not_modified_reuses_the_payload_and_extends_the_validators():
+    url = "https://weather.example/tenday/304"
+    weather_scraper._store_validators(url, _response(200, {"ETag": '"v1"'}), {"forecast": ["cached"]})
+    with mock.patch.object(weather_scraper, "_polite_request", return_value=_response(304, {"ETag": '"v2"'})) as get, \
+            mock.patch.object(weather_scraper, "_cache_set", wraps=weather_scraper._cache_set) as cache_set:
+        resp, payload = weather_scraper._fetch_revalidated(url)
+
+    assert resp is None and payload == {"forecast": ["cached"]}
+    assert get.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+    cache_set.assert_called_once_with(f"revalidate:{url}", mock.ANY, weather_scraper.VALIDATOR_TTL)
+    assert weather_scraper._cache_get(f"revalidate:{url}")["etag"] == '"v2"'
+
+
+def test_not_modified_without_a_stored_copy_is_an_error():
+    with mock.patch.object(weather_scraper, "_polite_request", return_value=_response(304)):
+        with pytest.raises(requests.HTTPError):
+            weather_scraper._fetch_revalidated("https://weather.example/tenday/unknown")
+
+
+def test_full_response_is_returned_for_parsing():
+    with mock.patch.object(weather_scraper, "_polite_request", return_value=_response(200, body=b"<html/>")):
+        resp, payload = weather_scraper._fetch_revalidated("https://weather.example/tenday/new")
+    assert resp.content == b"<html/>" and payload is None
+
+
+def test_current_conditions_fall_back_to_the_cached_forecast_without_scraping():
+    city = "Fallbackville"
+    weather_scraper._cache_set(weather_scraper.weather_cache_key(city),
+                               {"date_retrieved": "2026-03-02", "fetched_at": 1, "current": {"temperature_c": 9}}, 60)
+    reads, cache_get = [], weather_scraper._cache_get
+    with mock.patch.object(weather_scraper, "get_place_id_from_coords", return_value="loc"), \
+            mock.patch.object(weather_scraper, "_polite_request", side_effect=requests.ConnectionError("down")), \
+            mock.patch.object(weather_scraper, "get_weather_data") as full_scrape, \
+            mock.patch.object(weather_scraper, "_cache_get", side_effect=lambda k: reads.append(k) or cache_get(k)):
+        data = weather_scraper.get_current_conditions(city)
+
+    full_scrape.assert_not_called()
+    assert data["stale"] is True and data["current"] == {"temperature_c": 9}
+    assert reads.count(weather_scraper.current_cache_key(city)) == 1
+
+
+def test_current_conditions_error_when_nothing_is_cached():
+    with mock.patch.object(weather_scraper, "get_place_id_from_coords", return_value="loc"), \
+            mock.patch.object(weather_scraper, "_polite_request", side_effect=requests.ConnectionError("down")), \
+            mock.patch.object(weather_scraper, "get_weather_data") as full_scrape:
+        data = weather_scraper.get_current_conditions("Nowhereville")
+
+    full_scrape.assert_not_called()
+    assert "error" in data
+
+
+
+def test_weather_refresh_on_304_reuses_the_parsed_payload():
+    city = "Revalidville"
+    first = _tenday(["Today", "Tue 3"])
+    with mock.patch.object(weather_scraper, "get_place_id_from_coords", return_value="reval"), \
+            mock.patch.object(weather_scraper, "_polite_request",
+                              return_value=_response(200, {"ETag": '"a"'}, str(first).encode())):
+        fresh = weather_scraper.get_weather_data(city, refresh=True)
+    with mock.patch.object(weather_scraper, "get_place_id_from_coords", return_value="reval"), \
+            mock.patch.object(weather_scraper, "_polite_request", return_value=_response(304)), \
+            mock.patch.object(weather_scraper, "_extract_forecast") as parse:
+        again = weather_scraper.get_weather_data(city, refresh=True)
+
+    parse.assert_not_called()
+    assert again["forecast"] == fresh["forecast"] and len(fresh["forecast"]) == 2